@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from . import hashing
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend that checks and upgrades password hashes on the bounded pool of
+    accounts.hashing, so authenticate() and its user_login_failed signal still apply.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway, so an unknown username takes as long as a wrong password
+            hashing.make_password(password)
+            return None
+        matches, needs_rehash = hashing.check_password(password, user.password)
+        if not matches or not self.user_can_authenticate(user):
+            return None
+        if needs_rehash:
+            user.password = hashing.make_password(password)
+            user.save(update_fields=['password'])
+        return user
@@ -0,0 +1,109 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+FAVORITE_IDS_TIMEOUT = 60 * 60
+
+
+def cache_timeout(timeout):
+    """
+    timeout, cut to settings.LOCAL_CACHE_TIMEOUT when the cache is per process: an
+    invalidation only reaches the process that made it, so the others must not keep
+    their copy for long.
+    """
+    local = getattr(settings, 'LOCAL_CACHE_TIMEOUT', None)
+    if local is None:
+        return timeout
+    return local if timeout is None else min(timeout, local)
+
+
+def favorite_ids_key(user_id):
+    return f'accounts:favorite_ids:{user_id}'
+
+
+def get_favorite_ids(user_id):
+    """Return the set of program ids the user has favorited, cached until it changes"""
+    from .models import Favorite
+
+    if user_id is None:
+        # Alumni have no user and no favorites; they must not share a cache entry
+        return set()
+    key = favorite_ids_key(user_id)
+    program_ids = cache.get(key)
+    if program_ids is None:
+        program_ids = set(Favorite.objects.filter(user_id=user_id).values_list('program_id', flat=True))
+        cache.set(key, program_ids, cache_timeout(FAVORITE_IDS_TIMEOUT))
+    return program_ids
+
+
+def invalidate_favorite_ids(user_id):
+    cache.delete(favorite_ids_key(user_id))
+
+
+PROFILE_TIMEOUT = 60 * 60
+
+
+def profile_key(user_id):
+    return f'accounts:profile:{user_id}'
+
+
+def get_profile(user):
+    """Return the user's profile, cached until it or the user's favorites change"""
+    from .models import Favorite, Profile
+
+    key = profile_key(user.id)
+    profile = cache.get(key)
+    if profile is None:
+        # Profiles are created at signup; this only fills in users created before that
+        profile, _ = Profile.objects.get_or_create(
+            user_id=user.id, defaults={'favorite_count': Favorite.objects.filter(user_id=user.id).count()}
+        )
+        cache.set(key, profile, cache_timeout(PROFILE_TIMEOUT))
+    return profile
+
+
+def invalidate_profile(user_id):
+    cache.delete(profile_key(user_id))
+
+
+ALUMNI_VERSION_KEY = 'accounts:alumni_version'
+
+
+def get_alumni_version():
+    """
+    Return the token identifying the current set of alumni. With a per-process cache it
+    expires after LOCAL_CACHE_TIMEOUT, so other processes pick up bumps they never saw.
+    """
+    version = cache.get(ALUMNI_VERSION_KEY)
+    if version is None:
+        cache.add(ALUMNI_VERSION_KEY, uuid.uuid4().hex, timeout=cache_timeout(None))
+        version = cache.get(ALUMNI_VERSION_KEY)
+    return version
+
+
+def bump_alumni_version():
+    """Invalidate everything derived from the alumni, such as the directory index"""
+    version = uuid.uuid4().hex
+    cache.set(ALUMNI_VERSION_KEY, version, timeout=cache_timeout(None))
+    return version
+
+
+# Logged-in users and alumni are cached briefly so authenticated requests skip their lookup
+PRINCIPAL_TIMEOUT = 60
+
+
+def user_principal_key(user_id):
+    return f'accounts:principal:user:{user_id}'
+
+
+def alumni_principal_key(alumni_id):
+    return f'accounts:principal:alumni:{alumni_id}'
+
+
+def invalidate_user_principal(user_id):
+    cache.delete(user_principal_key(user_id))
+
+
+def invalidate_alumni_principal(alumni_id):
+    cache.delete(alumni_principal_key(alumni_id))
@@ -0,0 +1,168 @@
+"""
+In-memory alumni directory index.
+
+Active alumni are kept in one fixed order (most recent graduation year first, then last
+and first name) and every filter resolves to a bitset over that order, as in
+programs.facets: one bitset per program, graduation year and study-abroad term, and a
+posting list per name token. Name search matches tokens by prefix through a sorted
+token list, or also by trigram similarity when fuzzy matching is asked for.
+Only alumni ids are kept; the rows of a result page are loaded from the database.
+The index is rebuilt at most once per alumni version, i.e. after any alumni write.
+"""
+import bisect
+import functools
+import re
+import threading
+import unicodedata
+from array import array
+from collections import defaultdict
+
+from .caching import get_alumni_version
+from .models import Alumni
+
+# Smallest trigram similarity for a fuzzy name match, the pg_trgm default
+FUZZY_THRESHOLD = 0.3
+
+_WORD_RE = re.compile(r'[^\W_]+')
+
+
+@functools.lru_cache(maxsize=65536)
+def normalize(text):
+    """Case- and accent-insensitive form of a name or term"""
+    text = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(char for char in text if not unicodedata.combining(char)).strip()
+
+
+@functools.lru_cache(maxsize=65536)
+def name_tokens(text):
+    return _WORD_RE.findall(normalize(text))
+
+
+def trigrams(token):
+    padded = f'  {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class AlumniDirectory:
+    """Bitsets and name postings over a fixed ordering of active alumni"""
+
+    def __init__(self, alumni):
+        """alumni: (id, first_name, last_name, program_id, graduation_year, study_abroad_term) tuples"""
+        alumni = sorted(alumni, key=lambda alum: (-alum[4], normalize(alum[2]), normalize(alum[1]), alum[0]))
+        self.ids = array('q', (alum[0] for alum in alumni))
+        self.byte_length = (len(alumni) + 7) // 8
+        self.all_bits = (1 << len(alumni)) - 1
+
+        programs, years, terms = defaultdict(list), defaultdict(list), defaultdict(list)
+        postings = defaultdict(lambda: array('I'))
+        for position, (_, first_name, last_name, program_id, graduation_year, term) in enumerate(alumni):
+            programs[program_id].append(position)
+            years[graduation_year].append(position)
+            terms[normalize(term)].append(position)
+            for token in set(name_tokens(first_name) + name_tokens(last_name)):
+                postings[token].append(position)
+
+        self.programs = {key: self.to_bitset(positions) for key, positions in programs.items()}
+        self.years = {key: self.to_bitset(positions) for key, positions in years.items()}
+        self.terms = {key: self.to_bitset(positions) for key, positions in terms.items()}
+        self.tokens = sorted(postings)
+        self.postings = [postings[token] for token in self.tokens]
+        self.trigram_tokens = defaultdict(list)
+        for index, token in enumerate(self.tokens):
+            for trigram in trigrams(token):
+                self.trigram_tokens[trigram].append(index)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def to_bitset(self, positions):
+        bits = bytearray(self.byte_length)
+        for position in positions:
+            bits[position >> 3] |= 1 << (position & 7)
+        return int.from_bytes(bits, 'little')
+
+    def matching_tokens(self, token, fuzzy=False):
+        """Indexes of the name tokens starting with token, plus similar ones when fuzzy"""
+        start = bisect.bisect_left(self.tokens, token)
+        end = bisect.bisect_left(self.tokens, token + '\U0010ffff', start)
+        matches = set(range(start, end))
+        if fuzzy:
+            query = trigrams(token)
+            shared = defaultdict(int)
+            for trigram in query:
+                for index in self.trigram_tokens.get(trigram, ()):
+                    shared[index] += 1
+            for index, count in shared.items():
+                union = len(query) + len(trigrams(self.tokens[index])) - count
+                if count / union >= FUZZY_THRESHOLD:
+                    matches.add(index)
+        return matches
+
+    def name_bits(self, token, fuzzy=False):
+        indexes = self.matching_tokens(token, fuzzy)
+        return self.to_bitset(position for index in indexes for position in self.postings[index])
+
+    def match(self, program_ids=(), year_from=None, year_to=None, terms=(), query='', fuzzy=False):
+        """Bitset of alumni matching every given filter; values within one filter are OR'ed"""
+        bits = self.all_bits
+        if program_ids:
+            bits &= self.union(self.programs.get(program_id, 0) for program_id in program_ids)
+        if year_from is not None or year_to is not None:
+            bits &= self.union(
+                year_bits for year, year_bits in self.years.items()
+                if (year_from is None or year >= year_from) and (year_to is None or year <= year_to)
+            )
+        if terms:
+            bits &= self.union(self.terms.get(normalize(term), 0) for term in terms)
+        for token in name_tokens(query):
+            if not bits:
+                break
+            bits &= self.name_bits(token, fuzzy)
+        return bits
+
+    @staticmethod
+    def union(bitsets):
+        bits = 0
+        for bitset in bitsets:
+            bits |= bitset
+        return bits
+
+    def search(self, offset=0, limit=20, **filters):
+        """Return the number of matching alumni and the ids of one page of them, in directory order"""
+        bits = self.match(**filters)
+        count = bits.bit_count()
+        ids = []
+        skip = offset
+        for byte_index, byte in enumerate(bits.to_bytes(self.byte_length, 'little')):
+            if not byte:
+                continue
+            if skip >= byte.bit_count():
+                skip -= byte.bit_count()
+                continue
+            for bit in range(8):
+                if byte >> bit & 1:
+                    if skip:
+                        skip -= 1
+                    else:
+                        ids.append(self.ids[byte_index * 8 + bit])
+                        if len(ids) == limit:
+                            return count, ids
+        return count, ids
+
+
+_directory = None
+_directory_lock = threading.Lock()
+
+
+def get_alumni_directory():
+    """Return the directory index for the current alumni version, building it if needed"""
+    global _directory
+    version = get_alumni_version()
+    if _directory is None or _directory[0] != version:
+        with _directory_lock:
+            if _directory is None or _directory[0] != version:
+                alumni = Alumni.objects.filter(is_active=True).values_list(
+                    'id', 'first_name', 'last_name', 'program_id', 'graduation_year', 'study_abroad_term'
+                )
+                _directory = (version, AlumniDirectory(alumni.iterator(chunk_size=5000)))
+    return _directory[1]
@@ -0,0 +1,83 @@
+"""
+Bounded pool for password hashing.
+
+Hashing a password is deliberately slow, and a burst of logins or signups would otherwise
+hash on as many request threads as there are requests, leaving no CPU for anything else.
+Every hash made or checked by the accounts app runs on PASSWORD_HASHING_WORKERS threads
+instead (hashlib releases the GIL while it hashes). At most PASSWORD_HASHING_QUEUE more
+requests wait for a worker; a request that cannot get a place within
+PASSWORD_HASHING_TIMEOUT seconds is answered with 503 and a Retry-After header.
+Only hashing runs in the pool: database access stays on the request thread.
+Logins reach the pool through authenticate() and accounts.backends.PooledModelBackend.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class HashingBusy(APIException):
+    """Raised when every place in the hashing pool is taken"""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many sign-ins at once, please try again in a moment.'
+    default_code = 'hashing_busy'
+    wait = 1  # Sent as Retry-After
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the (executor, slots) pair, created on first use from the current settings"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = settings.PASSWORD_HASHING_WORKERS
+                _pool = (
+                    ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hashing'),
+                    threading.BoundedSemaphore(workers + settings.PASSWORD_HASHING_QUEUE),
+                )
+    return _pool
+
+
+def reset_pool():
+    """Drop the pool so the next hash builds one from the current settings"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool[0].shutdown(wait=False)
+        _pool = None
+
+
+def run_hashing(func, *args):
+    """Run func(*args) on the hashing pool and wait for its result"""
+    executor, slots = get_pool()
+    if not slots.acquire(timeout=settings.PASSWORD_HASHING_TIMEOUT):
+        raise HashingBusy()
+    try:
+        return executor.submit(func, *args).result()
+    finally:
+        slots.release()
+
+
+def make_password(raw_password):
+    return run_hashing(hashers.make_password, raw_password)
+
+
+def check_password(raw_password, encoded):
+    """
+    Check a password against its hash on the pool.
+    Returns (matches, needs_rehash); a matching hash needs rehashing when it was made
+    with another hasher or work factor than the current default.
+    """
+    if not run_hashing(hashers.check_password, raw_password, encoded):
+        return False, False
+    preferred = hashers.get_hasher('default')
+    hasher = hashers.identify_hasher(encoded)
+    return True, hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
@@ -0,0 +1,53 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Delete expired sessions in small batches, so the session table is never locked for long'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of sessions deleted per statement'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.0,
+            help='Seconds to wait between batches'
+        )
+
+    def handle(self, *args, **options):
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        if not hasattr(store, 'get_model_class'):
+            # Cache and cookie sessions expire on their own; file sessions have their own sweep
+            try:
+                store.clear_expired()
+            except NotImplementedError:
+                pass
+            self.stdout.write(f'{settings.SESSION_ENGINE} keeps no session table, nothing to purge')
+            return
+
+        expired = store.get_model_class().objects.filter(expire_date__lt=timezone.now())
+        start = time.perf_counter()
+        deleted = 0
+        while True:
+            keys = list(expired.values_list('session_key', flat=True)[:options['batch_size']])
+            if not keys:
+                break
+            store.get_model_class().objects.filter(session_key__in=keys).delete()
+            deleted += len(keys)
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Expired sessions deleted: {deleted} in {time.perf_counter() - start:.2f}s'
+            )
+        )
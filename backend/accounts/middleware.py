@@ -0,0 +1,65 @@
+from django.contrib import auth
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+from .caching import PRINCIPAL_TIMEOUT, user_principal_key, alumni_principal_key
+
+
+def get_cached_user(request):
+    """
+    The logged-in user, from the principal cache when the session still matches it.
+    Falls back to django.contrib.auth.get_user, which also checks the session hash.
+    """
+    user_id = request.session.get(auth.SESSION_KEY)
+    if user_id is None:
+        return AnonymousUser()
+    user = cache.get(user_principal_key(user_id))
+    session_hash = request.session.get(auth.HASH_SESSION_KEY, '')
+    if user is not None and constant_time_compare(session_hash, user.get_session_auth_hash()):
+        return user
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        cache.set(user_principal_key(user.pk), user, PRINCIPAL_TIMEOUT)
+    return user
+
+
+def get_cached_alumni(alumni_id):
+    """The alumni with this id, from the principal cache when possible, or None"""
+    from .models import Alumni
+
+    key = alumni_principal_key(alumni_id)
+    alumni = cache.get(key)
+    if alumni is None:
+        alumni = Alumni.objects.filter(id=alumni_id).first()
+        if alumni is not None:
+            cache.set(key, alumni, PRINCIPAL_TIMEOUT)
+    return alumni
+
+
+def get_principal(request):
+    """The logged-in Alumni, else the user (an AnonymousUser when nobody is logged in)"""
+    alumni_id = request.session.get('alumni_id')
+    if alumni_id:
+        alumni = get_cached_alumni(alumni_id)
+        if alumni is not None:
+            return alumni
+    return request.user
+
+
+class PrincipalMiddleware:
+    """
+    Sets request.principal to whoever is logged in, resolved lazily once per request.
+    Must come after AuthenticationMiddleware, whose request.user it replaces with a cached lookup.
+    Django REST framework authentication still runs first, so a user it authenticates
+    (e.g. with force_authenticate in tests) is the one request.principal sees.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
+        request.principal = SimpleLazyObject(lambda: get_principal(request))
+        return self.get_response(request)
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.24 on 2026-10-19 17:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alumni'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alumni',
+            index=models.Index(fields=['program', 'is_active', 'graduation_year', 'id'], name='alumni_program_active_year'),
+        ),
+    ]
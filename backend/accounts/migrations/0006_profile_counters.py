@@ -0,0 +1,43 @@
+# Generated by Django 4.2.24 on 2026-10-19 17:33
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_profiles_and_counters(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    Profile = apps.get_model('accounts', 'Profile')
+    Alumni = apps.get_model('accounts', 'Alumni')
+    Favorite = apps.get_model('accounts', 'Favorite')
+    Review = apps.get_model('programs', 'Review')
+
+    Profile.objects.bulk_create(
+        [Profile(user_id=user_id) for user_id in User.objects.filter(profile__isnull=True).values_list('id', flat=True)],
+        batch_size=500,
+    )
+    for row in Favorite.objects.values('user_id').annotate(favorites=Count('id')):
+        Profile.objects.filter(user_id=row['user_id']).update(favorite_count=row['favorites'])
+    for row in Review.objects.values('alumni_id').annotate(reviews=Count('id')):
+        Alumni.objects.filter(pk=row['alumni_id']).update(review_count=row['reviews'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_alumni_program_index'),
+        ('programs', '0004_review'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alumni',
+            name='review_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='favorite_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_profiles_and_counters, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,12 @@
-from django.db import models
+import functools
+
+from django.db import connection, models, transaction
+from django.db.models import F
+from django.utils import timezone
 from django.contrib.auth.models import User
-from django.contrib.auth.hashers import make_password, check_password
 from programs.models import Program
+from programs.popularity import record_favorites_added, record_favorites_removed
+from . import hashing
 
 
 class Alumni(models.Model):
@@ -15,21 +20,36 @@ class Alumni(models.Model):
     bio = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
+    # Kept up to date by the Review signals in accounts.signals
+    review_count = models.IntegerField(default=0)
 
     class Meta:
         verbose_name_plural = "Alumni"
         ordering = ['-graduation_year']
+        indexes = [
+            # Serves the per-program listing and its (graduation_year, id) keyset pages
+            models.Index(fields=['program', 'is_active', 'graduation_year', 'id'], name='alumni_program_active_year'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.program.name}"
 
     def set_password(self, raw_password):
         """Hash and set password"""
-        self.password = make_password(raw_password)
+        self.password = hashing.make_password(raw_password)
 
     def check_password(self, raw_password):
-        """Check if provided password matches stored hash"""
-        return check_password(raw_password, self.password)
+        """Check if provided password matches stored hash, rehashing it if the work factor changed"""
+        matches, needs_rehash = hashing.check_password(raw_password, self.password)
+        if needs_rehash:
+            self.set_password(raw_password)
+            self.save(update_fields=['password'])
+        return matches
+
+    @property
+    def is_authenticated(self):
+        """Alumni are only ever a logged-in principal, like a User"""
+        return True
 
 
 class Favorite(models.Model):
@@ -42,12 +62,85 @@ class Favorite(models.Model):
     
     def __str__(self):
         return f"{self.user.username} - {self.program.name}"
+
+    @classmethod
+    def insert_new(cls, user, program_ids):
+        """
+        Favorite the given programs with a single INSERT ... ON CONFLICT DO NOTHING, returning
+        the program ids the database actually inserted, so a favorite a concurrent request
+        added first is never counted twice. Sends no signals.
+        """
+        quote = connection.ops.quote_name
+        user_column, program_column, created_column = (
+            quote(cls._meta.get_field(name).column) for name in ('user', 'program', 'created_at')
+        )
+        created_at = connection.ops.adapt_datetimefield_value(timezone.now())
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {quote(cls._meta.db_table)} ({user_column}, {program_column}, {created_column}) '
+                f'VALUES {", ".join(["(%s, %s, %s)"] * len(program_ids))} '
+                f'ON CONFLICT ({user_column}, {program_column}) DO NOTHING RETURNING {program_column}',
+                [value for program_id in program_ids for value in (user.id, program_id, created_at)],
+            )
+            return {program_id for program_id, in cursor.fetchall()}
+
+    @classmethod
+    def add_many(cls, user, program_ids):
+        """
+        Favorite every given program with a single INSERT, skipping ones already favorited.
+        Returns the program ids that were newly added.
+        """
+        from .caching import invalidate_favorite_ids, invalidate_profile
+
+        program_ids = list(dict.fromkeys(program_ids))
+        if not program_ids:
+            return []
+        with transaction.atomic():
+            inserted = cls.insert_new(user, program_ids)
+            added = [program_id for program_id in program_ids if program_id in inserted]
+            record_favorites_added(added)
+            Profile.objects.filter(user=user).update(favorite_count=F('favorite_count') + len(added))
+            # The INSERT sends no signals, so the cached ids and profile are dropped here, once the
+            # favorites are visible; dropped earlier, a concurrent read could cache the old ones again
+            transaction.on_commit(functools.partial(invalidate_favorite_ids, user.id))
+            transaction.on_commit(functools.partial(invalidate_profile, user.id))
+        return added
+
+    @classmethod
+    def remove_many(cls, user, program_ids):
+        """Remove the given programs from the user's favorites, returning the ids that were removed"""
+        from .caching import invalidate_favorite_ids, invalidate_profile
+
+        if not program_ids:
+            return []
+        with transaction.atomic():
+            # Locked, so a concurrent removal of the same favorites waits and then finds none to uncount
+            removed = list(
+                cls.objects.filter(user=user, program_id__in=list(program_ids))
+                .select_for_update().values_list('id', 'program_id', 'created_at')
+            )
+            if not removed:
+                return []
+            # Deleted with one statement and no signals; the counters are changed for all of them below
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM {connection.ops.quote_name(cls._meta.db_table)} '
+                    f'WHERE {connection.ops.quote_name(cls._meta.pk.column)} IN ({", ".join(["%s"] * len(removed))})',
+                    [favorite_id for favorite_id, _, _ in removed],
+                )
+            record_favorites_removed([(program_id, created_at) for _, program_id, created_at in removed])
+            Profile.objects.filter(user=user).update(favorite_count=F('favorite_count') - len(removed))
+            transaction.on_commit(functools.partial(invalidate_favorite_ids, user.id))
+            transaction.on_commit(functools.partial(invalidate_profile, user.id))
+        return [program_id for _, program_id, _ in removed]
     
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     year = models.CharField(max_length=10, blank=True)
     major = models.CharField(max_length=100, blank=True)
     study_abroad_term = models.CharField(max_length=100, blank=True)
+    # Kept up to date by Favorite.add_many, Favorite.remove_many and the Favorite signals in accounts.signals
+    favorite_count = models.IntegerField(default=0)
 
     def __str__(self):
         return f"{self.user.username} Profile"
\ No newline at end of file
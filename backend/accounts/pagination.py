@@ -0,0 +1,81 @@
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class FavoriteCursorPagination(CursorPagination):
+    """
+    Keyset pagination over favorites, newest first.
+    The body stays a plain list; the neighbouring pages are linked from the Link header.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def get_paginated_response(self, data):
+        response = Response(data)
+        links = []
+        next_link = self.get_next_link()
+        previous_link = self.get_previous_link()
+        if next_link:
+            links.append(f'<{next_link}>; rel="next"')
+        if previous_link:
+            links.append(f'<{previous_link}>; rel="prev"')
+        if links:
+            response['Link'] = ', '.join(links)
+        return response
+
+
+class AlumniKeysetPagination:
+    """
+    Keyset pagination over alumni, most recent graduation year first.
+    The cursor is the (graduation_year, id) of the last row on the page, so every page is
+    a single range scan of the (program, is_active, graduation_year, id) index however deep it is.
+    """
+    ordering = ('-graduation_year', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            graduation_year, alumni_id = (int(part) for part in cursor.split('.'))
+        except ValueError:
+            raise NotFound('Invalid cursor')
+        return graduation_year, alumni_id
+
+    def paginate_queryset(self, queryset, request):
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        if cursor:
+            graduation_year, alumni_id = cursor
+            queryset = queryset.filter(
+                Q(graduation_year__lt=graduation_year) | Q(graduation_year=graduation_year, id__lt=alumni_id)
+            )
+        rows = list(queryset.order_by(*self.ordering)[:page_size + 1])
+        self.page = rows[:page_size]
+        self.has_next = len(rows) > page_size
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, f'{last.graduation_year}.{last.id}'
+        )
@@ -1,20 +1,22 @@
-from rest_framework.permissions import BasePermission
+from rest_framework.permissions import BasePermission, SAFE_METHODS
 
 
 class IsAuthenticatedOrAlumni(BasePermission):
     """
     Custom permission to allow access to authenticated users OR alumni.
-    - Checks if user is authenticated (Django User)
-    - OR checks if alumni_id exists in session
+    request.principal (see accounts.middleware) is the logged-in User or Alumni.
     """
     
     def has_permission(self, request, view):
-        # Check if regular user is authenticated
-        if request.user and request.user.is_authenticated:
-            return True
-        
-        # Check if alumni is authenticated via session
-        if 'alumni_id' in request.session:
-            return True
-        
-        return False
+        return request.principal.is_authenticated
+
+
+class UserWritesOnly(BasePermission):
+    """
+    Alumni may read endpoints shared with users, but only a logged-in User can write
+    through them, since favorites and the like belong to a User.
+    """
+    message = 'Only student accounts can change favorites.'
+
+    def has_permission(self, request, view):
+        return request.method in SAFE_METHODS or request.user.is_authenticated
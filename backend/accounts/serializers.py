@@ -2,10 +2,12 @@
 # Total time: 1 hour
 
 from rest_framework import serializers
-from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from . import hashing
 from .models import Favorite, Profile, Alumni
-from programs.serializers import ProgramSerializer
+from programs.models import Program
+from programs.serializers import ProgramSerializer, ProgramSummarySerializer
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -26,7 +28,14 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         """Create a new user"""
         validated_data.pop('password_confirm')
-        user = User.objects.create_user(**validated_data)
+        password = validated_data.pop('password')
+
+        # Normalized as create_user would, but hashed on the bounded pool
+        validated_data['username'] = User.normalize_username(validated_data['username'])
+        validated_data['email'] = User.objects.normalize_email(validated_data.get('email', ''))
+        user = User(**validated_data)
+        user.password = hashing.make_password(password)
+        user.save()
         return user
 
 
@@ -41,7 +50,7 @@ class UserLoginSerializer(serializers.Serializer):
         password = attrs.get('password')
 
         if username and password:
-            user = authenticate(username=username, password=password)
+            user = authenticate(self.context.get('request'), username=username, password=password)
             if not user:
                 raise serializers.ValidationError('Invalid credentials')
             if not user.is_active:
@@ -62,23 +71,62 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 class FavoriteSerializer(serializers.ModelSerializer):
-    """Serializer for favorites"""
-    program = ProgramSerializer(read_only=True)
+    """
+    Serializer for favorites.
+    The program is a short summary unless context['expand_program'] asks for the full program.
+    """
+    program = serializers.SerializerMethodField()
     program_id = serializers.CharField(write_only=True)
     
     class Meta:
         model = Favorite
         fields = ('id', 'program', 'program_id', 'created_at')
         read_only_fields = ('id', 'created_at')
+
+    def get_program(self, obj):
+        if self.context.get('expand_program'):
+            return ProgramSerializer(obj.program, context=self.context).data
+        return ProgramSummarySerializer(obj.program, context=self.context).data
     
+    def validate_program_id(self, value):
+        if not Program.objects.filter(program_id=value).exists():
+            raise serializers.ValidationError('Program not found')
+        return value
+
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
         return super().create(validated_data)
 
+
+class FavoriteBulkSerializer(serializers.Serializer):
+    """Program ids to add to and remove from the user's favorites in one request"""
+    add = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+    remove = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+
+    def validate_add(self, value):
+        found = set(Program.objects.filter(program_id__in=value).values_list('program_id', flat=True))
+        missing = sorted(set(value) - found)
+        if missing:
+            raise serializers.ValidationError(f"Programs not found: {', '.join(missing)}")
+        return value
+
+    def validate(self, attrs):
+        if not attrs['add'] and not attrs['remove']:
+            raise serializers.ValidationError('Nothing to add or remove')
+        return attrs
+
 class ProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = Profile
-        fields = ('user', 'year', 'major', 'study_abroad_term')
+        fields = ('user', 'year', 'major', 'study_abroad_term', 'favorite_count')
+        read_only_fields = ('favorite_count',)
+
+    def update(self, instance, validated_data):
+        # Only write the edited fields, so a concurrent favorite never has its count overwritten
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=list(validated_data))
+        return instance
 
 
 class AlumniRegistrationSerializer(serializers.ModelSerializer):
@@ -128,6 +176,8 @@ class AlumniLoginSerializer(serializers.Serializer):
                     raise serializers.ValidationError('Alumni account is disabled')
                 attrs['alumni'] = alumni
             except Alumni.DoesNotExist:
+                # Hash anyway, so an unknown email takes as long as a wrong password
+                hashing.make_password(password)
                 raise serializers.ValidationError('Invalid credentials')
         else:
             raise serializers.ValidationError('Must include email and password')
@@ -142,5 +192,27 @@ class AlumniSerializer(serializers.ModelSerializer):
     class Meta:
         model = Alumni
         fields = ('id', 'email', 'first_name', 'last_name', 'program', 'graduation_year',
+                  'study_abroad_term', 'bio', 'review_count', 'created_at')
+        read_only_fields = ('id', 'review_count', 'created_at')
+
+
+class AlumniRowSerializer(serializers.ModelSerializer):
+    """Flat alumni data for listings that already give the program once"""
+
+    class Meta:
+        model = Alumni
+        fields = ('id', 'email', 'first_name', 'last_name', 'graduation_year',
                   'study_abroad_term', 'bio', 'created_at')
-        read_only_fields = ('id', 'created_at')
\ No newline at end of file
+        read_only_fields = fields
+
+
+class AlumniDirectorySerializer(serializers.ModelSerializer):
+    """Alumni directory entry with the program referenced by id and name"""
+    program_id = serializers.CharField(read_only=True)
+    program_name = serializers.CharField(source='program.name', read_only=True)
+
+    class Meta:
+        model = Alumni
+        fields = ('id', 'email', 'first_name', 'last_name', 'program_id', 'program_name',
+                  'graduation_year', 'study_abroad_term')
+        read_only_fields = fields
@@ -0,0 +1,87 @@
+import functools
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.db.models import F
+from django.dispatch import receiver
+from django.utils import timezone
+
+from programs.models import Review
+from programs.popularity import record_favorites_added, record_favorites_removed
+from .caching import (
+    bump_alumni_version, invalidate_favorite_ids, invalidate_user_principal, invalidate_alumni_principal,
+    invalidate_profile,
+)
+from .models import Alumni, Favorite, Profile
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def invalidate_user_favorites(sender, instance, **kwargs):
+    """Adding or removing a favorite drops the user's cached favorite ids, once it is committed"""
+    transaction.on_commit(functools.partial(invalidate_favorite_ids, instance.user_id))
+
+
+@receiver(post_save, sender=Favorite)
+def count_added_favorite(sender, instance, created, raw=False, **kwargs):
+    """
+    Count favorites saved one at a time, e.g. by Favorite.objects.create, on the program
+    and the user's profile. Favorite.add_many inserts without signals and counts its own.
+    """
+    if created and not raw:
+        record_favorites_added([instance.program_id], day=timezone.localdate(instance.created_at))
+        Profile.objects.filter(user_id=instance.user_id).update(favorite_count=F('favorite_count') + 1)
+        transaction.on_commit(functools.partial(invalidate_profile, instance.user_id))
+
+
+@receiver(post_delete, sender=Favorite)
+def count_removed_favorite(sender, instance, **kwargs):
+    """
+    Uncount favorites deleted through the ORM, including those deleted along with their
+    user or program. Favorite.remove_many deletes without signals and uncounts its own.
+    """
+    record_favorites_removed([(instance.program_id, instance.created_at)])
+    Profile.objects.filter(user_id=instance.user_id).update(favorite_count=F('favorite_count') - 1)
+    transaction.on_commit(functools.partial(invalidate_profile, instance.user_id))
+
+
+@receiver(post_save, sender=Alumni)
+@receiver(post_delete, sender=Alumni)
+def invalidate_alumni_caches(sender, instance, **kwargs):
+    """Any alumni change rebuilds the directory index and drops the cached principal"""
+    bump_alumni_version()
+    invalidate_alumni_principal(instance.id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """A changed or deleted user must not be served from the principal cache"""
+    invalidate_user_principal(instance.id)
+
+
+@receiver(post_save, sender=User)
+def create_profile(sender, instance, created, raw=False, **kwargs):
+    """Every user gets a profile at signup, so reading it never has to write"""
+    if created and not raw:
+        Profile.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_cached_profile(sender, instance, **kwargs):
+    transaction.on_commit(functools.partial(invalidate_profile, instance.user_id))
+
+
+@receiver(post_save, sender=Review)
+def count_added_review(sender, instance, created, **kwargs):
+    if created:
+        Alumni.objects.filter(pk=instance.alumni_id).update(review_count=F('review_count') + 1)
+        invalidate_alumni_principal(instance.alumni_id)
+
+
+@receiver(post_delete, sender=Review)
+def count_removed_review(sender, instance, **kwargs):
+    Alumni.objects.filter(pk=instance.alumni_id).update(review_count=F('review_count') - 1)
+    invalidate_alumni_principal(instance.alumni_id)
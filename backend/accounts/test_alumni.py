@@ -0,0 +1,200 @@
+"""
+Alumni Listing Tests for Accounts App
+Tests the paginated alumni-by-program listing and the alumni directory
+"""
+import itertools
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from accounts.caching import bump_alumni_version
+from accounts.models import Alumni
+from programs.models import Program, ProgramSection
+
+
+@pytest.fixture
+def program():
+    """Fixture to create a program with a section"""
+    program = Program.objects.create(
+        program_id='ALUM001',
+        name='Alumni Program',
+        latitude=0.0,
+        longitude=0.0
+    )
+    ProgramSection.objects.create(program=program, title='Overview', content=['Text'], order=0)
+    return program
+
+
+_emails = itertools.count()
+
+
+def create_alumni(program, count, years=(2021, 2022, 2023), is_active=True):
+    return [
+        Alumni.objects.create(
+            email=f'alum{next(_emails)}@vanderbilt.edu',
+            password='unused',
+            first_name=f'First{i}',
+            last_name=f'Last{i}',
+            program=program,
+            graduation_year=years[i % len(years)],
+            is_active=is_active,
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.mark.django_db
+class TestAlumniByProgram:
+    """Test listing the alumni of one program"""
+
+    def test_program_once_and_flat_rows(self, program):
+        """Test that the program is summarized once and alumni carry no program"""
+        create_alumni(program, 3)
+        create_alumni(program, 1, is_active=False)
+
+        response = APIClient().get(reverse('alumni_by_program', args=['ALUM001']))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['program']['program_id'] == 'ALUM001'
+        assert 'sections' not in response.data['program']
+        assert len(response.data['alumni']) == 3
+        assert all('program' not in row for row in response.data['alumni'])
+        assert response.data['next'] is None
+
+    def test_keyset_pages(self, program):
+        """Test that following next walks every alumnus once, most recent year first"""
+        alumni = create_alumni(program, 7)
+        client = APIClient()
+
+        seen = []
+        url = reverse('alumni_by_program', args=['ALUM001']) + '?page_size=3'
+        while url:
+            response = client.get(url)
+            seen.extend((row['graduation_year'], row['id']) for row in response.data['alumni'])
+            url = response.data['next']
+
+        assert seen == sorted(((alum.graduation_year, alum.id) for alum in alumni), reverse=True)
+
+    def test_constant_queries(self, program):
+        """Test that the number of queries does not grow with the number of alumni"""
+        url = reverse('alumni_by_program', args=['ALUM001'])
+        create_alumni(program, 2)
+        with CaptureQueriesContext(connection) as few:
+            APIClient().get(url)
+        create_alumni(program, 20)
+        with CaptureQueriesContext(connection) as many:
+            APIClient().get(url)
+
+        assert len(many) == len(few)
+
+    def test_invalid_cursor(self, program):
+        """Test that a malformed cursor is rejected"""
+        response = APIClient().get(reverse('alumni_by_program', args=['ALUM001']), {'cursor': 'abc'})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_program_not_found(self, db):
+        """Test listing alumni of a program that does not exist"""
+        response = APIClient().get(reverse('alumni_by_program', args=['MISSING']))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.fixture
+def directory():
+    """Fixture to create alumni of two programs over several years and terms"""
+    cache.clear()
+    user = User.objects.create_user(username='student', password='testpass123')
+    programs = [
+        Program.objects.create(program_id=f'DIR00{i}', name=f'Directory Program {i}', latitude=0.0, longitude=0.0)
+        for i in range(2)
+    ]
+    people = [
+        ('Ana', 'García', 0, 2020, 'Fall'),
+        ('Andrew', 'Smith', 0, 2022, 'Spring'),
+        ('Maria', 'Anders', 1, 2022, 'Fall'),
+        ('Jonathan', 'Smyth', 1, 2024, 'Summer'),
+        ('Anne', 'Lee', 1, 2019, 'Fall'),
+    ]
+    for first_name, last_name, program, year, term in people:
+        Alumni.objects.create(
+            email=f'{first_name.lower()}@vanderbilt.edu',
+            password='unused',
+            first_name=first_name,
+            last_name=last_name,
+            program=programs[program],
+            graduation_year=year,
+            study_abroad_term=term,
+        )
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def search(client, **params):
+    response = client.get(reverse('alumni_directory'), params)
+    assert response.status_code == status.HTTP_200_OK
+    return [f"{row['first_name']} {row['last_name']}" for row in response.data['results']]
+
+
+@pytest.mark.django_db
+class TestAlumniDirectory:
+    """Test searching the alumni directory"""
+
+    def test_order_and_count(self, directory):
+        """Test that alumni come most recent year first, then by last name"""
+        response = directory.get(reverse('alumni_directory'))
+
+        assert response.data['count'] == 5
+        assert search(directory) == [
+            'Jonathan Smyth', 'Maria Anders', 'Andrew Smith', 'Ana García', 'Anne Lee'
+        ]
+        assert response.data['results'][0]['program_name'] == 'Directory Program 1'
+
+    def test_filters(self, directory):
+        """Test the program, year range and term filters together"""
+        assert search(directory, program='DIR001', year_from=2020, term='fall') == ['Maria Anders']
+        assert search(directory, year_to=2020) == ['Ana García', 'Anne Lee']
+
+    def test_name_prefix(self, directory):
+        """Test that every word of the query must start a first or last name"""
+        assert search(directory, q='an') == ['Maria Anders', 'Andrew Smith', 'Ana García', 'Anne Lee']
+        assert search(directory, q='an gar') == ['Ana García']
+        assert search(directory, q='smy') == ['Jonathan Smyth']
+
+    def test_name_fuzzy(self, directory):
+        """Test that fuzzy search also finds similar spellings"""
+        assert search(directory, q='smith') == ['Andrew Smith']
+        assert search(directory, q='smith', fuzzy='true') == ['Jonathan Smyth', 'Andrew Smith']
+
+    def test_paging(self, directory):
+        """Test offset and limit"""
+        assert search(directory, offset=1, limit=2) == ['Maria Anders', 'Andrew Smith']
+
+    def test_rebuilt_after_alumni_write(self, directory):
+        """Test that alumni changes show up in the next search"""
+        assert search(directory, q='lee') == ['Anne Lee']
+        Alumni.objects.filter(last_name='Lee').get().delete()
+
+        assert search(directory, q='lee') == []
+
+    @pytest.mark.parametrize('local_timeout', [60, None])
+    def test_version_expires_with_local_cache(self, local_timeout):
+        """Test that a per-process cache lets other workers drop their index after a while"""
+        with override_settings(LOCAL_CACHE_TIMEOUT=local_timeout), mock.patch('accounts.caching.cache') as fake:
+            bump_alumni_version()
+
+        assert fake.set.call_args.kwargs['timeout'] == local_timeout
+
+    def test_requires_authentication(self, directory):
+        """Test searching without being logged in"""
+        response = APIClient().get(reverse('alumni_directory'))
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
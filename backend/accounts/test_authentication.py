@@ -136,6 +136,23 @@ class TestSignup:
 
         assert response.status_code == status.HTTP_400_BAD_REQUEST
 
+    def test_signup_normalizes_email(self, api_client):
+        """Test that signup lowercases the email domain like create_user"""
+        url = reverse('signup')
+        data = {
+            'username': 'newuser',
+            'email': 'New@EXAMPLE.com',
+            'password': 'password123',
+            'password_confirm': 'password123',
+        }
+
+        response = api_client.post(url, data, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        user = User.objects.get(username='newuser')
+        assert user.email == 'New@example.com'
+        assert user.check_password('password123')
+
 
 @pytest.mark.django_db
 class TestLogin:
@@ -2,13 +2,25 @@
 Favorites Tests for Accounts App
 Tests favorite program functionality including add, remove, list, and check
 """
+from unittest import mock
+
 import pytest
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
-from accounts.models import Favorite
-from programs.models import Program
+from accounts.caching import get_favorite_ids
+from accounts.models import Alumni, Favorite
+from programs.models import Program, Review
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
 
 
 @pytest.fixture
@@ -155,20 +167,20 @@ class TestAddFavorite:
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
     def test_add_favorite_duplicate(self, api_client, test_user, test_program):
-        """Test adding same program twice"""
+        """Test adding same program twice returns the existing favorite"""
         api_client.force_authenticate(user=test_user)
 
         # Add favorite first time
-        Favorite.objects.create(user=test_user, program=test_program)
+        favorite = Favorite.objects.create(user=test_user, program=test_program)
 
         # Try to add again
         url = reverse('favorites')
         data = {'program_id': 'TEST001'}
         response = api_client.post(url, data, format='json')
 
-        assert response.status_code == status.HTTP_400_BAD_REQUEST
-        assert 'error' in response.data
-        assert response.data['error'] == 'Program already favorited'
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['id'] == favorite.id
+        assert Favorite.objects.filter(user=test_user, program=test_program).count() == 1
 
     def test_add_favorite_nonexistent_program(self, api_client, test_user):
         """Test adding favorite with non-existent program ID"""
@@ -301,13 +313,14 @@ class TestCheckFavorite:
 class TestFavoritesIntegration:
     """Test complete favorites workflows"""
 
-    def test_add_check_remove_flow(self, api_client, test_user, test_program):
+    def test_add_check_remove_flow(self, api_client, test_user, test_program, django_capture_on_commit_callbacks):
         """Test complete flow: add -> check -> remove -> check"""
         api_client.force_authenticate(user=test_user)
 
         # Add favorite
         add_url = reverse('favorites')
-        add_response = api_client.post(add_url, {'program_id': 'TEST001'}, format='json')
+        with django_capture_on_commit_callbacks(execute=True):
+            add_response = api_client.post(add_url, {'program_id': 'TEST001'}, format='json')
         assert add_response.status_code == status.HTTP_201_CREATED
 
         # Check favorite (should be true)
@@ -317,7 +330,8 @@ class TestFavoritesIntegration:
 
         # Remove favorite
         remove_url = reverse('remove_favorite', kwargs={'program_id': 'TEST001'})
-        remove_response = api_client.delete(remove_url)
+        with django_capture_on_commit_callbacks(execute=True):
+            remove_response = api_client.delete(remove_url)
         assert remove_response.status_code == status.HTTP_200_OK
 
         # Check favorite (should be false)
@@ -407,3 +421,281 @@ class TestFavoriteModel:
         favorite = Favorite.objects.create(user=test_user, program=test_program)
 
         assert favorite.created_at is not None
+
+
+@pytest.fixture
+def favorited_programs(test_user):
+    """Fixture to favorite several located programs, oldest first"""
+    programs = []
+    for i in range(5):
+        program = Program.objects.create(
+            program_id=f'FAV00{i}',
+            name=f'Favorite Program {i}',
+            program_type='Exchange',
+            latitude=0.0,
+            longitude=0.0
+        )
+        Favorite.objects.create(user=test_user, program=program)
+        programs.append(program)
+    return programs
+
+
+@pytest.mark.django_db
+class TestCompactFavorites:
+    """Test the compact, paginated favorites listing"""
+
+    def test_favorites_return_program_summary(self, api_client, test_user, favorited_programs):
+        """Test that favorites carry a program summary instead of the full program"""
+        api_client.force_authenticate(user=test_user)
+
+        response = api_client.get(reverse('favorites'))
+
+        assert response.status_code == status.HTTP_200_OK
+        program = response.data[0]['program']
+        assert program['program_id'] == 'FAV004'
+        assert program['name'] == 'Favorite Program 4'
+        assert program['review_count'] == 0
+        assert 'sections' not in program
+        assert 'reviews' not in program
+
+    def test_favorites_expand_program(self, api_client, test_user, favorited_programs):
+        """Test that ?expand=program returns the full program"""
+        api_client.force_authenticate(user=test_user)
+
+        response = api_client.get(reverse('favorites'), {'expand': 'program'})
+
+        program = response.data[0]['program']
+        assert program['program_details']['name'] == 'Favorite Program 4'
+        assert 'sections' in program
+
+    def test_favorites_paginate_by_created_at(self, api_client, test_user, favorited_programs):
+        """Test that pages are ordered newest first and linked from the Link header"""
+        api_client.force_authenticate(user=test_user)
+
+        first = api_client.get(reverse('favorites'), {'page_size': 3})
+        assert [fav['program']['program_id'] for fav in first.data] == ['FAV004', 'FAV003', 'FAV002']
+        next_url = first['Link'].split(';')[0].strip('<>')
+
+        second = api_client.get(next_url)
+        assert [fav['program']['program_id'] for fav in second.data] == ['FAV001', 'FAV000']
+        assert 'rel="next"' not in second['Link']
+
+    def test_added_favorite_has_review_stats(self, api_client, test_user):
+        """Test that the favorite returned by a POST counts the program's reviews"""
+        program = Program.objects.create(program_id='REV001', name='Reviewed Program', latitude=0.0, longitude=0.0)
+        alumni = Alumni.objects.create(
+            email='alum@example.com', password='x', first_name='A', last_name='B',
+            program=program, graduation_year=2023,
+        )
+        Review.objects.create(program=program, alumni=alumni, text='Great', rating=4)
+        api_client.force_authenticate(user=test_user)
+
+        response = api_client.post(reverse('favorites'), {'program_id': 'REV001'}, format='json')
+
+        assert response.data['program']['review_count'] == 1
+        assert response.data['program']['average_rating'] == 4
+
+    def test_favorites_constant_queries(self, api_client, test_user, favorited_programs):
+        """Test that listing favorites does not query per favorite"""
+        api_client.force_authenticate(user=test_user)
+
+        with CaptureQueriesContext(connection) as few:
+            api_client.get(reverse('favorites'))
+        for i in range(5, 50):
+            program = Program.objects.create(program_id=f'FAV{i:03}', name='Extra', latitude=0.0, longitude=0.0)
+            Favorite.objects.create(user=test_user, program=program)
+        with CaptureQueriesContext(connection) as many:
+            response = api_client.get(reverse('favorites'))
+
+        assert len(response.data) == 50
+        assert len(many.captured_queries) == len(few.captured_queries)
+
+
+@pytest.mark.django_db
+class TestFavoriteIds:
+    """Test the batch favorite-status endpoint"""
+
+    def test_favorite_ids(self, api_client, test_user, favorited_programs):
+        """Test that all favorited program ids come back in one response"""
+        api_client.force_authenticate(user=test_user)
+
+        response = api_client.get(reverse('favorite_ids'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['program_ids'] == ['FAV000', 'FAV001', 'FAV002', 'FAV003', 'FAV004']
+
+    def test_favorite_ids_filtered(self, api_client, test_user, favorited_programs):
+        """Test limiting the answer to a supplied list of program ids"""
+        api_client.force_authenticate(user=test_user)
+
+        response = api_client.get(reverse('favorite_ids'), {'program_ids': 'FAV001,FAV003,OTHER'})
+
+        assert response.data['program_ids'] == ['FAV001', 'FAV003']
+
+    def test_favorite_ids_cached(self, api_client, test_user, favorited_programs, django_assert_num_queries):
+        """Test that repeated checks are answered from the per-user cache"""
+        api_client.force_authenticate(user=test_user)
+        api_client.get(reverse('favorite_ids'))
+
+        with django_assert_num_queries(0):
+            api_client.get(reverse('favorite_ids'))
+            api_client.get(reverse('check_favorite', args=['FAV002']))
+
+    def test_favorite_ids_invalidated(self, api_client, test_user, favorited_programs,
+                                      django_capture_on_commit_callbacks):
+        """Test that adding and removing favorites refreshes the cached ids once committed"""
+        api_client.force_authenticate(user=test_user)
+        api_client.get(reverse('favorite_ids'))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            api_client.delete(reverse('remove_favorite', args=['FAV000']))
+        assert 'FAV000' not in api_client.get(reverse('favorite_ids')).data['program_ids']
+
+        with django_capture_on_commit_callbacks(execute=True):
+            api_client.post(reverse('favorites'), {'program_id': 'FAV000'}, format='json')
+        assert 'FAV000' in api_client.get(reverse('favorite_ids')).data['program_ids']
+
+    def test_favorite_ids_kept_until_commit(self, api_client, test_user, favorited_programs,
+                                            django_capture_on_commit_callbacks):
+        """Test that the cached ids are only dropped once the favorites are committed"""
+        api_client.force_authenticate(user=test_user)
+        api_client.get(reverse('favorite_ids'))
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            api_client.post(reverse('bulk_favorites'), {'remove': ['FAV000', 'FAV001']}, format='json')
+            # Not committed yet, so a read in between cannot cache the old ids for an hour
+            assert 'FAV000' in api_client.get(reverse('favorite_ids')).data['program_ids']
+        for callback in callbacks:
+            callback()
+        assert 'FAV000' not in api_client.get(reverse('favorite_ids')).data['program_ids']
+
+    @pytest.mark.parametrize('local_timeout, timeout', [(60, 60), (None, 60 * 60)])
+    def test_favorite_ids_timeout(self, test_user, favorited_programs, local_timeout, timeout):
+        """Test that a per-process cache keeps the ids briefly, as other workers cannot drop them"""
+        with override_settings(LOCAL_CACHE_TIMEOUT=local_timeout), mock.patch('accounts.caching.cache') as fake:
+            fake.get.return_value = None
+            get_favorite_ids(test_user.id)
+
+        assert fake.set.call_args.args[2] == timeout
+
+
+@pytest.mark.django_db
+class TestAlumniFavorites:
+    """Test that alumni, who have no favorites of their own, cannot change any"""
+
+    @pytest.fixture
+    def alumni_client(self, favorited_programs):
+        alumni = Alumni(
+            email='alum@example.com', first_name='A', last_name='B', program_id='FAV000', graduation_year=2023
+        )
+        alumni.set_password('testpass123')
+        alumni.save()
+        client = APIClient()
+        session = client.session
+        session['alumni_id'] = alumni.id
+        session.save()
+        return client
+
+    def test_alumni_read_empty(self, alumni_client):
+        response = alumni_client.get(reverse('favorite_ids'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['program_ids'] == []
+
+    def test_alumni_writes_forbidden(self, alumni_client):
+        responses = [
+            alumni_client.post(reverse('favorites'), {'program_id': 'FAV000'}, format='json'),
+            alumni_client.post(reverse('bulk_favorites'), {'add': ['FAV000'], 'remove': ['FAV001']}, format='json'),
+            alumni_client.delete(reverse('remove_favorite', args=['FAV001'])),
+        ]
+
+        assert [response.status_code for response in responses] == [status.HTTP_403_FORBIDDEN] * 3
+        assert Favorite.objects.count() == 5
+
+
+@pytest.mark.django_db
+class TestBulkFavorites:
+    """Test adding and removing many favorites in one request"""
+
+    @pytest.fixture
+    def programs(self):
+        return [
+            Program.objects.create(
+                program_id=f'BULK00{i}',
+                name=f'Bulk Program {i}',
+                program_type='Exchange',
+                latitude=0.0,
+                longitude=0.0
+            )
+            for i in range(4)
+        ]
+
+    def test_bulk_add_and_remove(self, api_client, test_user, programs):
+        """Test adding and removing favorites together"""
+        api_client.force_authenticate(user=test_user)
+        Favorite.objects.create(user=test_user, program=programs[0])
+
+        url = reverse('bulk_favorites')
+        data = {'add': ['BULK001', 'BULK002', 'BULK002'], 'remove': ['BULK000']}
+        response = api_client.post(url, data, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['added'] == ['BULK001', 'BULK002']
+        assert response.data['removed'] == ['BULK000']
+        assert response.data['program_ids'] == ['BULK001', 'BULK002']
+
+    def test_bulk_add_is_idempotent(self, api_client, test_user, programs):
+        """Test that favorites already present are skipped rather than rejected"""
+        api_client.force_authenticate(user=test_user)
+        Favorite.objects.create(user=test_user, program=programs[0])
+
+        url = reverse('bulk_favorites')
+        response = api_client.post(url, {'add': ['BULK000', 'BULK001']}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['added'] == ['BULK001']
+        assert Favorite.objects.filter(user=test_user).count() == 2
+
+    def test_bulk_unknown_program_changes_nothing(self, api_client, test_user, programs):
+        """Test that one unknown program id rejects the whole request"""
+        api_client.force_authenticate(user=test_user)
+        Favorite.objects.create(user=test_user, program=programs[0])
+
+        url = reverse('bulk_favorites')
+        data = {'add': ['BULK001', 'NONEXISTENT'], 'remove': ['BULK000']}
+        response = api_client.post(url, data, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert list(Favorite.objects.filter(user=test_user).values_list('program_id', flat=True)) == ['BULK000']
+
+    def test_only_inserted_favorites_counted(self, test_user, programs):
+        """Test that a favorite added by someone else first is not reported as inserted"""
+        Favorite.objects.create(user=test_user, program=programs[0])
+
+        assert Favorite.insert_new(test_user, ['BULK000', 'BULK001']) == {'BULK001'}
+        assert Favorite.add_many(test_user, ['BULK000', 'BULK001', 'BULK002']) == ['BULK002']
+        assert Favorite.objects.filter(user=test_user).count() == 3
+
+    def test_bulk_constant_queries(self, api_client, test_user, programs, django_capture_on_commit_callbacks):
+        """Test that the number of queries does not grow with the number of program ids"""
+        api_client.force_authenticate(user=test_user)
+        url = reverse('bulk_favorites')
+
+        def count_queries(data):
+            with CaptureQueriesContext(connection) as queries, django_capture_on_commit_callbacks(execute=True):
+                api_client.post(url, data, format='json')
+            return len(queries)
+
+        one_add = count_queries({'add': ['BULK000']})
+        one_remove = count_queries({'remove': ['BULK000']})
+        program_ids = [program.program_id for program in programs]
+
+        assert count_queries({'add': program_ids}) == one_add
+        assert count_queries({'remove': program_ids}) == one_remove
+        assert not Favorite.objects.filter(user=test_user).exists()
+
+    def test_bulk_unauthenticated(self, api_client, programs):
+        """Test bulk changes without authentication"""
+        response = api_client.post(reverse('bulk_favorites'), {'add': ['BULK000']}, format='json')
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
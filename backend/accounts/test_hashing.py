@@ -0,0 +1,134 @@
+"""
+Password Hashing Tests for Accounts App
+Tests hashing on the bounded pool, backpressure and work factor upgrades
+"""
+import pytest
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_login_failed
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts import hashing
+from accounts.models import Alumni
+from programs.models import Program
+
+
+@pytest.fixture(autouse=True)
+def hashing_pool(settings):
+    """A small pool with cheap hashes, rebuilt for every test"""
+    settings.PASSWORD_HASH_ITERATIONS = 1000
+    settings.PASSWORD_HASHING_WORKERS = 1
+    settings.PASSWORD_HASHING_QUEUE = 0
+    settings.PASSWORD_HASHING_TIMEOUT = 0.05
+    hashing.reset_pool()
+    yield
+    hashing.reset_pool()
+
+
+@pytest.fixture
+def program(db):
+    return Program.objects.create(program_id='TEST001', name='Test Program', latitude=0.0, longitude=0.0)
+
+
+def login(client, username='student', password='testpass123'):
+    return client.post(reverse('login'), {'username': username, 'password': password}, format='json')
+
+
+@pytest.mark.django_db
+class TestPooledHashing:
+    """Test that login and signup hash passwords on the pool"""
+
+    def test_signup_and_login(self):
+        client = APIClient()
+        response = client.post(reverse('signup'), {
+            'username': 'student',
+            'email': 'student@example.com',
+            'password': 'testpass123',
+            'password_confirm': 'testpass123',
+        }, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert User.objects.get(username='student').password.startswith('pbkdf2_sha256$1000$')
+
+        assert login(APIClient()).status_code == status.HTTP_200_OK
+        assert login(APIClient(), password='wrong').status_code == status.HTTP_400_BAD_REQUEST
+        assert login(APIClient(), username='nobody').status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_inactive_user_rejected(self):
+        User.objects.create_user(username='student', password='testpass123', is_active=False)
+        assert authenticate(username='student', password='testpass123') is None
+
+    def test_failed_login_signal(self):
+        User.objects.create_user(username='student', password='testpass123')
+        failures = []
+
+        def receiver(sender, credentials, **kwargs):
+            failures.append(credentials['username'])
+
+        user_login_failed.connect(receiver)
+        try:
+            login(APIClient(), password='wrong')
+        finally:
+            user_login_failed.disconnect(receiver)
+
+        assert failures == ['student']
+
+    def test_alumni_password(self, program):
+        alumni = Alumni(email='alum@vanderbilt.edu', first_name='A', last_name='B', program=program, graduation_year=2020)
+        alumni.set_password('testpass123')
+        alumni.save()
+
+        assert alumni.check_password('testpass123')
+        assert not alumni.check_password('wrong')
+
+
+@pytest.mark.django_db
+class TestHashingBackpressure:
+    """Test that requests beyond the pool's capacity are turned away"""
+
+    def test_busy_pool_returns_503(self):
+        User.objects.create_user(username='student', password='testpass123')
+        _, slots = hashing.get_pool()
+        slots.acquire()
+        try:
+            response = login(APIClient())
+        finally:
+            slots.release()
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response['Retry-After'] == '1'
+        assert login(APIClient()).status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+class TestWorkFactorUpgrade:
+    """Test that hashes made with another iteration count are upgraded on login"""
+
+    def test_user_rehashed_on_login(self, settings):
+        User.objects.create_user(username='student', password='testpass123')
+        settings.PASSWORD_HASH_ITERATIONS = 2000
+
+        assert login(APIClient()).status_code == status.HTTP_200_OK
+        assert User.objects.get(username='student').password.startswith('pbkdf2_sha256$2000$')
+
+    def test_wrong_password_not_rehashed(self, settings):
+        User.objects.create_user(username='student', password='testpass123')
+        settings.PASSWORD_HASH_ITERATIONS = 2000
+
+        login(APIClient(), password='wrong')
+        assert User.objects.get(username='student').password.startswith('pbkdf2_sha256$1000$')
+
+    def test_alumni_rehashed_on_login(self, settings, program):
+        alumni = Alumni(email='alum@vanderbilt.edu', first_name='A', last_name='B', program=program, graduation_year=2020)
+        alumni.set_password('testpass123')
+        alumni.save()
+        settings.PASSWORD_HASH_ITERATIONS = 2000
+
+        response = APIClient().post(reverse('alumni_login'), {
+            'email': 'alum@vanderbilt.edu', 'password': 'testpass123'
+        }, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        alumni.refresh_from_db()
+        assert alumni.password.startswith('pbkdf2_sha256$2000$')
@@ -0,0 +1,114 @@
+"""
+Principal Tests for Accounts App
+Tests request.principal resolution and its cache
+"""
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from accounts.models import Alumni
+from programs.models import Program
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def alumni_client(db):
+    """Fixture for a client logged in as an alumni"""
+    program = Program.objects.create(program_id='PRIN001', name='Principal Program', latitude=0.0, longitude=0.0)
+    alumni = Alumni(
+        email='alum@vanderbilt.edu', first_name='Alum', last_name='Ni', program=program, graduation_year=2022
+    )
+    alumni.set_password('testpass123')
+    alumni.save()
+    client = APIClient()
+    session = client.session
+    session['alumni_id'] = alumni.id
+    session.save()
+    return client, alumni
+
+
+@pytest.fixture
+def user_client(db):
+    """Fixture for a client logged in as a student"""
+    user = User.objects.create_user(username='student', password='testpass123')
+    client = APIClient()
+    client.login(username='student', password='testpass123')
+    return client, user
+
+
+def lookups(client, url, table):
+    """Number of queries reading the table as their main table"""
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    return sum(f'FROM "{table}" WHERE' in query['sql'] for query in queries)
+
+
+@pytest.mark.django_db
+class TestPrincipal:
+    """Test resolving and caching the logged-in principal"""
+
+    def test_alumni_cached_between_requests(self, alumni_client):
+        """Test that the alumni is looked up once, then served from the cache"""
+        client, _ = alumni_client
+        url = reverse('alumni_reviews')
+
+        assert lookups(client, url, 'accounts_alumni') == 1
+        assert lookups(client, url, 'accounts_alumni') == 0
+
+    def test_alumni_has_no_cached_favorites(self, alumni_client, user_client):
+        """Test that alumni get no favorite ids and never share a cache entry"""
+        client, _ = alumni_client
+
+        response = client.get(reverse('favorite_ids'))
+
+        assert response.data == {'program_ids': []}
+        assert cache.get('accounts:favorite_ids:None') is None
+
+    def test_user_cached_between_requests(self, user_client):
+        """Test that the user is looked up once, then served from the cache"""
+        client, _ = user_client
+        url = reverse('favorite_ids')
+
+        assert lookups(client, url, 'auth_user') == 1
+        assert lookups(client, url, 'auth_user') == 0
+
+    def test_alumni_change_invalidates_cache(self, alumni_client):
+        """Test that a saved alumni is not served stale"""
+        client, alumni = alumni_client
+        client.get(reverse('alumni_profile'))
+
+        alumni.first_name = 'Renamed'
+        alumni.save()
+
+        response = client.get(reverse('alumni_profile'))
+        assert response.data['alumni']['first_name'] == 'Renamed'
+
+    def test_alumni_logout_is_immediate(self, alumni_client):
+        """Test that the cached alumni does not outlive its session"""
+        client, _ = alumni_client
+        client.get(reverse('alumni_profile'))
+
+        client.post(reverse('alumni_logout'))
+
+        response = client.get(reverse('alumni_profile'))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_password_change_ends_cached_session(self, user_client):
+        """Test that changing the password still logs out other sessions"""
+        client, user = user_client
+        client.get(reverse('favorite_ids'))
+
+        user.set_password('newpass456')
+        user.save()
+
+        response = client.get(reverse('favorite_ids'))
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,146 @@
+"""
+Profile Tests for Accounts App
+Tests profile creation at signup, the cached profile read and the denormalized counters
+"""
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from accounts.caching import get_profile
+from accounts.models import Alumni, Favorite, Profile
+from programs.models import Program, Review
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def programs(db):
+    return [
+        Program.objects.create(program_id=f'PROF00{i}', name=f'Profile Program {i}', latitude=0.0, longitude=0.0)
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def user_client(db):
+    """Fixture for a client logged in as a student"""
+    user = User.objects.create_user(username='student', password='testpass123')
+    client = APIClient()
+    client.login(username='student', password='testpass123')
+    return client, user
+
+
+@pytest.mark.django_db
+class TestProfileCreation:
+    """Test that profiles exist before they are first read"""
+
+    def test_signup_creates_profile(self):
+        response = APIClient().post(reverse('signup'), {
+            'username': 'newuser',
+            'email': 'new@example.com',
+            'password': 'password123',
+            'password_confirm': 'password123',
+        }, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Profile.objects.filter(user__username='newuser').exists()
+
+    def test_user_without_profile(self, user_client):
+        client, user = user_client
+        Favorite.objects.create(user=user, program=Program.objects.create(
+            program_id='PROF100', name='Old Favorite', latitude=0.0, longitude=0.0
+        ))
+        Profile.objects.filter(user=user).delete()
+
+        response = client.get(reverse('user_profile'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['profile']['favorite_count'] == 1
+
+
+@pytest.mark.django_db
+class TestProfileRead:
+    """Test that reading the profile is served from the cache and never writes"""
+
+    def test_cached_read(self, user_client):
+        client, _ = user_client
+        client.get(reverse('user_profile'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('user_profile'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not any('accounts_profile' in query['sql'] for query in queries)
+        assert not any(query['sql'].startswith('INSERT') for query in queries)
+
+    def test_patch_invalidates_cache(self, user_client, django_capture_on_commit_callbacks):
+        client, _ = user_client
+        client.get(reverse('user_profile'))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.patch(reverse('user_profile'), {'major': 'History'}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+
+        assert client.get(reverse('user_profile')).data['profile']['major'] == 'History'
+
+    @pytest.mark.parametrize('local_timeout, timeout', [(60, 60), (None, 60 * 60)])
+    def test_cache_timeout(self, user_client, local_timeout, timeout):
+        """Test that a per-process cache keeps the profile briefly, as other workers cannot drop it"""
+        _, user = user_client
+        with override_settings(LOCAL_CACHE_TIMEOUT=local_timeout), mock.patch('accounts.caching.cache') as fake:
+            fake.get.return_value = None
+            get_profile(user)
+
+        assert fake.set.call_args.args[2] == timeout
+
+    def test_favorite_count_read_only(self, user_client):
+        client, user = user_client
+        client.patch(reverse('user_profile'), {'favorite_count': 50}, format='json')
+        assert Profile.objects.get(user=user).favorite_count == 0
+
+
+@pytest.mark.django_db
+class TestProfileCounters:
+    """Test the denormalized favorite and review counts"""
+
+    def test_favorite_count(self, user_client, programs, django_capture_on_commit_callbacks):
+        client, _ = user_client
+        client.get(reverse('user_profile'))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(reverse('bulk_favorites'), {'add': [program.program_id for program in programs]}, format='json')
+        assert client.get(reverse('user_profile')).data['profile']['favorite_count'] == 3
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.delete(reverse('remove_favorite', args=[programs[0].program_id]))
+            client.post(reverse('bulk_favorites'), {'add': [programs[1].program_id]}, format='json')
+        assert client.get(reverse('user_profile')).data['profile']['favorite_count'] == 2
+
+    def test_review_count(self, programs):
+        alumni = Alumni(
+            email='alum@vanderbilt.edu', first_name='Alum', last_name='Ni', program=programs[0], graduation_year=2022
+        )
+        alumni.set_password('testpass123')
+        alumni.save()
+        client = APIClient()
+        session = client.session
+        session['alumni_id'] = alumni.id
+        session.save()
+        client.get(reverse('alumni_profile'))
+
+        review = Review.objects.create(program=programs[0], alumni=alumni, text='Great', rating=5)
+        Review.objects.create(program=programs[1], alumni=alumni, text='Fine', rating=4)
+        assert client.get(reverse('alumni_profile')).data['alumni']['review_count'] == 2
+
+        client.delete(reverse('delete_review', args=[review.id]))
+        assert client.get(reverse('alumni_profile')).data['alumni']['review_count'] == 1
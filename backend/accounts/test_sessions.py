@@ -0,0 +1,59 @@
+"""
+Session Tests for Accounts App
+Tests cache-backed sessions and the expired-session purge
+"""
+import io
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db
+class TestCachedSessions:
+    """Test that authenticated requests read the session from the cache"""
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_no_session_table_read(self):
+        User.objects.create_user(username='student', password='testpass123')
+        client = APIClient()
+        client.post(reverse('login'), {'username': 'student', 'password': 'testpass123'}, format='json')
+        client.get(reverse('favorite_ids'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('favorite_ids'))
+
+        assert response.status_code == 200
+        assert not any('django_session' in query['sql'] for query in queries)
+
+
+@pytest.mark.django_db
+class TestPurgeSessions:
+    """Test deleting expired sessions in batches"""
+
+    def create_sessions(self, count, expire_date, prefix):
+        Session.objects.bulk_create([
+            Session(session_key=f'{prefix}{i:030d}', session_data='', expire_date=expire_date)
+            for i in range(count)
+        ])
+
+    def test_purge_expired_only(self):
+        self.create_sessions(25, timezone.now() - timedelta(days=1), 'old')
+        self.create_sessions(5, timezone.now() + timedelta(days=1), 'new')
+        out = io.StringIO()
+
+        with CaptureQueriesContext(connection) as queries:
+            call_command('purgesessions', batch_size=10, stdout=out)
+
+        assert Session.objects.count() == 5
+        assert not Session.objects.filter(expire_date__lt=timezone.now()).exists()
+        assert sum(query['sql'].startswith('DELETE') for query in queries) == 3
+        assert 'Expired sessions deleted: 25' in out.getvalue()
@@ -11,6 +11,8 @@ urlpatterns = [
     path('logout/', views.logout_view, name='logout'),
     path('profile/', views.user_profile_view, name='user_profile'),
     path('favorites/', views.favorites_view, name='favorites'),
+    path('favorites/bulk/', views.bulk_favorites_view, name='bulk_favorites'),
+    path('favorites/ids/', views.favorite_ids_view, name='favorite_ids'),
     path('favorites/<str:program_id>/', views.remove_favorite_view, name='remove_favorite'),
     path('favorites/<str:program_id>/check/', views.check_favorite_view, name='check_favorite'),
 
@@ -19,6 +21,7 @@ urlpatterns = [
     path('alumni/login/', views.alumni_login_view, name='alumni_login'),
     path('alumni/logout/', views.alumni_logout_view, name='alumni_logout'),
     path('alumni/profile/', views.alumni_profile_view, name='alumni_profile'),
+    path('alumni/directory/', views.alumni_directory_view, name='alumni_directory'),
     path('alumni/by-program/<str:program_id>/', views.alumni_by_program_view, name='alumni_by_program'),
     path('alumni/reviews/', views.alumni_reviews_view, name='alumni_reviews'),
     path('alumni/reviews/<int:review_id>/delete/', views.delete_review_view, name='delete_review'),
@@ -12,14 +12,21 @@ from django.contrib.auth.models import User
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import Prefetch
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, UserSerializer,
-    FavoriteSerializer, ProfileSerializer,
-    AlumniRegistrationSerializer, AlumniLoginSerializer, AlumniSerializer
+    FavoriteSerializer, FavoriteBulkSerializer, ProfileSerializer,
+    AlumniRegistrationSerializer, AlumniLoginSerializer, AlumniSerializer, AlumniRowSerializer,
+    AlumniDirectorySerializer
 )
-from .models import Favorite, Profile, Alumni
-from .permissions import IsAuthenticatedOrAlumni
-from programs.models import Program
+from .models import Favorite, Alumni
+from .permissions import IsAuthenticatedOrAlumni, UserWritesOnly
+from .caching import get_favorite_ids, get_profile
+from .directory import get_alumni_directory
+from .pagination import AlumniKeysetPagination, FavoriteCursorPagination
+from programs.models import Program, ProgramSection, Review
+from programs.serializers import ProgramSummarySerializer, ReviewSerializer
 
 
 @api_view(['POST'])
@@ -41,7 +48,7 @@ def signup_view(request):
 @permission_classes([AllowAny])
 def login_view(request):
     """Handle user login"""
-    serializer = UserLoginSerializer(data=request.data)
+    serializer = UserLoginSerializer(data=request.data, context={'request': request})
     if serializer.is_valid():
         user = serializer.validated_data['user']
         login(request, user)
@@ -61,44 +68,98 @@ def logout_view(request):
 
 
 @api_view(['GET', 'POST'])
-@permission_classes([IsAuthenticatedOrAlumni])
+@permission_classes([IsAuthenticatedOrAlumni, UserWritesOnly])
 def favorites_view(request):
     """Handle user favorites"""
     if request.method == 'GET':
-        favorites = Favorite.objects.filter(user=request.user)
-        serializer = FavoriteSerializer(favorites, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Programs are summarized unless ?expand=program asks for everything
+        expand_program = 'program' in request.query_params.get('expand', '').split(',')
+        favorites = Favorite.objects.filter(user=request.user).select_related('program__image')
+        if expand_program:
+            favorites = favorites.prefetch_related(
+                'program__budget_info',
+                Prefetch('program__sections', queryset=ProgramSection.objects.select_related('body')),
+                Prefetch('program__reviews', queryset=ReviewSerializer.setup_eager_loading(Review.objects.all())),
+            )
+
+        paginator = FavoriteCursorPagination()
+        page = paginator.paginate_queryset(favorites, request)
+        context = {'request': request, 'expand_program': expand_program}
+        if not expand_program:
+            context['review_stats'] = ProgramSummarySerializer.review_stats(
+                [favorite.program_id for favorite in page]
+            )
+        serializer = FavoriteSerializer(page, many=True, context=context)
+        return paginator.get_paginated_response(serializer.data)
     
     elif request.method == 'POST':
         serializer = FavoriteSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            try:
-                serializer.save()
-                return Response(serializer.data, status=status.HTTP_201_CREATED)
-            except Exception as e:
-                return Response({'error': 'Program already favorited'}, status=status.HTTP_400_BAD_REQUEST)
+            # Adding a favorite twice is not an error; the existing favorite comes back with 200
+            program_id = serializer.validated_data['program_id']
+            added = Favorite.add_many(request.user, [program_id])
+            favorite = Favorite.objects.select_related('program__image').get(user=request.user, program_id=program_id)
+            data = FavoriteSerializer(favorite, context={'request': request}).data
+            return Response(data, status=status.HTTP_201_CREATED if added else status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticatedOrAlumni, UserWritesOnly])
+def bulk_favorites_view(request):
+    """
+    Add and remove many favorites in one transaction.
+    Body: {"add": [program ids], "remove": [program ids]}
+    """
+    serializer = FavoriteBulkSerializer(data=request.data)
+    if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    with transaction.atomic():
+        removed = Favorite.remove_many(request.user, serializer.validated_data['remove'])
+        added = Favorite.add_many(request.user, serializer.validated_data['add'])
+    return Response({
+        'added': added,
+        'removed': removed,
+        'program_ids': sorted(get_favorite_ids(request.user.id)),
+    }, status=status.HTTP_200_OK)
+
 
 @api_view(['DELETE'])
-@permission_classes([IsAuthenticatedOrAlumni])
+@permission_classes([IsAuthenticatedOrAlumni, UserWritesOnly])
 def remove_favorite_view(request, program_id):
     """Remove a program from favorites"""
-    try:
-        favorite = Favorite.objects.get(user=request.user, program_id=program_id)
-        favorite.delete()
+    if Favorite.remove_many(request.user, [program_id]):
         return Response({'message': 'Favorite removed'}, status=status.HTTP_200_OK)
-    except Favorite.DoesNotExist:
-        return Response({'error': 'Favorite not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response({'error': 'Favorite not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedOrAlumni])
 def check_favorite_view(request, program_id):
     """Check if a program is favorited by the user"""
-    is_favorite = Favorite.objects.filter(user=request.user, program_id=program_id).exists()
+    is_favorite = program_id in get_favorite_ids(request.user.id)
     return Response({'is_favorite': is_favorite}, status=status.HTTP_200_OK)
 
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedOrAlumni])
+def favorite_ids_view(request):
+    """
+    Get the ids of the user's favorited programs in one call.
+    ?program_ids=a,b,c limits the answer to the given programs.
+    """
+    favorite_ids = get_favorite_ids(request.user.id)
+    requested = [
+        program_id
+        for value in request.query_params.getlist('program_ids')
+        for program_id in value.split(',')
+        if program_id
+    ]
+    if requested:
+        favorite_ids = favorite_ids.intersection(requested)
+    return Response({'program_ids': sorted(favorite_ids)}, status=status.HTTP_200_OK)
+
 @api_view(['GET', 'PUT', 'PATCH'])
 @permission_classes([IsAuthenticatedOrAlumni])
 @parser_classes([MultiPartParser, FormParser, JSONParser])
@@ -106,22 +167,16 @@ def user_profile_view(request):
     """Get or update user profile - handles both students and alumni"""
     
     # Check if this is an alumni user
-    alumni_id = request.session.get('alumni_id')
-    if alumni_id:
-        # Return alumni profile
-        try:
-            alumni = Alumni.objects.get(id=alumni_id)
-            alumni_data = AlumniSerializer(alumni).data
-            return Response({'alumni': alumni_data}, status=status.HTTP_200_OK)
-        except Alumni.DoesNotExist:
-            return Response({'error': 'Alumni not found'}, status=status.HTTP_404_NOT_FOUND)
+    if isinstance(request.principal, Alumni):
+        alumni_data = AlumniSerializer(request.principal).data
+        return Response({'alumni': alumni_data}, status=status.HTTP_200_OK)
     
     # Otherwise, handle as student user
     if not request.user.is_authenticated:
         return Response({'error': 'Not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
     
     user = request.user
-    profile, _ = Profile.objects.get_or_create(user=user)
+    profile = get_profile(user)
 
     if request.method == 'GET':
         data = {
@@ -190,60 +245,97 @@ def alumni_logout_view(request):
 @api_view(['GET'])
 def alumni_profile_view(request):
     """Get current alumni profile"""
-    alumni_id = request.session.get('alumni_id')
-    if alumni_id:
-        try:
-            alumni = Alumni.objects.get(id=alumni_id)
-            alumni_data = AlumniSerializer(alumni).data
-            return Response({'alumni': alumni_data}, status=status.HTTP_200_OK)
-        except Alumni.DoesNotExist:
-            return Response({'error': 'Alumni not found'}, status=status.HTTP_404_NOT_FOUND)
+    if isinstance(request.principal, Alumni):
+        alumni_data = AlumniSerializer(request.principal).data
+        return Response({'alumni': alumni_data}, status=status.HTTP_200_OK)
     return Response({'error': 'Not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def alumni_by_program_view(request, program_id):
-    """Get all alumni for a specific program"""
+    """
+    Get the active alumni of a specific program, most recent graduates first.
+    The program is summarized once and the alumni are flat rows, a page at a time;
+    'next' links to the following page until there are no more alumni.
+    """
     try:
-        program = Program.objects.get(program_id=program_id)
-        alumni = Alumni.objects.filter(program=program, is_active=True)
-        serializer = AlumniSerializer(alumni, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        program = Program.objects.select_related('image').get(program_id=program_id)
     except Program.DoesNotExist:
         return Response({'error': 'Program not found'}, status=status.HTTP_404_NOT_FOUND)
 
+    alumni = Alumni.objects.filter(program=program, is_active=True).only(*AlumniRowSerializer.Meta.fields)
+    paginator = AlumniKeysetPagination()
+    page = paginator.paginate_queryset(alumni, request)
+    context = {'request': request, 'review_stats': ProgramSummarySerializer.review_stats([program_id])}
+    return Response({
+        'program': ProgramSummarySerializer(program, context=context).data,
+        'alumni': AlumniRowSerializer(page, many=True).data,
+        'next': paginator.get_next_link(),
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedOrAlumni])
+def alumni_directory_view(request):
+    """
+    Search active alumni.
+    Filters: ?program= and ?term= (both repeatable), ?year_from= / ?year_to= and ?q= for
+    names, matched by word prefix, or also by similar spelling with ?fuzzy=true.
+    Paged with ?offset= and ?limit= (default 20, max 100).
+    """
+    params = request.query_params
+    try:
+        year_from = int(params['year_from']) if params.get('year_from') else None
+        year_to = int(params['year_to']) if params.get('year_to') else None
+        offset = max(int(params.get('offset', 0)), 0)
+        limit = min(max(int(params.get('limit', 20)), 1), 100)
+    except ValueError:
+        return Response(
+            {'error': 'year_from, year_to, offset and limit must be numbers'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    count, alumni_ids = get_alumni_directory().search(
+        program_ids=[program_id for value in params.getlist('program') for program_id in value.split(',') if program_id],
+        year_from=year_from,
+        year_to=year_to,
+        terms=params.getlist('term'),
+        query=params.get('q', ''),
+        fuzzy=params.get('fuzzy', '').lower() in ('1', 'true', 'yes'),
+        offset=offset,
+        limit=limit,
+    )
+    alumni = Alumni.objects.select_related('program').only(
+        'id', 'email', 'first_name', 'last_name', 'graduation_year', 'study_abroad_term', 'program__name'
+    ).in_bulk(alumni_ids)
+    page = [alumni[alumni_id] for alumni_id in alumni_ids if alumni_id in alumni]
+    return Response({
+        'count': count,
+        'results': AlumniDirectorySerializer(page, many=True).data,
+    }, status=status.HTTP_200_OK)
+
 
 @api_view(['GET'])
 def alumni_reviews_view(request):
     """Get all reviews by the current alumni"""
-    alumni_id = request.session.get('alumni_id')
-    if alumni_id:
-        try:
-            alumni = Alumni.objects.get(id=alumni_id)
-            # We need to import Review model here or use related name
-            reviews = alumni.reviews.all()
-            # We need to import ReviewSerializer. It's in programs.serializers
-            from programs.serializers import ReviewSerializer
-            serializer = ReviewSerializer(reviews, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        except Alumni.DoesNotExist:
-            return Response({'error': 'Alumni not found'}, status=status.HTTP_404_NOT_FOUND)
+    if isinstance(request.principal, Alumni):
+        # Reviews, their programs and the alumni's program come back in one joined query
+        reviews = ReviewSerializer.setup_eager_loading(Review.objects.filter(alumni=request.principal))
+        serializer = ReviewSerializer(reviews, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
     return Response({'error': 'Not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
 @api_view(['DELETE'])
 def delete_review_view(request, review_id):
     """Delete a review by the current alumni"""
-    alumni_id = request.session.get('alumni_id')
-    if not alumni_id:
+    if not isinstance(request.principal, Alumni):
         return Response({'error': 'Not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
     
     try:
-        # Import Review model
-        from programs.models import Review
         review = Review.objects.get(id=review_id)
         
         # Check if the review belongs to the current alumni
-        if review.alumni.id != alumni_id:
+        if review.alumni_id != request.principal.id:
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
             
         review.delete()
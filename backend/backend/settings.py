@@ -53,6 +53,7 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.PrincipalMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware', 
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -99,6 +100,76 @@ else:
         }
     }
 
+# Cache configuration
+# Use REDIS_URL when available so every worker shares one cache, otherwise cache in-process
+redis_url = os.environ.get('REDIS_URL')
+
+if redis_url:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': redis_url,
+        },
+        'sessions': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': redis_url,
+            'KEY_PREFIX': 'sessions',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'anchorabroad',
+        },
+        'sessions': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'anchorabroad-sessions',
+        },
+    }
+
+# Seconds each process keeps its program dataset token (see programs.caching). A shared
+# cache sees every bump, so the token only has to expire with a per-process cache.
+DATASET_TOKEN_TIMEOUT = None if redis_url else 5 * 60
+# Longest a process keeps per-user entries that another process may invalidate, such as
+# favorite ids (see accounts.caching). None with a shared cache, where every delete is seen.
+LOCAL_CACHE_TIMEOUT = None if redis_url else 60
+
+# With REDIS_URL, sessions are read from the shared cache and written through to the
+# database, so authenticated requests skip the django_session SELECT. Without it the
+# 'sessions' cache is per process, and a session deleted through one worker (logout) would
+# stay readable from another worker's cache, so sessions are then read from the database.
+# 'django.contrib.sessions.backends.signed_cookies' keeps no server-side state at all, but
+# such sessions cannot be revoked before they expire.
+# Expired rows are removed in batches by `python manage.py purgesessions`.
+SESSION_ENGINE = os.environ.get(
+    'SESSION_ENGINE',
+    'django.contrib.sessions.backends.cached_db' if redis_url else 'django.contrib.sessions.backends.db',
+)
+SESSION_CACHE_ALIAS = 'sessions'
+
+# PBKDF2 iterations for new password hashes. Stored hashes made with another count are
+# upgraded the next time their owner logs in.
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', 600000))
+PASSWORD_HASHERS = [
+    'accounts.hashers.ConfiguredPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Login and signup hash passwords on a pool of this many threads (see accounts.hashing),
+# with at most PASSWORD_HASHING_QUEUE requests waiting for one. A request still waiting
+# after PASSWORD_HASHING_TIMEOUT seconds gets 503 with Retry-After.
+PASSWORD_HASHING_WORKERS = int(os.environ.get('PASSWORD_HASHING_WORKERS', os.cpu_count() or 1))
+PASSWORD_HASHING_QUEUE = int(os.environ.get('PASSWORD_HASHING_QUEUE', 32))
+PASSWORD_HASHING_TIMEOUT = float(os.environ.get('PASSWORD_HASHING_TIMEOUT', 5))
+
+# Passwords are checked on the hashing pool by authenticate() (see accounts.backends)
+AUTHENTICATION_BACKENDS = ['accounts.backends.PooledModelBackend']
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -150,6 +221,8 @@ CORS_ALLOW_CREDENTIALS = True
 # Add your Vercel domain here
 cors_origins = os.environ.get('CORS_ALLOWED_ORIGINS', 'http://localhost:3000,https://anchorabroad.onrender.com,https://anchor-abroad.vercel.app')
 CORS_ALLOWED_ORIGINS = [origin.strip() for origin in cors_origins.split(',')]
+# Paginated listings link their next page from this header, which the frontend follows
+CORS_EXPOSE_HEADERS = ['Link']
 
 # Session cookie settings for cross-domain authentication
 SESSION_COOKIE_SAMESITE = 'None'  # Allow cross-site cookies
@@ -171,4 +244,8 @@ REST_FRAMEWORK = {
 }
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Program image thumbnails (see programs/thumbnails.py)
+THUMBNAIL_FETCHER = os.environ.get('THUMBNAIL_FETCHER', 'programs.thumbnails.HttpFetcher')
+THUMBNAIL_WORKERS = int(os.environ.get('THUMBNAIL_WORKERS', '4'))
\ No newline at end of file
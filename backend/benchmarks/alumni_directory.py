@@ -0,0 +1,140 @@
+"""
+Compare alumni directory searches through the ORM and through the in-memory index.
+
+Usage (from backend/):
+    python -m benchmarks.alumni_directory [--alumni 200000] [--programs 250]
+
+Synthetic alumni with random names, programs, graduation years and terms are inserted
+into a throwaway database. Reported:
+  - time and peak memory to build the index
+  - count + first page latency for each query, with ORM filters
+    (istartswith on first/last name) and with accounts.directory
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from benchmarks.common import setup_django, best_of, print_table
+
+FIRST_NAMES = [
+    'Ana', 'Andrew', 'Anne', 'Ben', 'Carlos', 'Chloé', 'Daniel', 'Elena', 'Emma', 'Felix',
+    'Grace', 'Hannah', 'Isabel', 'Jacob', 'James', 'José', 'Julia', 'Liam', 'Maharshi', 'Maria',
+    'Mia', 'Noah', 'Olivia', 'Priya', 'Sofia', 'Thomas', 'Wei', 'Yuki', 'Zoe', 'Zoë',
+]
+LAST_NAMES = [
+    'Anders', 'Brown', 'Chen', 'Davis', 'García', 'Henricks', 'Ito', 'Johnson', 'Kim', 'Lee',
+    'López', 'Martin', 'Müller', 'Nguyen', 'Okafor', 'Patel', 'Rossi', 'Schmidt', 'Smith', 'Smyth',
+    'Tanaka', 'Taylor', 'Williams', 'Wilson', 'Young',
+]
+TERMS = ['Fall', 'Spring', 'Summer', 'Academic Year']
+YEARS = range(1990, 2026)
+
+
+def fill(alumni_count, program_count):
+    from django.contrib.auth.hashers import make_password
+    from accounts.models import Alumni
+    from programs.models import Program
+
+    rng = random.Random(42)
+    Program.objects.bulk_create([
+        Program(program_id=f'BENCH{i:04d}', name=f'Program {i}', latitude=0.0, longitude=0.0)
+        for i in range(program_count)
+    ])
+    password = make_password('unused')
+    batch = []
+    for i in range(alumni_count):
+        # Surnames are suffixed so the directory holds many distinct name tokens, as real data would
+        last_name = rng.choice(LAST_NAMES) + ('' if i % 3 else rng.choice(LAST_NAMES).lower())
+        batch.append(Alumni(
+            email=f'alumni{i}@vanderbilt.edu',
+            password=password,
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=last_name,
+            program_id=f'BENCH{rng.randrange(program_count):04d}',
+            graduation_year=rng.choice(YEARS),
+            study_abroad_term=rng.choice(TERMS),
+        ))
+        if len(batch) == 5000:
+            Alumni.objects.bulk_create(batch)
+            batch = []
+    Alumni.objects.bulk_create(batch)
+
+
+QUERIES = [
+    ('one program', {'program_ids': ['BENCH0007']}),
+    ('years 2015-2020', {'year_from': 2015, 'year_to': 2020}),
+    ('program + years + term', {'program_ids': ['BENCH0007'], 'year_from': 2010, 'terms': ['Fall']}),
+    ('name prefix "an"', {'query': 'an'}),
+    ('name "maria smi"', {'query': 'maria smi'}),
+    ('name + years', {'query': 'lee', 'year_from': 2020}),
+    ('fuzzy "smith"', {'query': 'smith', 'fuzzy': True}),
+]
+
+
+def orm_search(program_ids=(), year_from=None, year_to=None, terms=(), query='', fuzzy=False, limit=20):
+    from django.db.models import Q
+    from accounts.models import Alumni
+
+    alumni = Alumni.objects.filter(is_active=True)
+    if program_ids:
+        alumni = alumni.filter(program_id__in=program_ids)
+    if year_from is not None:
+        alumni = alumni.filter(graduation_year__gte=year_from)
+    if year_to is not None:
+        alumni = alumni.filter(graduation_year__lte=year_to)
+    if terms:
+        alumni = alumni.filter(study_abroad_term__in=terms)
+    for token in query.split():
+        # The closest the ORM gets without a trigram extension is a substring match
+        lookup = 'icontains' if fuzzy else 'istartswith'
+        alumni = alumni.filter(Q(**{f'first_name__{lookup}': token}) | Q(**{f'last_name__{lookup}': token}))
+    count = alumni.count()
+    ids = list(alumni.order_by('-graduation_year', 'last_name', 'first_name', 'id').values_list('id', flat=True)[:limit])
+    return count, ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--alumni', type=int, default=200000, help='Number of synthetic alumni')
+    parser.add_argument('--programs', type=int, default=250, help='Number of synthetic programs')
+    args = parser.parse_args()
+
+    setup_django()
+    from accounts.directory import get_alumni_directory, AlumniDirectory
+    from accounts.models import Alumni
+
+    start = time.perf_counter()
+    fill(args.alumni, args.programs)
+    print(f'Inserted {args.alumni} alumni in {time.perf_counter() - start:.1f}s\n')
+
+    start = time.perf_counter()
+    directory = get_alumni_directory()
+    build_time = time.perf_counter() - start
+    # Built a second time, as tracemalloc slows everything it traces down
+    alumni = Alumni.objects.filter(is_active=True).values_list(
+        'id', 'first_name', 'last_name', 'program_id', 'graduation_year', 'study_abroad_term'
+    )
+    tracemalloc.start()
+    AlumniDirectory(alumni.iterator(chunk_size=5000))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'Index built in {build_time * 1000:.0f} ms, peak {peak / 1024 / 1024:.1f} MB, '
+          f'{len(directory.tokens)} name tokens\n')
+
+    rows = []
+    for label, filters in QUERIES:
+        orm_count, _ = orm_search(**filters)
+        index_count, _ = directory.search(**filters)
+        rows.append([
+            label,
+            orm_count,
+            index_count,
+            f'{best_of(lambda: orm_search(**filters)) * 1000:.1f}',
+            f'{best_of(lambda: directory.search(**filters)) * 1000:.2f}',
+        ])
+    print_table(['query', 'ORM matches', 'index matches', 'ORM ms', 'index ms'], rows)
+
+
+if __name__ == '__main__':
+    main()
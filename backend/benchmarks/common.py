@@ -0,0 +1,68 @@
+"""
+Shared setup for the benchmark scripts.
+Each benchmark runs against a throwaway SQLite database so it never touches db.sqlite3.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DATA_FILE = BACKEND_DIR / 'programs' / 'data.json'
+
+
+def setup_django(migrate=True):
+    """Point Django at a temporary database, configure it and optionally migrate"""
+    sys.path.insert(0, str(BACKEND_DIR))
+    database_dir = tempfile.mkdtemp(prefix='anchorabroad-bench-')
+    os.environ['DATABASE_URL'] = f'sqlite:///{database_dir}/bench.sqlite3'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+    import django
+    django.setup()
+
+    if migrate:
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+    return database_dir
+
+
+def load_catalog():
+    """Return the program catalog shipped with the repo"""
+    with open(DATA_FILE, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def synthetic_catalog(scale):
+    """Return the catalog repeated `scale` times with unique program ids"""
+    catalog = load_catalog()
+    if scale == 1:
+        return catalog
+    programs = {}
+    for copy in range(scale):
+        for program_id, data in catalog.items():
+            new_id = f'{program_id}-{copy}'
+            programs[new_id] = dict(data, program_id=new_id)
+    return programs
+
+
+def best_of(func, repeat=5):
+    """Run func `repeat` times and return the fastest wall time in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def print_table(headers, rows):
+    """Print rows as a fixed-width text table"""
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    line = '  '.join(f'{{:<{width}}}' for width in widths)
+    print(line.format(*headers))
+    print(line.format(*['-' * width for width in widths]))
+    for row in rows:
+        print(line.format(*row))
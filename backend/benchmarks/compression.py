@@ -0,0 +1,125 @@
+"""
+Compare plain and compressed storage for the heavy program columns.
+
+Usage (from backend/):
+    python -m benchmarks.compression [--scale 100]
+
+Rows hold each program's additional prerequisites, housing and section bodies,
+stored once with plain TextField/JSONField columns and once with the compressed
+fields from programs.fields. Reported for the shipped catalog and a synthetic
+catalog repeated --scale times:
+  - table size on disk (SQLite dbstat)
+  - time to load every row, with and without reading the heavy columns
+  - peak memory while holding every loaded row
+"""
+import argparse
+import tracemalloc
+
+from benchmarks.common import setup_django, synthetic_catalog, best_of, print_table
+
+
+def build_models():
+    from django.db import models
+    from programs.fields import CompressedTextField, CompressedJSONField
+
+    class PlainProgramText(models.Model):
+        additional_prerequisites = models.TextField(blank=True)
+        housing = models.TextField(blank=True)
+        sections = models.JSONField()
+
+        class Meta:
+            app_label = 'benchmarks'
+
+    class CompressedProgramText(models.Model):
+        additional_prerequisites = CompressedTextField(blank=True)
+        housing = CompressedTextField(blank=True)
+        sections = CompressedJSONField()
+
+        class Meta:
+            app_label = 'benchmarks'
+
+    return [PlainProgramText, CompressedProgramText]
+
+
+def fill(model, catalog):
+    from django.db import connection
+
+    with connection.schema_editor() as editor:
+        editor.create_model(model)
+    rows = []
+    for data in catalog.values():
+        details = data.get('program_details', {})
+        rows.append(model(
+            additional_prerequisites=details.get('additional_prerequisites', ''),
+            housing=details.get('housing', ''),
+            sections=[section.get('content', []) for section in data.get('sections', [])],
+        ))
+    model.objects.bulk_create(rows, batch_size=500)
+
+
+def drop(model):
+    from django.db import connection
+
+    with connection.schema_editor() as editor:
+        editor.delete_model(model)
+
+
+def table_size(model):
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT SUM(pgsize) FROM dbstat WHERE name = %s', [model._meta.db_table])
+        return cursor.fetchone()[0]
+
+
+def read_rows(model, touch):
+    rows = list(model.objects.all())
+    if touch:
+        for row in rows:
+            row.additional_prerequisites, row.housing, row.sections
+    return rows
+
+
+def peak_memory(model, touch):
+    tracemalloc.start()
+    rows = read_rows(model, touch)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--scale', type=int, default=100, help='Size of the synthetic catalog')
+    args = parser.parse_args()
+
+    setup_django(migrate=False)
+    models = build_models()
+
+    results = []
+    for label, scale in (('current', 1), (f'{args.scale}x', args.scale)):
+        catalog = synthetic_catalog(scale)
+        for model in models:
+            fill(model, catalog)
+            storage = 'compressed' if model.__name__.startswith('Compressed') else 'plain'
+            results.append([
+                label,
+                storage,
+                len(catalog),
+                f'{table_size(model) / 1024:.0f}',
+                f'{best_of(lambda: read_rows(model, touch=False)) * 1000:.1f}',
+                f'{best_of(lambda: read_rows(model, touch=True)) * 1000:.1f}',
+                f'{peak_memory(model, touch=False) / 1024:.0f}',
+                f'{peak_memory(model, touch=True) / 1024:.0f}',
+            ])
+            drop(model)
+
+    print_table(
+        ['dataset', 'storage', 'rows', 'table KB', 'load ms', 'load+read ms', 'load KB', 'load+read KB'],
+        results,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Measure how long the scraper takes to parse saved pages of the study abroad site.
+
+Usage (from backend/):
+    python -m benchmarks.html_parsing [--pages programs/helper.html] [--repeat 20]
+
+Every page is parsed as a program page and as a budget page with each installed
+parser (html.parser, and lxml when it is installed), once from the whole document and
+once from only the parts the parse functions read. Reported per run: milliseconds per
+page, best of --repeat, and whether the result equals the whole-document html.parser
+parse the scraper used before.
+"""
+import argparse
+import importlib.util
+from pathlib import Path
+
+from benchmarks.common import BACKEND_DIR, best_of, print_table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--pages', nargs='+', default=[BACKEND_DIR / 'programs' / 'helper.html'],
+                        help='Saved HTML pages to parse')
+    parser.add_argument('--repeat', type=int, default=20, help='Runs per measurement')
+    args = parser.parse_args()
+
+    from programs.scraper import PageParser, parse_budget_page, parse_program_page
+
+    features = ['html.parser'] + (['lxml'] if importlib.util.find_spec('lxml') else [])
+    rows = []
+    for path in args.pages:
+        html = Path(path).read_text(encoding='utf-8')
+        url = 'https://www.vanderbilt.edu/study-abroad/programs/?program_id=0'
+        reference = PageParser('html.parser', strain=False)
+        expected = parse_program_page(html, '0', url, reference), parse_budget_page(html, reference)
+        for name in features:
+            for strain in [False, True]:
+                page_parser = PageParser(name, strain)
+                result = parse_program_page(html, '0', url, page_parser), parse_budget_page(html, page_parser)
+                program = best_of(lambda: parse_program_page(html, '0', url, page_parser), args.repeat)
+                budget = best_of(lambda: parse_budget_page(html, page_parser), args.repeat)
+                rows.append([
+                    Path(path).name, name, 'needed parts' if strain else 'whole page',
+                    f'{program * 1000:.1f}', f'{budget * 1000:.1f}', 'yes' if result == expected else 'NO',
+                ])
+    print_table(['page', 'parser', 'parsed', 'program ms', 'budget ms', 'same result'], rows)
+
+
+if __name__ == '__main__':
+    main()
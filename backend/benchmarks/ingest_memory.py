@@ -0,0 +1,95 @@
+"""
+Measure peak memory of loading program catalogs of growing size.
+
+Usage (from backend/):
+    python -m benchmarks.ingest_memory [--sizes 100 1000 10000 50000]
+
+For every size a catalog made of copies of the shipped programs is written to disk, as
+one JSON object and as JSON Lines. Each is then loaded into an empty database:
+  - json.load of the whole file, then load_programs (how loadprograms read files before)
+  - programs.streaming.read_programs feeding load_programs chunk by chunk
+Reported per run: wall time and tracemalloc peak.
+"""
+import argparse
+import itertools
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.common import setup_django, load_catalog, print_table
+
+
+def synthetic_records(count):
+    """Yield count (program id, record) pairs copied from the shipped catalog"""
+    catalog = list(load_catalog().items())
+    for index in range(count):
+        program_id, data = catalog[index % len(catalog)]
+        new_id = f'{program_id}-{index // len(catalog)}'
+        yield new_id, dict(data, program_id=new_id)
+
+
+def reset():
+    from programs.models import Program, SectionContent
+
+    Program.objects.all().delete()
+    SectionContent.objects.all().delete()
+
+
+def whole_file_load(path):
+    import json
+    from programs.loading import load_programs
+
+    with open(path, 'r', encoding='utf-8') as file:
+        load_programs(json.load(file))
+
+
+def streamed_load(path):
+    from programs.loading import load_programs
+    from programs.streaming import read_programs
+
+    load_programs(read_programs(path))
+
+
+def measure(load, path):
+    reset()
+    tracemalloc.start()
+    start = time.perf_counter()
+    load(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return [f'{elapsed:.1f}', f'{peak / 1024 / 1024:.1f}']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 50000],
+                        help='Numbers of programs in the generated catalogs')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test.utils import setup_test_environment
+    from programs.streaming import write_programs
+
+    setup_test_environment()
+    directory = Path(tempfile.mkdtemp(prefix='anchorabroad-ingest-'))
+    rows = []
+    for size in args.sizes:
+        json_path, lines_path = directory / f'{size}.json', directory / f'{size}.jsonl'
+        write_programs(json_path, synthetic_records(size))
+        write_programs(lines_path, synthetic_records(size))
+        megabytes = json_path.stat().st_size / 1024 / 1024
+        for label, load, path in [
+            ('json.load + load', whole_file_load, json_path),
+            ('streamed .json', streamed_load, json_path),
+            ('streamed .jsonl', streamed_load, lines_path),
+        ]:
+            rows.append([size, f'{megabytes:.1f}', label, *measure(load, path)])
+        json_path.unlink()
+        lines_path.unlink()
+    print_table(['programs', 'file MB', 'reader', 'seconds', 'peak MB'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Compare the bulk catalog loader with the previous per-row loadprograms.
+
+Usage (from backend/):
+    python -m benchmarks.load_programs [--programs 20000] [--changed 0.05] [--skip-per-row]
+
+The shipped catalog is repeated up to --programs programs with unique ids. Each loader
+starts from an empty database and is timed for:
+  - the initial load
+  - a reload of the same file, which the bulk loader skips by content hash,
+    and the same reload with --force, which diffs every program
+  - a reload in which --changed of the programs have a new name, budget and section
+Reported per run: wall time and the number of INSERT/UPDATE/DELETE statements.
+"""
+import argparse
+import copy
+import math
+import time
+
+from benchmarks.common import setup_django, synthetic_catalog, print_table
+
+
+def legacy_load(programs_data):
+    """The loadprograms loop before programs.loading: update_or_create and per-row children"""
+    from programs.models import Program, BudgetInfo, ProgramSection
+
+    for program_id, data in programs_data.items():
+        details = data.get('program_details', {})
+        program, _ = Program.objects.update_or_create(
+            program_id=program_id,
+            defaults={
+                'name': details.get('name', ''),
+                'academic_calendar': details.get('academic_calendar', ''),
+                'program_type': details.get('program_type', ''),
+                'minimum_gpa': details.get('minimum_gpa', ''),
+                'language_prerequisite': details.get('language_prerequisite', ''),
+                'additional_prerequisites': details.get('additional_prerequisites', ''),
+                'housing': details.get('housing', ''),
+                'main_page_url': data.get('main_page_url', ''),
+                'homepage_url': data.get('homepage_url', ''),
+                'budget_page_url': data.get('budget_page_url', ''),
+                'img_url': data.get('img_url', ''),
+                'latitude': details.get('latitude', 0.0),
+                'longitude': details.get('longitude', 0.0),
+                'continent': details.get('continent', ''),
+            }
+        )
+        budget_info = data.get('budget_info', {})
+        program.budget_info.all().delete()
+        if isinstance(budget_info, dict) and isinstance(budget_info.get('total_estimated_cost'), str):
+            budget_info = {'': budget_info}
+        for budget_data in budget_info.values():
+            BudgetInfo.objects.create(
+                program=program,
+                term=budget_data.get('term', ''),
+                year=int(budget_data.get('year', 0) or 0),
+                total_estimated_cost=budget_data.get('total_estimated_cost', ''),
+            )
+        program.sections.all().delete()
+        for index, section in enumerate(data.get('sections', [])):
+            ProgramSection.objects.create(
+                program=program, title=section.get('title', ''), content=section.get('content', []), order=index
+            )
+
+
+def bulk_load(programs_data, force=False):
+    from programs.loading import load_programs
+
+    load_programs(programs_data, force=force)
+
+
+def forced_bulk_load(programs_data):
+    bulk_load(programs_data, force=True)
+
+
+def changed_catalog(catalog, fraction):
+    catalog = copy.deepcopy(catalog)
+    step = max(1, round(1 / fraction)) if fraction else None
+    for index, data in enumerate(catalog.values()):
+        if step and index % step == 0:
+            # Copies of one shipped program share their details dict, so replace it rather than edit it
+            details = data['program_details']
+            data['program_details'] = dict(details, name=details['name'] + ' (updated)')
+            data['budget_info'] = {'fall_2026': {'term': 'Fall', 'year': '2026', 'total_estimated_cost': '$1'}}
+            data['sections'] = data.get('sections', [])[:1] + [{'title': 'New', 'content': [f'<p>{index}</p>']}]
+    return catalog
+
+
+def reset():
+    from programs.models import Program, SectionContent
+
+    Program.objects.all().delete()
+    SectionContent.objects.all().delete()
+
+
+def measure(load, catalog):
+    from django.db import connection
+
+    writes = 0
+
+    def counter(execute, sql, params, many, context):
+        nonlocal writes
+        if sql.lstrip().startswith(('INSERT', 'UPDATE', 'DELETE')):
+            writes += 1
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    with connection.execute_wrapper(counter):
+        load(catalog)
+    return [f'{time.perf_counter() - start:.2f}', writes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--programs', type=int, default=20000, help='Number of programs in the catalog')
+    parser.add_argument('--changed', type=float, default=0.05, help='Fraction of programs changed before the last reload')
+    parser.add_argument('--skip-per-row', action='store_true', help='Only run the bulk loader')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    catalog = synthetic_catalog(math.ceil(args.programs / len(synthetic_catalog(1))))
+    catalog = dict(list(catalog.items())[:args.programs])
+    modified = changed_catalog(catalog, args.changed)
+    print(f'{len(catalog)} programs, '
+          f'{sum(len(data.get("sections", [])) for data in catalog.values())} sections\n')
+
+    loaders = [('bulk', bulk_load, forced_bulk_load)]
+    if not args.skip_per_row:
+        loaders.insert(0, ('per-row (before)', legacy_load, None))
+    rows = []
+    for label, load, forced_load in loaders:
+        reset()
+        rows.append([label, 'initial load', *measure(load, catalog)])
+        rows.append([label, 'reload, unchanged', *measure(load, catalog)])
+        if forced_load:
+            rows.append([label, 'reload, unchanged, --force', *measure(forced_load, catalog)])
+        rows.append([label, f'reload, {args.changed:.0%} changed', *measure(load, modified)])
+    print_table(['loader', 'run', 'seconds', 'write statements'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Measure login throughput and the latency of other requests during a burst of logins.
+
+Usage (from backend/):
+    python -m benchmarks.login_throughput [--clients 16] [--seconds 5] [--iterations 100000 600000]
+
+--clients threads log in through the test client in a loop while a probe thread
+requests a cheap cached endpoint (/api/programs/popular/). This is how requests run
+under both WSGI and ASGI, where sync DRF views get a thread each. Every work factor is
+measured with a hashing pool as large as the number of clients, i.e. unbounded, and
+with the default bounded pool (one worker per CPU). Reported:
+  - successful logins per second and their median and p95 latency
+  - logins turned away with 503
+  - median and p95 latency of the probe requests
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+
+from benchmarks.common import setup_django, print_table
+
+
+def percentile(timings, fraction):
+    timings = sorted(timings)
+    return timings[min(int(len(timings) * fraction), len(timings) - 1)]
+
+
+def run(clients, seconds):
+    from django.test import Client
+
+    logins, rejected, probes = [], [], []
+    stop = threading.Event()
+
+    def log_in(number):
+        client = Client()
+        credentials = {'username': f'student{number}', 'password': 'benchpass123'}
+        while not stop.is_set():
+            start = time.perf_counter()
+            response = client.post('/api/auth/login/', credentials, content_type='application/json')
+            elapsed = time.perf_counter() - start
+            if response.status_code == 200:
+                logins.append(elapsed)
+            elif response.status_code == 503:
+                rejected.append(elapsed)
+            else:
+                raise AssertionError(response.status_code)
+
+    def probe():
+        client = Client()
+        while not stop.is_set():
+            start = time.perf_counter()
+            client.get('/api/programs/popular/')
+            probes.append(time.perf_counter() - start)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=log_in, args=(number,)) for number in range(clients)]
+    threads.append(threading.Thread(target=probe))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return [
+        f'{len(logins) / seconds:.1f}',
+        f'{statistics.median(logins) * 1000:.0f}' if logins else '-',
+        f'{percentile(logins, 0.95) * 1000:.0f}' if logins else '-',
+        len(rejected),
+        f'{statistics.median(probes) * 1000:.1f}',
+        f'{percentile(probes, 0.95) * 1000:.1f}',
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent login threads')
+    parser.add_argument('--seconds', type=float, default=5, help='Duration of each run')
+    parser.add_argument('--iterations', type=int, nargs='+', default=[100000, 600000],
+                        help='PBKDF2 iteration counts to compare')
+    args = parser.parse_args()
+
+    # Signed-cookie sessions and no last_login update keep SQLite write locks out of the measurement
+    os.environ['SESSION_ENGINE'] = 'django.contrib.sessions.backends.signed_cookies'
+    setup_django()
+    from django.contrib.auth.models import User, update_last_login
+    from django.contrib.auth.signals import user_logged_in
+    from django.test import Client, override_settings
+    from django.test.utils import setup_test_environment
+    from accounts import hashing
+
+    setup_test_environment()
+    user_logged_in.disconnect(update_last_login, dispatch_uid='update_last_login')
+    Client().get('/api/programs/popular/')  # warm the cached response
+
+    pools = [('unbounded', args.clients), ('bounded', os.cpu_count() or 1)]
+    rows = []
+    for iterations in args.iterations:
+        with override_settings(PASSWORD_HASH_ITERATIONS=iterations):
+            User.objects.all().delete()
+            password = hashing.make_password('benchpass123')
+            User.objects.bulk_create([
+                User(username=f'student{number}', password=password) for number in range(args.clients)
+            ])
+            for label, workers in pools:
+                with override_settings(PASSWORD_HASHING_WORKERS=workers):
+                    hashing.reset_pool()
+                    rows.append([iterations, f'{label} ({workers})', *run(args.clients, args.seconds)])
+    hashing.reset_pool()
+    print_table(
+        ['iterations', 'pool', 'logins/s', 'login p50 ms', 'login p95 ms', '503s', 'probe p50 ms', 'probe p95 ms'],
+        rows,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Measure catalog normalization throughput with growing numbers of worker processes.
+
+Usage (from backend/):
+    python -m benchmarks.normalize_throughput [--programs 50000] [--workers 1 2 4 8]
+
+A catalog made of copies of the shipped programs is written to disk as JSON Lines. For
+every worker count it is:
+  - read and normalized only (programs.normalize.normalize_chunks), without the database
+  - loaded into an empty database with load_programs(workers=...)
+Reported per run: wall time and programs per second. Normalization can only scale up to
+the number of CPUs on the machine, printed first.
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import setup_django, print_table
+from benchmarks.ingest_memory import synthetic_records, reset
+
+
+def normalize_only(path, workers, chunk_size):
+    from programs.loading import field_limits, read_chunks
+    from programs.normalize import normalize_chunks
+    from programs.streaming import read_programs
+
+    timings = {'read': 0.0}
+    chunks = read_chunks(read_programs(path), chunk_size, set(), timings)
+    for _ in normalize_chunks(chunks, workers=workers, limits=field_limits()):
+        pass
+
+
+def full_load(path, workers, chunk_size):
+    from programs.loading import load_programs
+    from programs.streaming import read_programs
+
+    reset()
+    load_programs(read_programs(path), workers=workers, chunk_size=chunk_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--programs', type=int, default=50000, help='Number of programs in the catalog')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='Worker counts to compare')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Programs per chunk')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test.utils import setup_test_environment
+    from programs.streaming import write_programs
+
+    setup_test_environment()
+    path = Path(tempfile.mkdtemp(prefix='anchorabroad-normalize-')) / 'catalog.jsonl'
+    write_programs(path, synthetic_records(args.programs))
+    print(f'{args.programs} programs, {os.cpu_count()} CPUs\n')
+
+    rows = []
+    for label, run in [('normalize only', normalize_only), ('load_programs', full_load)]:
+        for workers in args.workers:
+            start = time.perf_counter()
+            run(path, workers, args.chunk_size)
+            elapsed = time.perf_counter() - start
+            rows.append([label, workers, f'{elapsed:.2f}', f'{args.programs / elapsed:,.0f}'])
+    path.unlink()
+    print_table(['stage', 'workers', 'seconds', 'programs/s'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Compare session engines for authenticated API requests.
+
+Usage (from backend/):
+    python -m benchmarks.sessions [--requests 500] [--sessions 50000]
+
+A student logs in through the test client and repeatedly calls an authenticated
+endpoint that is otherwise served from the cache (/api/auth/favorites/ids/), so the
+session lookup dominates. The session table is padded with --sessions other rows.
+Reported per engine:
+  - median and p95 latency of the authenticated request
+  - database queries per request
+  - time for a logout and for a login, which write the session (login also hashes the password)
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.common import setup_django, print_table
+
+ENGINES = [
+    ('db', 'django.contrib.sessions.backends.db'),
+    ('cached_db', 'django.contrib.sessions.backends.cached_db'),
+    ('signed_cookies', 'django.contrib.sessions.backends.signed_cookies'),
+]
+
+
+def pad_sessions(count):
+    from datetime import timedelta
+    from django.contrib.sessions.backends.db import SessionStore
+    from django.contrib.sessions.models import Session
+    from django.utils import timezone
+
+    expire_date = timezone.now() + timedelta(days=14)
+    data = SessionStore().encode({'alumni_id': 1})
+    Session.objects.bulk_create(
+        [Session(session_key=f'padding{i:032d}', session_data=data, expire_date=expire_date) for i in range(count)],
+        batch_size=5000,
+    )
+
+
+def count_queries(func):
+    from django.db import connection
+
+    count = 0
+
+    def counter(execute, sql, params, many, context):
+        nonlocal count
+        count += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(counter):
+        func()
+    return count
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def measure(engine, requests):
+    from django.test import Client, override_settings
+
+    with override_settings(SESSION_ENGINE=engine):
+        client = Client()
+        client.post('/api/auth/login/', {'username': 'student', 'password': 'benchpass123'},
+                    content_type='application/json')
+        client.get('/api/auth/favorites/ids/')  # warm the session, principal and favorites caches
+
+        timings = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = client.get('/api/auth/favorites/ids/')
+            timings.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.status_code
+        queries = count_queries(lambda: client.get('/api/auth/favorites/ids/'))
+
+        logout_timings, login_timings = [], []
+        for _ in range(20):
+            logout_timings.append(timed(lambda: client.post('/api/auth/logout/')))
+            login_timings.append(timed(lambda: client.post(
+                '/api/auth/login/', {'username': 'student', 'password': 'benchpass123'},
+                content_type='application/json'
+            )))
+
+    timings.sort()
+    return [
+        f'{statistics.median(timings) * 1000:.2f}',
+        f'{timings[int(len(timings) * 0.95)] * 1000:.2f}',
+        queries,
+        f'{statistics.median(logout_timings) * 1000:.2f}',
+        f'{statistics.median(login_timings) * 1000:.1f}',
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=500, help='Authenticated requests per engine')
+    parser.add_argument('--sessions', type=int, default=50000, help='Other sessions in the session table')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    User.objects.create_user(username='student', password='benchpass123')
+    pad_sessions(args.sessions)
+
+    rows = [[label, *measure(engine, args.requests)] for label, engine in ENGINES]
+    print_table(['engine', 'median ms', 'p95 ms', 'queries/request', 'logout ms', 'login ms'], rows)
+
+
+if __name__ == '__main__':
+    main()
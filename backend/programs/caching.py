@@ -0,0 +1,49 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import CatalogVersion
+
+DATASET_VERSION_KEY = 'programs:dataset_version'
+# Seconds a process keeps its dataset token when settings.DATASET_TOKEN_TIMEOUT is unset.
+# Without a shared cache a bump only reaches the process that made it, so the others
+# draw a new token, and rebuild what they cached, once theirs is this old.
+DATASET_TOKEN_TIMEOUT = 5 * 60
+
+
+def get_dataset_version():
+    """
+    Return the token identifying the current program dataset. It starts with the id of
+    the active catalog version, cached with the token, so a process that sees a bump made
+    by an activation also switches to the new catalog version.
+    """
+    version = cache.get(DATASET_VERSION_KEY)
+    if version is None:
+        cache.add(DATASET_VERSION_KEY, new_dataset_version(), timeout=dataset_token_timeout())
+        version = cache.get(DATASET_VERSION_KEY)
+    return version
+
+
+def bump_dataset_version():
+    """Invalidate every cache entry derived from the program dataset"""
+    version = new_dataset_version()
+    cache.set(DATASET_VERSION_KEY, version, timeout=dataset_token_timeout())
+    return version
+
+
+def new_dataset_version():
+    # A fresh random token, unlike a counter, can never collide with a version
+    # that was in use before the key was evicted or the cache was cleared
+    active = CatalogVersion.objects.filter(state=CatalogVersion.ACTIVE).values_list('id', flat=True).first() or 0
+    return f'{active}.{uuid.uuid4().hex}'
+
+
+def dataset_token_timeout():
+    return getattr(settings, 'DATASET_TOKEN_TIMEOUT', DATASET_TOKEN_TIMEOUT)
+
+
+def dataset_cache_key(*parts):
+    """Build a cache key that is only valid for the current dataset version"""
+    suffix = ':'.join(str(part) for part in parts)
+    return f'programs:{get_dataset_version()}:{suffix}'
@@ -0,0 +1,111 @@
+"""
+In-memory facet index over the program catalog.
+
+For every facet value the index keeps a bitset (a Python int) with one bit per program.
+Filtering is AND across facets and OR within a facet, and each facet's counts ignore
+that facet's own filter so the UI can show how many programs every option would add.
+The index is rebuilt at most once per dataset version.
+"""
+import re
+import threading
+
+from .caching import get_dataset_version
+from .models import Program
+
+UNKNOWN = 'Unknown'
+
+# Upper bound (exclusive, in dollars) and label of each cost band
+COST_BANDS = [
+    (20000, 'Under $20k'),
+    (30000, '$20k-$30k'),
+    (40000, '$30k-$40k'),
+    (50000, '$40k-$50k'),
+    (None, '$50k+'),
+]
+
+
+def cost_band(program):
+    """Band of the most recent estimated cost, or Unknown when there is none"""
+    budgets = sorted(program.budget_info.all(), key=lambda budget: budget.year)
+    for budget in reversed(budgets):
+        digits = re.sub(r'[^0-9.]', '', budget.total_estimated_cost)
+        if digits:
+            cost = float(digits)
+            for upper, label in COST_BANDS:
+                if upper is None or cost < upper:
+                    return label
+    return UNKNOWN
+
+
+# Facet name -> function returning the facet values of one program
+FACETS = {
+    'continent': lambda program: [program.continent],
+    'program_type': lambda program: [program.program_type],
+    'calendar': lambda program: program.academic_calendar.split(','),
+    'language': lambda program: [program.language_prerequisite.capitalize()],
+    'cost_band': lambda program: [cost_band(program)],
+}
+
+
+class FacetIndex:
+    """Bitsets for every facet value over a fixed ordering of programs"""
+
+    def __init__(self, programs):
+        self.program_ids = []
+        self.bitsets = {facet: {} for facet in FACETS}
+        for position, program in enumerate(programs):
+            self.program_ids.append(program.program_id)
+            bit = 1 << position
+            for facet, values_for in FACETS.items():
+                for value in values_for(program):
+                    value = value.strip() or UNKNOWN
+                    self.bitsets[facet][value] = self.bitsets[facet].get(value, 0) | bit
+        self.all_bits = (1 << len(self.program_ids)) - 1
+
+    def match(self, filters, exclude=None):
+        """Bitset of programs matching every filter except the excluded facet"""
+        bits = self.all_bits
+        for facet, values in filters.items():
+            if facet == exclude or not values:
+                continue
+            facet_bits = 0
+            for value in values:
+                facet_bits |= self.bitsets[facet].get(value, 0)
+            bits &= facet_bits
+        return bits
+
+    def search(self, filters):
+        """Return matching program ids and the facet counts under the other filters"""
+        matched = self.match(filters)
+        facets = {}
+        for facet, values in self.bitsets.items():
+            others = self.match(filters, exclude=facet) if facet in filters else matched
+            facets[facet] = {
+                value: (bits & others).bit_count()
+                for value, bits in sorted(values.items())
+            }
+        program_ids = []
+        remaining = matched
+        while remaining:
+            lowest = remaining & -remaining
+            program_ids.append(self.program_ids[lowest.bit_length() - 1])
+            remaining ^= lowest
+        return {'count': len(program_ids), 'program_ids': program_ids, 'facets': facets}
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_facet_index():
+    """Return the facet index for the current dataset version, building it if needed"""
+    global _index
+    version = get_dataset_version()
+    if _index is None or _index[0] != version:
+        with _index_lock:
+            if _index is None or _index[0] != version:
+                programs = Program.objects.only(
+                    'program_id', 'continent', 'program_type', 'academic_calendar', 'language_prerequisite'
+                ).prefetch_related('budget_info').order_by('program_id')
+                _index = (version, FacetIndex(programs))
+    return _index[1]
@@ -0,0 +1,131 @@
+import json
+import zlib
+
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+# The first byte of every stored value says how the rest is encoded
+FORMAT_RAW = 0
+FORMAT_ZLIB = 1
+
+
+class CompressedPayload(bytes):
+    """Stored bytes of a compressed column that have not been decoded yet"""
+
+    def __new__(cls, value, field):
+        payload = super().__new__(cls, value)
+        payload.field = field
+        return payload
+
+    def load(self):
+        """Decode the payload into the field's Python value"""
+        return self.field.decode(decompress(self))
+
+
+class CompressedAttribute(DeferredAttribute):
+    """Keeps the stored bytes on the instance and decodes them on first access"""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, CompressedPayload):
+            value = value.load()
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+def compress(data, threshold, level):
+    """Prefix data with its format byte, compressing it when that saves space"""
+    if len(data) >= threshold:
+        compressed = zlib.compress(data, level)
+        if len(compressed) < len(data):
+            return bytes([FORMAT_ZLIB]) + compressed
+    return bytes([FORMAT_RAW]) + data
+
+
+def decompress(payload):
+    """Strip the format byte and return the original bytes"""
+    version, data = payload[0], payload[1:]
+    if version == FORMAT_RAW:
+        return bytes(data)
+    if version == FORMAT_ZLIB:
+        return zlib.decompress(data)
+    raise ValueError(f'Unknown compressed field format: {version}')
+
+
+class CompressedFieldMixin:
+    """
+    Stores the field's value as bytes, zlib-compressed once it reaches a size threshold.
+    Values are decompressed lazily when the model attribute is first read, and
+    untouched values are written back without being recompressed. values() and
+    values_list() return CompressedPayload objects; call load() to decode them.
+    Database lookups on the decoded value are not supported.
+    """
+    descriptor_class = CompressedAttribute
+
+    def __init__(self, *args, compress_threshold=128, compression_level=6, **kwargs):
+        self.compress_threshold = compress_threshold
+        self.compression_level = compression_level
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.compress_threshold != 128:
+            kwargs['compress_threshold'] = self.compress_threshold
+        if self.compression_level != 6:
+            kwargs['compression_level'] = self.compression_level
+        return name, path, args, kwargs
+
+    def get_internal_type(self):
+        return 'BinaryField'
+
+    def get_placeholder(self, value, compiler, connection):
+        return connection.ops.binary_placeholder_sql(value)
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return CompressedPayload(value, self)
+
+    def to_python(self, value):
+        if isinstance(value, CompressedPayload):
+            return value.load()
+        return super().to_python(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is None:
+            return None
+        if isinstance(value, CompressedPayload):
+            payload = bytes(value)
+        else:
+            payload = compress(self.encode(value), self.compress_threshold, self.compression_level)
+        return connection.Database.Binary(payload)
+
+    def get_db_prep_save(self, value, connection):
+        if hasattr(value, 'as_sql'):
+            return value
+        return self.get_db_prep_value(value, connection)
+
+
+class CompressedTextField(CompressedFieldMixin, models.TextField):
+    """TextField stored compressed"""
+
+    def encode(self, value):
+        return str(value).encode('utf-8')
+
+    def decode(self, data):
+        return data.decode('utf-8')
+
+
+class CompressedJSONField(CompressedFieldMixin, models.JSONField):
+    """JSONField stored compressed"""
+
+    def encode(self, value):
+        return json.dumps(value, cls=self.encoder, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def decode(self, data):
+        return json.loads(data, cls=self.decoder)
@@ -1,31 +1,282 @@
+"""
+Enrich the scraped program catalog with program locations into data.json.
+
+Usage (from backend/):
+    python -m programs.fixing [--geocoder none|nominatim|module.Class] [--retry-unresolved]
+
+Each program's location is taken from the first of:
+  1. vanderbilt_programs_latlong.json, looked up by program id and then by program name
+  2. the geocode cache, geocode_cache.json, keyed by the normalized location query
+  3. the geocoder, which is sent every location still missing in batches. Its answers,
+     including the queries it could not resolve, are added to the cache.
+Programs that are still unresolved are written without coordinates and with continent
+'Unknown', and are listed in unresolved_locations.json, instead of being placed at (0, 0).
+A location can be fixed by hand by adding its query to the geocode cache.
+
+The catalog is streamed twice, once to find the missing locations and once to write
+every program as soon as it has been merged.
+"""
+import argparse
+import collections
+import importlib
 import json
-try:
-    with open('vanderbilt_all_programs.json', 'r') as file:
-        main_dict = json.load(file)
-        
-    with open('vanderbilt_programs_latlong.json', 'r') as file:
-        loc_dict = json.load(file)
-    print(loc_dict)
-
-    for program_id in main_dict:
-        try:
-            main_dict[f'{program_id}']['program_details']['latitude'] = loc_dict[f'{program_id}']['program_details']['latitude'] 
-            main_dict[f'{program_id}']['program_details']['longitude'] = loc_dict[f'{program_id}']['program_details']['longitude'] 
-            main_dict[f'{program_id}']['program_details']['continent'] = loc_dict[f'{program_id}']['program_details']['continent'] 
-        except KeyError as e:
+import re
+import time
+import unicodedata
+from pathlib import Path
+from urllib.error import URLError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from programs.streaming import read_programs, write_programs
+
+PROGRAMS_DIR = Path(__file__).resolve().parent
+LOCATIONS_FILE = PROGRAMS_DIR / 'vanderbilt_programs_latlong.json'
+PROGRAMS_FILE = PROGRAMS_DIR / 'vanderbilt_all_programs.json'
+CACHE_FILE = PROGRAMS_DIR / 'geocode_cache.json'
+UNRESOLVED_FILE = PROGRAMS_DIR / 'unresolved_locations.json'
+UNKNOWN_CONTINENT = 'Unknown'
+
+Location = collections.namedtuple('Location', ['latitude', 'longitude', 'continent'])
+
+# ISO 3166 country codes per continent, in the continent names the catalog uses
+COUNTRY_CONTINENTS = {
+    code: continent
+    for continent, codes in {
+        'Africa': 'DZ AO BJ BW BF BI CV CM CF TD KM CD CG CI DJ EG GQ ER SZ ET GA GM GH GN GW KE LS LR LY MG MW '
+                  'ML MR MU MA MZ NA NE NG RW ST SN SC SL SO ZA SS SD TZ TG TN UG ZM ZW EH RE YT SH',
+        'Asia': 'AF AM AZ BH BD BT BN KH CN CY GE HK IN ID IR IQ IL JP JO KZ KW KG LA LB MO MY MV MN MM NP KP OM '
+                'PK PS PH QA SA SG KR LK SY TW TJ TH TL TR TM AE UZ VN YE',
+        'Europe': 'AL AD AT BY BE BA BG HR CZ DK EE FO FI FR DE GI GR GG HU IS IE IM IT JE XK LV LI LT LU MT MD MC '
+                  'ME NL MK NO PL PT RO RU SM RS SK SI ES SE CH UA GB VA AX',
+        'North America': 'AG BS BB BZ CA CR CU DM DO SV GD GT HT HN JM MX NI PA KN LC VC TT US PR GL BM KY TC VG VI '
+                         'AW CW SX BQ MQ GP',
+        'South America': 'AR BO BR CL CO EC GY PY PE SR UY VE GF FK',
+        'Australia': 'AU',
+        'Oceania': 'FJ KI MH FM NR NZ PW PG WS SB TO TV VU NC PF GU AS MP CK NU',
+    }.items()
+    for code in codes.split()
+}
+
+
+def normalize_location(text):
+    """Cache key for a place name: casefolded words, without punctuation or parenthesized notes"""
+    text = unicodedata.normalize('NFKC', text or '').casefold()
+    text = re.sub(r'\([^)]*\)', ' ', text)
+    return ' '.join(re.findall(r'\w+', text))
+
+
+def location_query(record):
+    """The location query for a program, derived from its name"""
+    return normalize_location(record.get('program_details', {}).get('name', ''))
+
+
+def known_location(details):
+    """Location from a record's program_details, or None if it has none or only the (0, 0) placeholder"""
+    try:
+        location = Location(float(details['latitude']), float(details['longitude']), details['continent'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if (location.latitude, location.longitude) == (0, 0):
+        return None
+    return location
+
+
+class LocationIndex:
+    """Locations from the locations file, by program id and by normalized program name"""
+
+    def __init__(self):
+        self.by_id, self.by_name = {}, {}
+
+    @classmethod
+    def from_file(cls, path):
+        index = cls()
+        for program_id, record in read_programs(path):
+            details = record.get('program_details', {})
+            location = known_location(details)
+            if location is None:
+                # Older files kept the coordinates next to program_details
+                location = known_location({**record, 'continent': details.get('continent', UNKNOWN_CONTINENT)})
+            if location is not None:
+                index.add(program_id, details.get('name', ''), location)
+        return index
+
+    def add(self, program_id, name, location):
+        self.by_id[program_id] = location
+        if normalize_location(name):
+            self.by_name.setdefault(normalize_location(name), location)
+
+    def lookup(self, program_id, record):
+        return self.by_id.get(program_id) or self.by_name.get(location_query(record))
+
+
+class GeocodeCache:
+    """Geocoder answers by normalized location query, kept in a JSON file between runs; None marks a failed query"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as file:
+                for query, entry in json.load(file).items():
+                    self.entries[query] = Location(**entry) if entry else None
+
+    def __contains__(self, query):
+        return query in self.entries
+
+    def get(self, query):
+        return self.entries.get(query)
+
+    def update(self, results):
+        self.entries.update(results)
+
+    def save(self):
+        # Written next to the cache first, so an interrupted run leaves the old file in place
+        partial = self.path.with_name(self.path.name + '.partial')
+        with open(partial, 'w', encoding='utf-8') as file:
+            json.dump(
+                {query: entry._asdict() if entry else None for query, entry in sorted(self.entries.items())},
+                file, indent=4, ensure_ascii=False,
+            )
+        partial.replace(self.path)
+
+
+class Geocoder:
+    """Resolves location queries, batch_size at a time"""
+    batch_size = 50
+
+    def geocode(self, queries):
+        """query -> Location, or None if it cannot be resolved. Queries left out are retried on the next run."""
+        raise NotImplementedError
+
+
+class NoGeocoder(Geocoder):
+    """Resolves nothing, so only the locations file and the geocode cache are used"""
+
+    def geocode(self, queries):
+        return {}
+
+
+class NominatimGeocoder(Geocoder):
+    """OpenStreetMap's public geocoder, whose usage policy allows one request per second"""
+    url = 'https://nominatim.openstreetmap.org/search'
+    batch_size = 10
+
+    def __init__(self, delay=1.0, timeout=10, user_agent='AnchorAbroad catalog enrichment'):
+        self.delay = delay
+        self.timeout = timeout
+        self.user_agent = user_agent
+
+    def geocode(self, queries):
+        results = {}
+        for query in queries:
+            params = urlencode({'q': query, 'format': 'jsonv2', 'limit': 1, 'addressdetails': 1})
+            request = Request(f'{self.url}?{params}', headers={'User-Agent': self.user_agent})
             try:
-                main_dict[f'{program_id}']['program_details']['latitude'] = loc_dict[f'{program_id}']['latitude']
-                main_dict[f'{program_id}']['program_details']['longitude'] = loc_dict[f'{program_id}']['longitude']
-                main_dict[f'{program_id}']['program_details']['continent'] = loc_dict[f'{program_id}']['program_details']['continent'] 
-            except KeyError as e:
-                main_dict[f'{program_id}']['program_details']['latitude'] = 0
-                main_dict[f'{program_id}']['program_details']['longitude'] = 0
-                main_dict[f'{program_id}']['program_details']['continent'] = 'Unknown'
-
-    with open("data.json", "w") as file:
-        json.dump(main_dict, file, indent=4)
-
-except FileNotFoundError:
-    print("Error: 'data.json' not found. Please create the file.")
-except json.JSONDecodeError:
-    print("Error: Invalid JSON format in 'data.json'.")
\ No newline at end of file
+                with urlopen(request, timeout=self.timeout) as response:
+                    matches = json.load(response)
+            except (URLError, OSError, ValueError) as e:
+                print(f"Warning: could not geocode '{query}': {e}")
+                continue
+            finally:
+                time.sleep(self.delay)
+            if not matches:
+                results[query] = None
+                continue
+            country = matches[0].get('address', {}).get('country_code', '').upper()
+            results[query] = Location(
+                float(matches[0]['lat']), float(matches[0]['lon']), COUNTRY_CONTINENTS.get(country, UNKNOWN_CONTINENT)
+            )
+        return results
+
+
+GEOCODERS = {'none': NoGeocoder, 'nominatim': NominatimGeocoder}
+
+
+def get_geocoder(name):
+    """A geocoder by name, or by the dotted path of a Geocoder class"""
+    if name in GEOCODERS:
+        return GEOCODERS[name]()
+    module, _, cls = name.rpartition('.')
+    return getattr(importlib.import_module(module), cls)()
+
+
+def geocode_missing(programs, index, cache, geocoder, retry_unresolved=False):
+    """Send the geocoder every location query neither the index nor the cache answers, batch by batch"""
+    pending = {}
+    for program_id, record in programs:
+        query = location_query(record)
+        if not query or query in pending or index.lookup(program_id, record):
+            continue
+        if query not in cache or (retry_unresolved and cache.get(query) is None):
+            pending[query] = None
+    pending = list(pending)
+    for start in range(0, len(pending), geocoder.batch_size):
+        results = geocoder.geocode(pending[start:start + geocoder.batch_size])
+        if results:
+            cache.update(results)
+            # Saved after every batch, so an interrupted run keeps what it resolved
+            cache.save()
+    return len(pending)
+
+
+def merge_locations(programs, index, cache, sources, unresolved):
+    """
+    Yield every (program id, record) with its location filled in. sources counts where the
+    locations came from; programs without one are appended to unresolved.
+    """
+    for program_id, record in programs:
+        details = record.setdefault('program_details', {})
+        location, source = index.lookup(program_id, record), 'locations file'
+        if location is None:
+            location, source = cache.get(location_query(record)), 'geocode cache'
+        if location is None:
+            details.pop('latitude', None)
+            details.pop('longitude', None)
+            details['continent'] = UNKNOWN_CONTINENT
+            unresolved.append({'program_id': program_id, 'name': details.get('name', ''), 'query': location_query(record)})
+        else:
+            details['latitude'], details['longitude'], details['continent'] = location
+            sources[source] += 1
+        yield program_id, record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--geocoder', default='none',
+                        help="Geocoder for locations found nowhere else: 'none', 'nominatim' or a Geocoder class path")
+    parser.add_argument('--retry-unresolved', action='store_true',
+                        help='Send the queries the geocoder could not resolve before to it again')
+    args = parser.parse_args(argv)
+
+    try:
+        index = LocationIndex.from_file(LOCATIONS_FILE)
+        cache = GeocodeCache(CACHE_FILE)
+        geocoded = geocode_missing(
+            read_programs(PROGRAMS_FILE), index, cache, get_geocoder(args.geocoder), args.retry_unresolved
+        )
+        # Written next to data.json first, so a failed run leaves the old file in place
+        output = PROGRAMS_DIR / 'data.json'
+        partial = output.with_name('data.json.partial')
+        sources, unresolved = collections.Counter(), []
+        write_programs(partial, merge_locations(read_programs(PROGRAMS_FILE), index, cache, sources, unresolved))
+        partial.replace(output)
+        with open(UNRESOLVED_FILE, 'w', encoding='utf-8') as file:
+            json.dump(unresolved, file, indent=4, ensure_ascii=False)
+    except FileNotFoundError as e:
+        print(f"Error: '{e.filename}' not found.")
+        return
+    except json.JSONDecodeError as e:
+        print(f'Error: Invalid JSON format: {e}')
+        return
+
+    print(f'Locations from the locations file: {sources["locations file"]}, '
+          f'from the geocode cache: {sources["geocode cache"]} ({geocoded} queries sent to the geocoder)')
+    if unresolved:
+        print(f'{len(unresolved)} programs have no location, see {UNRESOLVED_FILE.name}:')
+        for program in unresolved:
+            print(f"  {program['program_id']}: {program['name']} (query '{program['query']}')")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,386 @@
+"""
+Bulk loader for the program catalog.
+
+The programs, budget entries and sections already in the database are read once, the
+catalog is diffed against them in memory, and only the differences are written, with
+bulk_create, bulk_update and batched deletes inside one transaction. A load therefore
+either applies completely or not at all. Bulk queries send no signals, so the dataset
+version is bumped once at the end instead of once per row.
+
+Every program stores the hash of the record it was last loaded from, so records that
+did not change since are skipped without reading or writing any of their rows.
+Records are handled in fixed-size chunks, so apart from one id per program seen, memory
+use does not grow with the catalog. Each chunk is first validated and normalized by
+programs.normalize, in a process pool when several workers are asked for, and only
+records that pass reach the database. programs.staging uses the same loader to write a
+staged catalog version that readers only see once it is complete.
+"""
+import contextlib
+import itertools
+import time
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .caching import bump_dataset_version
+from .models import Program, BudgetInfo, ProgramSection, SectionContent
+from .normalize import normalize_chunks
+
+LOAD_BATCH_SIZE = 500
+# Records read, diffed and written at a time
+LOAD_CHUNK_SIZE = 1000
+# Share of the stored programs a load may remove before it is refused
+MAX_REMOVED_FRACTION = 0.5
+
+
+class CatalogRejected(Exception):
+    """A catalog failed validation and was not applied"""
+
+    def __init__(self, problems):
+        super().__init__('; '.join(problems))
+        self.problems = problems
+
+
+def field_limits():
+    """Maximum lengths of the text fields filled from catalog records, for the normalization stage"""
+    limits = {
+        field.name: field.max_length for field in Program._meta.get_fields()
+        if getattr(field, 'max_length', None)
+    }
+    limits['budget.term'] = BudgetInfo._meta.get_field('term').max_length
+    limits['budget.total_estimated_cost'] = BudgetInfo._meta.get_field('total_estimated_cost').max_length
+    limits['section.title'] = ProgramSection._meta.get_field('title').max_length
+    return limits
+
+def batched(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def delete_ids(model, ids, batch_size):
+    # Nothing references budget entries or sections, so they are deleted with plain DELETE
+    # statements instead of through the collector, which would send one post_delete signal
+    # (and dataset version bump) per row
+    table = connection.ops.quote_name(model._meta.db_table)
+    pk = connection.ops.quote_name(model._meta.pk.column)
+    deleted = 0
+    with connection.cursor() as cursor:
+        for batch in batched(ids, batch_size):
+            cursor.execute(f'DELETE FROM {table} WHERE {pk} IN ({", ".join(["%s"] * len(batch))})', batch)
+            deleted += cursor.rowcount
+    return deleted
+
+
+def retire_ids(model, ids, version, batch_size):
+    """Mark rows as replaced in a staged version; the active version keeps seeing them"""
+    retired = 0
+    for batch in batched(ids, batch_size):
+        retired += model.all_versions.filter(id__in=batch).update(removed_in=version)
+    return retired
+
+
+def replacement(row, version):
+    """A copy of a stored row for a staged version, leaving the stored row to the active one"""
+    values = {
+        field.attname: getattr(row, field.attname) for field in row._meta.concrete_fields
+        if field.attname not in ('id', 'added_in', 'removed_in')
+    }
+    return type(row)(added_in=version, **values)
+
+
+class CatalogDiff:
+    """Inserts, updates and deletes that turn the stored catalog into the given one"""
+
+    def __init__(self):
+        self.new_programs, self.changed_programs, self.changed_fields = [], [], set()
+        self.unchanged_programs = 0
+        self.new_budgets, self.changed_budgets, self.removed_budgets = [], [], []
+        self.new_sections, self.changed_sections, self.removed_sections = [], [], []
+        self.new_bodies = []
+
+    @classmethod
+    def compute(cls, records, force=False, batch_size=LOAD_BATCH_SIZE):
+        """Diff a chunk of normalized ProgramRecords against the stored catalog"""
+        diff = cls()
+        stored_hashes = {}
+        for batch in batched([record.program_id for record in records], batch_size):
+            stored_hashes.update(Program.all_versions.filter(program_id__in=batch).values_list('program_id', 'content_hash'))
+
+        # A record whose hash matches the stored one is skipped without reading its rows
+        pending = []
+        for record in records:
+            if not force and stored_hashes.get(record.program_id) == record.digest:
+                diff.unchanged_programs += 1
+            else:
+                pending.append(record)
+
+        programs, budgets, sections = {}, defaultdict(dict), defaultdict(dict)
+        for batch in batched([record.program_id for record in pending], batch_size):
+            programs.update(Program.all_versions.in_bulk(batch))
+            # Only the newest rows are diffed; rows replaced by a staged load wait to be collected
+            for budget in BudgetInfo.all_versions.filter(program_id__in=batch, removed_in__isnull=True).only(
+                'id', 'program_id', 'term', 'year', 'total_estimated_cost'
+            ):
+                budgets[budget.program_id][(budget.term, budget.year)] = budget
+            for section in ProgramSection.all_versions.filter(program_id__in=batch, removed_in__isnull=True).only(
+                'id', 'program_id', 'order', 'title', 'body_id'
+            ):
+                sections[section.program_id][section.order] = section
+
+        bodies = {}
+        for record in pending:
+            program_id = record.program_id
+            diff.diff_program(programs.get(program_id), program_id, dict(record.values, content_hash=record.digest))
+            diff.diff_budgets(budgets.pop(program_id, {}), program_id, record.budgets)
+            diff.diff_sections(sections.pop(program_id, {}), program_id, record.sections)
+            for digest, content in record.bodies.items():
+                bodies.setdefault(digest, content)
+
+        stored_bodies = set()
+        for batch in batched(bodies, batch_size):
+            stored_bodies.update(SectionContent.objects.filter(hash__in=batch).values_list('hash', flat=True))
+        diff.new_bodies = [
+            SectionContent(hash=digest, content=content)
+            for digest, content in bodies.items() if digest not in stored_bodies
+        ]
+        return diff
+
+    def diff_program(self, program, program_id, values):
+        if program is None:
+            self.new_programs.append(Program(program_id=program_id, **values))
+            return
+        changed = [name for name, value in values.items() if getattr(program, name) != value]
+        if changed:
+            for name in changed:
+                setattr(program, name, values[name])
+            self.changed_programs.append(program)
+            self.changed_fields.update(changed)
+        else:
+            self.unchanged_programs += 1
+
+    def diff_budgets(self, stored, program_id, budgets):
+        for (term, year), cost in budgets.items():
+            budget = stored.pop((term, year), None)
+            if budget is None:
+                self.new_budgets.append(
+                    BudgetInfo(program_id=program_id, term=term, year=year, total_estimated_cost=cost)
+                )
+            elif budget.total_estimated_cost != cost:
+                budget.total_estimated_cost = cost
+                self.changed_budgets.append(budget)
+        self.removed_budgets.extend(budget.id for budget in stored.values())
+
+    def diff_sections(self, stored, program_id, sections):
+        for order, (title, digest) in sections.items():
+            section = stored.pop(order, None)
+            if section is None:
+                self.new_sections.append(ProgramSection(program_id=program_id, title=title, body_id=digest, order=order))
+            elif (section.title, section.body_id) != (title, digest):
+                section.title, section.body_id = title, digest
+                self.changed_sections.append(section)
+        self.removed_sections.extend(section.id for section in stored.values())
+
+    def apply(self, batch_size, staging=None):
+        """
+        Write the diff and return the number of rows touched per table. With staging, a
+        programs.staging.StagedCatalog, changed budget entries and sections are written as
+        new rows of the staged version next to the stored ones, and program field changes
+        are kept on staging until the version is activated.
+        """
+        counts = {
+            'programs': {
+                'created': len(self.new_programs), 'updated': len(self.changed_programs),
+                'unchanged': self.unchanged_programs, 'removed': 0,
+            },
+            'budgets': {'created': len(self.new_budgets), 'updated': len(self.changed_budgets), 'deleted': 0},
+            'sections': {'created': len(self.new_sections), 'updated': len(self.changed_sections), 'deleted': 0},
+            'bodies': {'created': len(self.new_bodies), 'deleted': 0},
+        }
+        SectionContent.objects.bulk_create(self.new_bodies, batch_size=batch_size, ignore_conflicts=True)
+        if staging is not None:
+            self.apply_staged(batch_size, staging, counts)
+            return counts
+
+        Program.all_versions.bulk_create(self.new_programs, batch_size=batch_size)
+        if self.changed_programs:
+            Program.all_versions.bulk_update(self.changed_programs, sorted(self.changed_fields), batch_size=batch_size)
+
+        counts['budgets']['deleted'] = delete_ids(BudgetInfo, self.removed_budgets, batch_size)
+        BudgetInfo.all_versions.bulk_update(self.changed_budgets, ['total_estimated_cost'], batch_size=batch_size)
+        BudgetInfo.all_versions.bulk_create(self.new_budgets, batch_size=batch_size)
+
+        counts['sections']['deleted'] = delete_ids(ProgramSection, self.removed_sections, batch_size)
+        ProgramSection.all_versions.bulk_update(self.changed_sections, ['title', 'body'], batch_size=batch_size)
+        ProgramSection.all_versions.bulk_create(self.new_sections, batch_size=batch_size)
+        return counts
+
+    def apply_staged(self, batch_size, staging, counts):
+        version = staging.version.id
+        staging.changed_programs.extend(self.changed_programs)
+        staging.changed_fields.update(self.changed_fields)
+        for program in self.new_programs:
+            program.added_in = version
+        Program.all_versions.bulk_create(self.new_programs, batch_size=batch_size)
+
+        # Stored rows are retired before their replacements are added, so at most one row per budget term is current
+        for model, removed, changed, new, table in [
+            (BudgetInfo, self.removed_budgets, self.changed_budgets, self.new_budgets, 'budgets'),
+            (ProgramSection, self.removed_sections, self.changed_sections, self.new_sections, 'sections'),
+        ]:
+            counts[table]['deleted'] = retire_ids(model, removed, version, batch_size)
+            retire_ids(model, [row.id for row in changed], version, batch_size)
+            for row in new:
+                row.added_in = version
+            model.all_versions.bulk_create(new + [replacement(row, version) for row in changed], batch_size=batch_size)
+
+    @property
+    def has_changes(self):
+        return any([
+            self.new_programs, self.changed_programs,
+            self.new_budgets, self.changed_budgets, self.removed_budgets,
+            self.new_sections, self.changed_sections, self.removed_sections, self.new_bodies,
+        ])
+
+
+def remove_programs(program_ids, batch_size):
+    """
+    Delete programs together with their favorites and reviews. The Favorite delete signals
+    take the favorites off their owners' profile counts.
+    """
+    removed = 0
+    for batch in batched(program_ids, batch_size):
+        _, deleted = Program.all_versions.filter(program_id__in=batch).delete()
+        removed += deleted.get(Program._meta.label, 0)
+    return removed
+
+
+def referenced_programs(program_ids, batch_size):
+    """The program_ids with favorites, reviews or alumni, which deleting the program would take along"""
+    referenced = set()
+    for batch in batched(program_ids, batch_size):
+        referenced.update(
+            Program.all_versions.filter(program_id__in=batch)
+            .filter(Q(favorited_by__isnull=False) | Q(reviews__isnull=False) | Q(alumni__isnull=False))
+            .values_list('program_id', flat=True).distinct()
+        )
+    return referenced
+
+
+def too_many_removed(removed, stored, max_removed):
+    """The problem with removing removed of stored programs, or None if that is within max_removed"""
+    if stored and removed > max_removed * stored:
+        return f'{removed} of {stored} programs would be removed, more than {max_removed:.0%}'
+    return None
+
+
+def add_counts(total, counts):
+    for table, table_counts in counts.items():
+        for name, count in table_counts.items():
+            total[table][name] += count
+
+
+def read_chunks(records, chunk_size, seen, timings):
+    """Split records into lists of chunk_size (program id, record) pairs, timing the reads"""
+    records = iter(records)
+    while True:
+        start = time.perf_counter()
+        chunk = list(itertools.islice(records, chunk_size))
+        timings['read'] += time.perf_counter() - start
+        if not chunk:
+            return
+        seen.update(program_id for program_id, _ in chunk)
+        yield chunk
+
+
+def load_programs(records, force=False, remove_missing=False, remove_referenced=False, max_removed=MAX_REMOVED_FRACTION,
+                  batch_size=LOAD_BATCH_SIZE, chunk_size=LOAD_CHUNK_SIZE, workers=1, staging=None):
+    """
+    Bring the stored catalog in line with records, a dict of program id -> catalog record
+    or an iterable of (program id, record) pairs such as programs.streaming.read_programs.
+    Records are taken chunk_size at a time and normalized, on workers processes when more
+    than one, while the chunks already normalized are diffed and written here, all inside
+    one transaction.
+    Programs whose record hashes the same as at their last load are skipped unless force
+    is set. Programs missing from records are kept unless remove_missing is set, and even
+    then the ones with favorites, reviews or alumni, which would be deleted along with
+    them, are only listed under 'kept' unless remove_referenced is set too. A load that
+    would remove more than max_removed of the stored programs raises CatalogRejected and
+    is rolled back. A program whose record is invalid is neither written nor deleted.
+    With staging (see programs.staging.refresh_programs) the records are written to a
+    staged catalog version instead, one transaction per chunk, and the programs to remove
+    are only collected on staging.
+    Returns row counts per table, one {'program_id', 'field', 'error'} entry per problem
+    found in the records, and the time spent reading, normalizing, diffing and writing.
+    """
+    if isinstance(records, dict):
+        records = records.items()
+    report = {
+        'programs': dict.fromkeys(['created', 'updated', 'unchanged', 'removed'], 0),
+        'budgets': dict.fromkeys(['created', 'updated', 'deleted'], 0),
+        'sections': dict.fromkeys(['created', 'updated', 'deleted'], 0),
+        'bodies': dict.fromkeys(['created', 'deleted'], 0),
+        'errors': [],
+        'kept': [],
+    }
+    timings = dict.fromkeys(['read', 'normalize', 'diff', 'write'], 0.0)
+    seen = set()
+    changed = False
+
+    chunks = read_chunks(records, chunk_size, seen, timings)
+    normalized = normalize_chunks(chunks, workers=workers, limits=field_limits())
+    # A staged load is invisible until activated, so it commits chunk by chunk instead of holding one long transaction
+    outer, per_chunk = (transaction.atomic, contextlib.nullcontext) if staging is None else (
+        contextlib.nullcontext, transaction.atomic
+    )
+    with outer(), contextlib.closing(normalized):
+        while True:
+            start = time.perf_counter()
+            read_before = timings['read']
+            chunk, errors = next(normalized, (None, None))
+            diffed = time.perf_counter()
+            # Time spent waiting on the normalization stage, apart from reading the file
+            timings['normalize'] += diffed - start - (timings['read'] - read_before)
+            if chunk is None:
+                break
+            report['errors'].extend(errors)
+            diff = CatalogDiff.compute(chunk, force=force, batch_size=batch_size)
+            written = time.perf_counter()
+            timings['diff'] += written - diffed
+            with per_chunk():
+                add_counts(report, diff.apply(batch_size, staging))
+            changed = changed or diff.has_changes
+            timings['write'] += time.perf_counter() - written
+
+        start = time.perf_counter()
+        if remove_missing:
+            stored = 0
+            missing = []
+            for program_id in Program.all_versions.values_list('program_id', flat=True).iterator():
+                stored += 1
+                if program_id not in seen:
+                    missing.append(program_id)
+            if not remove_referenced:
+                referenced = referenced_programs(missing, batch_size)
+                report['kept'] = sorted(referenced)
+                missing = [program_id for program_id in missing if program_id not in referenced]
+            if staging is not None:
+                # Checked against max_removed by programs.staging.validate before activation
+                staging.missing = missing
+            else:
+                problem = too_many_removed(len(missing), stored, max_removed)
+                if problem:
+                    raise CatalogRejected([problem])
+                report['programs']['removed'] = remove_programs(missing, batch_size)
+                changed = changed or bool(missing)
+        if staging is not None:
+            staging.has_changes = changed or bool(staging.missing)
+        elif changed:
+            # Drop shared section bodies that no program references anymore
+            report['bodies']['deleted'], _ = SectionContent.objects.filter(sections__isnull=True).delete()
+        timings['write'] += time.perf_counter() - start
+    if changed and staging is None:
+        bump_dataset_version()
+    report['timings'] = timings
+    return report
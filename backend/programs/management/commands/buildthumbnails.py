@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from programs.models import Program
+from programs.thumbnails import generate_thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Fetch program images once and store resized WebP/JPEG thumbnails under MEDIA_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--program',
+            action='append',
+            dest='program_ids',
+            help='Only build thumbnails for this program id (can be repeated)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Number of images fetched and resized in parallel (defaults to THUMBNAIL_WORKERS)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild thumbnails even if the image URL has not changed'
+        )
+
+    def handle(self, *args, **options):
+        programs = Program.objects.exclude(img_url='').only('program_id', 'img_url')
+        if options['program_ids']:
+            programs = programs.filter(program_id__in=options['program_ids'])
+
+        report = generate_thumbnails(programs, workers=options['workers'], force=options['force'])
+        write_thumbnail_report(self, report)
+
+
+def write_thumbnail_report(command, report):
+    """Print the summary returned by generate_thumbnails"""
+    for program_id, error in report['errors'].items():
+        command.stdout.write(
+            command.style.ERROR(f'Error building thumbnails for program {program_id}: {error}')
+        )
+    command.stdout.write(
+        command.style.SUCCESS(
+            f'\nThumbnails - Created: {report["created"]}, '
+            f'Unchanged: {report["skipped"]}, Failed: {report["failed"]}'
+        )
+    )
@@ -5,7 +5,12 @@ import json
 import os
 from django.core.management.base import BaseCommand
 from django.conf import settings
-from programs.models import Program, BudgetInfo, ProgramSection
+from programs.loading import load_programs, CatalogRejected, LOAD_CHUNK_SIZE, MAX_REMOVED_FRACTION
+from programs.models import Program
+from programs.staging import RefreshInProgress, discard_staged, refresh_programs, staging_version, KEEP_VERSIONS
+from programs.streaming import read_programs
+from programs.thumbnails import generate_thumbnails
+from .buildthumbnails import write_thumbnail_report
 
 
 class Command(BaseCommand):
@@ -16,7 +21,68 @@ class Command(BaseCommand):
             '--file',
             type=str,
             default='programs/data.json',
-            help='Path to the JSON file containing program data'
+            help='Path to the program data, as one JSON object or as JSON Lines (.jsonl)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=LOAD_CHUNK_SIZE,
+            help='Number of programs read and written at a time'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of processes validating and normalizing programs; the default, 1, normalizes '
+                 'in this process, which is fastest for a catalog of a few hundred programs'
+        )
+        parser.add_argument(
+            '--error-report',
+            type=str,
+            help='Write the problems found in the file to this path as JSON'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Diff every program against the database, even if its record has not changed'
+        )
+        parser.add_argument(
+            '--remove-missing',
+            action='store_true',
+            help='Delete programs that are not in the file, except ones with favorites, reviews or alumni'
+        )
+        parser.add_argument(
+            '--remove-referenced',
+            action='store_true',
+            help='With --remove-missing, also delete missing programs with favorites, reviews or alumni, and those with them'
+        )
+        parser.add_argument(
+            '--staged',
+            action='store_true',
+            help='Load into a staged catalog version and switch readers to it once it is complete and valid'
+        )
+        parser.add_argument(
+            '--max-removed',
+            type=float,
+            default=MAX_REMOVED_FRACTION,
+            help='With --remove-missing, refuse the file if it would remove more than this share of the programs'
+        )
+        parser.add_argument(
+            '--keep-versions',
+            type=int,
+            default=KEEP_VERSIONS,
+            help='With --staged, number of previous catalog versions kept for requests still reading them'
+        )
+        parser.add_argument(
+            '--discard-staged',
+            action='store_true',
+            help='First undo a staged load left behind by an interrupted loadprograms --staged; '
+                 'only safe while none is running'
+        )
+        parser.add_argument(
+            '--thumbnails',
+            action='store_true',
+            help='Also fetch program images and build their thumbnails'
         )
     
     def handle(self, *args, **options):
@@ -33,117 +99,99 @@ class Command(BaseCommand):
             )
             return
         
-        # Load JSON data
+        # Records are read from the file while they are loaded; a broken file rolls the whole load back
+        load_options = {
+            'force': options['force'],
+            'remove_missing': options['remove_missing'],
+            'remove_referenced': options['remove_referenced'],
+            'chunk_size': options['chunk_size'],
+            'workers': options['workers'],
+        }
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                programs_data = json.load(file)
+            if options['discard_staged']:
+                discard_staged()
+            if options['staged']:
+                report = refresh_programs(
+                    read_programs(file_path),
+                    max_removed=options['max_removed'],
+                    keep=options['keep_versions'],
+                    **load_options,
+                )
+            else:
+                # The rows of a staged load would be taken for current ones
+                staged = staging_version()
+                if staged is not None:
+                    raise RefreshInProgress(staged)
+                report = load_programs(read_programs(file_path), max_removed=options['max_removed'], **load_options)
+        except RefreshInProgress as e:
+            self.stdout.write(
+                self.style.ERROR(
+                    f'{e}, by a loadprograms --staged that is running or was interrupted. '
+                    f'Once none is running, --discard-staged undoes it.'
+                )
+            )
+            return
+        except CatalogRejected as e:
+            self.stdout.write(
+                self.style.ERROR(f'{"Staged catalog" if options["staged"] else "Catalog"} rejected: {e}')
+            )
+            return
         except json.JSONDecodeError as e:
             self.stdout.write(
                 self.style.ERROR(f'Invalid JSON file: {e}')
             )
             return
-        except Exception as e:
+        except (OSError, UnicodeDecodeError, KeyError) as e:
             self.stdout.write(
                 self.style.ERROR(f'Error reading file: {e}')
             )
             return
-        
-        created_programs = 0
-        updated_programs = 0
-        created_budgets = 0
-        created_sections = 0
-        
-        # Process each program
-        for program_id, data in programs_data.items():
-            try:
-                # Extract program details
-                details = data.get('program_details', {})
-                
-                # Create or update the program
-                program, created = Program.objects.update_or_create(
-                    program_id=program_id,
-                    defaults={
-                        'name': details.get('name', ''),
-                        'academic_calendar': details.get('academic_calendar', ''),
-                        'program_type': details.get('program_type', ''),
-                        'minimum_gpa': details.get('minimum_gpa', ''),
-                        'language_prerequisite': details.get('language_prerequisite', ''),
-                        'additional_prerequisites': details.get('additional_prerequisites', ''),
-                        'housing': details.get('housing', ''),
-                        'main_page_url': data.get('main_page_url', ''),
-                        'homepage_url': data.get('homepage_url', ''),
-                        'budget_page_url': data.get('budget_page_url', ''),
-                        'img_url': data.get('img_url', ''),
-                        'latitude': details.get('latitude', 0.0),
-                        'longitude': details.get('longitude', 0.0),
-                        'continent': details.get('continent', '')
-                    }
-                )
-                
-                if created:
-                    created_programs += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(f'Created program: {program.name}')
-                    )
-                else:
-                    updated_programs += 1
-                    self.stdout.write(
-                        self.style.WARNING(f'Updated program: {program.name}')
-                    )
-                
-                # Process budget info
-                budget_info = data.get('budget_info', {})
-                program.budget_info.all().delete()
-
-                if isinstance(budget_info, dict) and 'total_estimated_cost' in budget_info and isinstance(budget_info['total_estimated_cost'], str):
-                    # Single, simple cost with no term/year
-                    BudgetInfo.objects.create(
-                        program=program,
-                        term=budget_info.get('term', ''),     # optional/blank
-                        year=int(budget_info.get('year', 0) or 0),
-                        total_estimated_cost=budget_info['total_estimated_cost']
-                    )
-                    created_budgets += 1
-                else:
-                    # Expected structured dict(s)
-                    for _, budget_data in budget_info.items():
-                        BudgetInfo.objects.create(
-                            program=program,
-                            term=budget_data.get('term', ''),
-                            year=int(budget_data.get('year', 0) or 0),
-                            total_estimated_cost=budget_data.get('total_estimated_cost', '')
-                        )
-                        created_budgets += 1
 
-                
-                # Process sections
-                sections = data.get('sections', [])
-                # Clear existing sections for this program
-                program.sections.all().delete()
-                
-                for index, section in enumerate(sections):
-                    ProgramSection.objects.create(
-                        program=program,
-                        title=section.get('title', ''),
-                        content=section.get('content', []),
-                        order=index
-                    )
-                    created_sections += 1
-                    
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(
-                        f'Error processing program {program_id}: {str(e)}'
-                    )
+        for error in report['errors']:
+            self.stdout.write(
+                self.style.ERROR(f'Error processing program {error["program_id"]}: {error["field"]}: {error["error"]}')
+            )
+        if report['kept']:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'Kept {len(report["kept"])} programs missing from the file because they have favorites, '
+                    f'reviews or alumni (--remove-referenced deletes them): {", ".join(report["kept"])}'
                 )
-                continue
-        
+            )
+        if options['error_report']:
+            with open(options['error_report'], 'w', encoding='utf-8') as file:
+                json.dump(report['errors'], file, indent=4)
+
         # Print summary
+        programs, budgets, sections = report['programs'], report['budgets'], report['sections']
+        timings = report['timings']
         self.stdout.write(
             self.style.SUCCESS(
                 f'\nCompleted!'
-                f'\n  Programs - Created: {created_programs}, Updated: {updated_programs}'
-                f'\n  Budget entries created: {created_budgets}'
-                f'\n  Section entries created: {created_sections}'
+                f'\n  Programs - Created: {programs["created"]}, Updated: {programs["updated"]}, '
+                f'Unchanged: {programs["unchanged"]}, Removed: {programs["removed"]}'
+                f'\n  Budget entries - Created: {budgets["created"]}, Updated: {budgets["updated"]}, '
+                f'Deleted: {budgets["deleted"]}'
+                f'\n  Section entries - Created: {sections["created"]}, Updated: {sections["updated"]}, '
+                f'Deleted: {sections["deleted"]}'
+                f'\n  Section bodies - Created: {report["bodies"]["created"]}, '
+                f'Unused removed: {report["bodies"]["deleted"]}'
+                f'\n  Skipped invalid programs: {len({error["program_id"] for error in report["errors"]})}'
+                f'\n  Time - Read file: {timings["read"] * 1000:.0f} ms, '
+                f'Normalize: {timings["normalize"] * 1000:.0f} ms, Diff: {timings["diff"] * 1000:.0f} ms, '
+                f'Write: {timings["write"] * 1000:.0f} ms'
             )
-        )
\ No newline at end of file
+        )
+
+        if options['staged']:
+            collected = report['collected']
+            self.stdout.write(
+                f'  Active catalog version: {report["version"]}'
+                f'\n  Collected from old versions - Budget entries: {collected["budgets"]}, '
+                f'Sections: {collected["sections"]}, Versions: {collected["versions"]}, '
+                f'Section bodies: {collected["bodies"]}'
+            )
+
+        if options['thumbnails']:
+            programs = Program.objects.exclude(img_url='').only('program_id', 'img_url')
+            write_thumbnail_report(self, generate_thumbnails(programs))
\ No newline at end of file
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from programs.loading import LOAD_BATCH_SIZE
+from programs.staging import collect_versions, discard_staged, KEEP_VERSIONS
+
+
+class Command(BaseCommand):
+    help = 'Delete catalog rows only old catalog versions can see, in small batches, and undo abandoned staged loads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep',
+            type=int,
+            default=KEEP_VERSIONS,
+            help='Number of previous catalog versions to keep'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=LOAD_BATCH_SIZE,
+            help='Number of rows deleted per transaction'
+        )
+        parser.add_argument(
+            '--discard-staged',
+            action='store_true',
+            help='Also undo staged versions; only safe while no loadprograms --staged is running'
+        )
+
+    def handle(self, *args, **options):
+        discarded = discard_staged(options['batch_size']) if options['discard_staged'] else 0
+        collected = collect_versions(options['keep'], options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Staged versions discarded: {discarded}, Retired versions deleted: {collected["versions"]}'
+                f'\n  Budget entries: {collected["budgets"]}, Sections: {collected["sections"]}, '
+                f'Section bodies: {collected["bodies"]}'
+            )
+        )
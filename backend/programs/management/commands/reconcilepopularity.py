@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from programs.popularity import reconcile_popularity
+
+
+class Command(BaseCommand):
+    help = 'Rebuild program favorite counts and daily favorite buckets from the stored favorites'
+
+    def handle(self, *args, **options):
+        report = reconcile_popularity()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Popularity counters reconciled - Programs fixed: {report["programs"]}, '
+                f'Buckets fixed: {report["buckets"]}'
+            )
+        )
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.24 on 2026-10-19 12:00
+
+import hashlib
+import json
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def digest(content):
+    encoded = json.dumps(content, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def move_content_to_bodies(apps, schema_editor):
+    SectionContent = apps.get_model('programs', 'SectionContent')
+    ProgramSection = apps.get_model('programs', 'ProgramSection')
+
+    for section in ProgramSection.objects.all().iterator():
+        section_hash = digest(section.content)
+        SectionContent.objects.get_or_create(hash=section_hash, defaults={'content': section.content})
+        section.body_id = section_hash
+        section.save(update_fields=['body'])
+
+
+def move_bodies_to_content(apps, schema_editor):
+    ProgramSection = apps.get_model('programs', 'ProgramSection')
+
+    for section in ProgramSection.objects.select_related('body').iterator():
+        section.content = section.body.content
+        section.save(update_fields=['content'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programs', '0004_review'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SectionContent',
+            fields=[
+                ('hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('content', models.JSONField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='programsection',
+            name='body',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='sections', to='programs.sectioncontent'),
+        ),
+        migrations.AlterField(
+            model_name='programsection',
+            name='content',
+            field=models.JSONField(null=True),
+        ),
+        migrations.RunPython(move_content_to_bodies, move_bodies_to_content),
+        migrations.RemoveField(
+            model_name='programsection',
+            name='content',
+        ),
+        migrations.AlterField(
+            model_name='programsection',
+            name='body',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='sections', to='programs.sectioncontent'),
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 4.2.24 on 2026-10-19 17:00
+
+from django.db import migrations, models
+import programs.fields
+
+# (model, field) pairs that move to compressed storage
+COMPRESSED_COLUMNS = [
+    ('Program', 'additional_prerequisites'),
+    ('Program', 'housing'),
+    ('SectionContent', 'content'),
+    ('Review', 'text'),
+]
+
+
+def copy_columns(source_suffix, target_suffix):
+    def copy(apps, schema_editor):
+        for model_name in {model_name for model_name, _ in COMPRESSED_COLUMNS}:
+            model = apps.get_model('programs', model_name)
+            fields = [field for name, field in COMPRESSED_COLUMNS if name == model_name]
+            targets = [field + target_suffix for field in fields]
+            for obj in model.objects.only(*[field + source_suffix for field in fields]).iterator():
+                for field in fields:
+                    setattr(obj, field + target_suffix, getattr(obj, field + source_suffix))
+                obj.save(update_fields=targets)
+    return copy
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programs', '0005_sectioncontent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='program',
+            name='additional_prerequisites_compressed',
+            field=programs.fields.CompressedTextField(blank=True, default=''),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='program',
+            name='housing_compressed',
+            field=programs.fields.CompressedTextField(blank=True, default=''),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='sectioncontent',
+            name='content_compressed',
+            field=programs.fields.CompressedJSONField(default=list),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='text_compressed',
+            field=programs.fields.CompressedTextField(default=''),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='sectioncontent',
+            name='content',
+            field=models.JSONField(null=True),
+        ),
+        migrations.RunPython(copy_columns('', '_compressed'), copy_columns('_compressed', '')),
+        migrations.RemoveField(
+            model_name='program',
+            name='additional_prerequisites',
+        ),
+        migrations.RemoveField(
+            model_name='program',
+            name='housing',
+        ),
+        migrations.RemoveField(
+            model_name='sectioncontent',
+            name='content',
+        ),
+        migrations.RemoveField(
+            model_name='review',
+            name='text',
+        ),
+        migrations.RenameField(
+            model_name='program',
+            old_name='additional_prerequisites_compressed',
+            new_name='additional_prerequisites',
+        ),
+        migrations.RenameField(
+            model_name='program',
+            old_name='housing_compressed',
+            new_name='housing',
+        ),
+        migrations.RenameField(
+            model_name='sectioncontent',
+            old_name='content_compressed',
+            new_name='content',
+        ),
+        migrations.RenameField(
+            model_name='review',
+            old_name='text_compressed',
+            new_name='text',
+        ),
+    ]
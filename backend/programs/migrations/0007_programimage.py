@@ -0,0 +1,24 @@
+# Generated by Django 4.2.24 on 2026-10-19 17:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programs', '0006_compressed_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgramImage',
+            fields=[
+                ('program', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='image', serialize=False, to='programs.program')),
+                ('source_url', models.URLField()),
+                ('source_hash', models.CharField(max_length=64)),
+                ('variants', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.24 on 2026-10-19 17:14
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def count_existing_favorites(apps, schema_editor):
+    Favorite = apps.get_model('accounts', 'Favorite')
+    Program = apps.get_model('programs', 'Program')
+    FavoriteBucket = apps.get_model('programs', 'FavoriteBucket')
+
+    totals = Favorite.objects.values('program_id').annotate(favorites=Count('id'))
+    for row in totals:
+        Program.objects.filter(program_id=row['program_id']).update(favorite_count=row['favorites'])
+
+    days = Favorite.objects.annotate(day=TruncDate('created_at')).values('program_id', 'day').annotate(favorites=Count('id'))
+    FavoriteBucket.objects.bulk_create(
+        [FavoriteBucket(program_id=row['program_id'], day=row['day'], count=row['favorites']) for row in days],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alumni'),
+        ('programs', '0007_programimage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='program',
+            name='favorite_count',
+            field=models.IntegerField(db_index=True, default=0),
+        ),
+        migrations.CreateModel(
+            name='FavoriteBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(db_index=True)),
+                ('count', models.IntegerField(default=0)),
+                ('program', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='favorite_buckets', to='programs.program')),
+            ],
+            options={
+                'unique_together': {('program', 'day')},
+            },
+        ),
+        migrations.RunPython(count_existing_favorites, migrations.RunPython.noop),
+    ]
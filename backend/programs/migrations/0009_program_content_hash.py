@@ -0,0 +1,18 @@
+# Generated by Django 4.2.24 on 2026-10-19 17:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programs', '0008_popularity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='program',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.24 on 2026-10-19 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programs', '0009_program_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(choices=[('staging', 'Staging'), ('active', 'Active'), ('retired', 'Retired')], db_index=True, default='staging', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('activated_at', models.DateTimeField(blank=True, null=True)),
+                ('retired_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='budgetinfo',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='budgetinfo',
+            name='added_in',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='budgetinfo',
+            name='removed_in',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='program',
+            name='added_in',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='programsection',
+            name='added_in',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='programsection',
+            name='removed_in',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='budgetinfo',
+            constraint=models.UniqueConstraint(condition=models.Q(('removed_in__isnull', True)), fields=('program', 'term', 'year'), name='unique_current_budget'),
+        ),
+        migrations.AddConstraint(
+            model_name='catalogversion',
+            constraint=models.UniqueConstraint(condition=models.Q(('state', 'active')), fields=('state',), name='single_active_catalog_version'),
+        ),
+    ]
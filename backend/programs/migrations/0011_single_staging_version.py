@@ -0,0 +1,17 @@
+# Generated by Django 4.2.24 on 2026-10-19 18:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programs', '0010_catalog_versions'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='catalogversion',
+            constraint=models.UniqueConstraint(condition=models.Q(('state', 'staging')), fields=('state',), name='single_staging_catalog_version'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.24 on 2026-10-19 19:01
+
+from django.db import migrations, models
+
+
+def clear_unresolved_locations(apps, schema_editor):
+    # Programs loaded without a location were stored at 0, 0, which no program is at
+    Program = apps.get_model('programs', 'Program')
+    Program.objects.filter(latitude=0, longitude=0).update(latitude=None, longitude=None)
+
+
+def zero_unresolved_locations(apps, schema_editor):
+    Program = apps.get_model('programs', 'Program')
+    Program.objects.filter(latitude__isnull=True).update(latitude=0, longitude=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programs', '0011_single_staging_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='program',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='program',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(clear_unresolved_locations, zero_unresolved_locations),
+    ]
@@ -2,6 +2,55 @@
 # Total time: 15 mins 
 
 from django.db import models
+from django.db.models import Q, Subquery
+from django.db.models.functions import Coalesce
+from .fields import CompressedTextField, CompressedJSONField
+from .normalize import content_digest
+
+# Section bodies are immutable per hash, so one in-memory copy can serve every program
+SECTION_BODY_CACHE_SIZE = 4096
+_section_body_cache = {}
+_UNSET = object()
+
+
+class CatalogVersion(models.Model):
+    """
+    One staged load of the program catalog, see programs.staging. Rows added by a staged
+    load stay hidden until its version becomes the active one, and rows it replaced stay
+    visible until then, so readers only ever see complete versions.
+    """
+    STAGING = 'staging'
+    ACTIVE = 'active'
+    RETIRED = 'retired'
+    STATES = [(STAGING, 'Staging'), (ACTIVE, 'Active'), (RETIRED, 'Retired')]
+
+    state = models.CharField(max_length=10, choices=STATES, default=STAGING, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    activated_at = models.DateTimeField(null=True, blank=True)
+    retired_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['state'], condition=Q(state='active'), name='single_active_catalog_version'),
+            # Only one refresh stages a version at a time, see programs.staging
+            models.UniqueConstraint(fields=['state'], condition=Q(state='staging'), name='single_staging_catalog_version'),
+        ]
+
+    def __str__(self):
+        return f"Catalog version {self.id} ({self.state})"
+
+
+def active_catalog_version():
+    """Id of the active catalog version (0 before the first staged load), as a subquery of the calling statement"""
+    return Coalesce(Subquery(CatalogVersion.objects.filter(state=CatalogVersion.ACTIVE).values('id')[:1]), 0)
+
+
+class CatalogManager(models.Manager):
+    """Rows of the active catalog version; all_versions also returns staged and replaced rows"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(self.model.visible_in(active_catalog_version()))
+
 
 class Program(models.Model):
     program_id = models.CharField(max_length=20, unique=True, primary_key=True)
@@ -10,38 +59,108 @@ class Program(models.Model):
     program_type = models.CharField(max_length=100, blank=True)
     minimum_gpa = models.CharField(max_length=10, blank=True)
     language_prerequisite = models.CharField(max_length=50, blank=True)
-    additional_prerequisites = models.TextField(blank=True)
-    housing = models.TextField(blank=True)
+    additional_prerequisites = CompressedTextField(blank=True)
+    housing = CompressedTextField(blank=True)
     main_page_url = models.URLField(blank=True)
     homepage_url = models.URLField(blank=True)
     img_url = models.URLField(blank=True)
     budget_page_url = models.URLField(blank=True)
-    latitude = models.FloatField()
-    longitude = models.FloatField()
+    # Null for programs whose location could not be resolved (see programs.fixing); the map leaves them out
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
     continent = models.TextField(blank=True)
+    favorite_count = models.IntegerField(default=0, db_index=True)  # Kept in step by programs.popularity
+    content_hash = models.CharField(max_length=64, blank=True)  # Hash of the catalog record last loaded, see programs.loading
+    added_in = models.PositiveIntegerField(default=0)  # Catalog version that added the program
+
+    objects = CatalogManager()
+    all_versions = models.Manager()
     
     def __str__(self):
         return self.name
 
+    @staticmethod
+    def visible_in(version):
+        # Field changes are applied when a version is activated, so only new programs wait for theirs
+        return Q(added_in__lte=version)
+
+
+class CatalogRow(models.Model):
+    """A budget entry or section, visible from the catalog version that added it until the one that replaced it"""
+    added_in = models.PositiveIntegerField(default=0)
+    removed_in = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+
+    objects = CatalogManager()
+    all_versions = models.Manager()
 
-class BudgetInfo(models.Model):
+    class Meta:
+        abstract = True
+
+    @staticmethod
+    def visible_in(version):
+        return Q(added_in__lte=version) & (Q(removed_in__isnull=True) | Q(removed_in__gt=version))
+
+
+class BudgetInfo(CatalogRow):
     program = models.ForeignKey(Program, related_name='budget_info', on_delete=models.CASCADE)
     term = models.CharField(max_length=50)
     year = models.IntegerField()
     total_estimated_cost = models.CharField(max_length=50)
     
     class Meta:
-        unique_together = ['program', 'term', 'year']
+        # A staged load keeps the replaced entry next to its successor until the old version is collected
+        constraints = [
+            models.UniqueConstraint(
+                fields=['program', 'term', 'year'], condition=Q(removed_in__isnull=True), name='unique_current_budget',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.program.name} - {self.term} {self.year}"
 
 
-class ProgramSection(models.Model):
+class SectionContent(models.Model):
+    """A section body stored once and shared by every section with the same content"""
+    hash = models.CharField(max_length=64, primary_key=True)
+    content = CompressedJSONField()  # Store as JSON array
+
+    def __str__(self):
+        return self.hash
+
+    @staticmethod
+    def digest(content):
+        """Hash of the canonical JSON encoding of a section body"""
+        return content_digest(content)
+
+    @classmethod
+    def store(cls, content):
+        """Save a body if it is new and return its hash"""
+        digest = cls.digest(content)
+        cls.objects.get_or_create(hash=digest, defaults={'content': content})
+        cls.remember(digest, content)
+        return digest
+
+    @classmethod
+    def load(cls, digest):
+        """Return the body for a hash, reading it from the database at most once"""
+        if digest not in _section_body_cache:
+            cls.remember(digest, cls.objects.get(hash=digest).content)
+        return _section_body_cache[digest]
+
+    @staticmethod
+    def remember(digest, content):
+        if len(_section_body_cache) >= SECTION_BODY_CACHE_SIZE:
+            _section_body_cache.clear()
+        _section_body_cache.setdefault(digest, content)
+
+
+class ProgramSection(CatalogRow):
     program = models.ForeignKey(Program, related_name='sections', on_delete=models.CASCADE)
     title = models.CharField(max_length=255)
-    content = models.JSONField()  # Store as JSON array
+    body = models.ForeignKey(SectionContent, related_name='sections', on_delete=models.PROTECT)
     order = models.IntegerField(default=0)
+
+    _pending_content = _UNSET
     
     class Meta:
         ordering = ['order']
@@ -49,11 +168,61 @@ class ProgramSection(models.Model):
     def __str__(self):
         return f"{self.program.name} - {self.title}"
 
+    @property
+    def content_hash(self):
+        return self.body_id
+
+    @property
+    def content(self):
+        """Section body, shared with every other section that has the same content"""
+        if self._pending_content is not _UNSET:
+            return self._pending_content
+        if self.body_id is None:
+            return None
+        if ProgramSection.body.is_cached(self):
+            SectionContent.remember(self.body_id, self.body.content)
+        return SectionContent.load(self.body_id)
+
+    @content.setter
+    def content(self, value):
+        self._pending_content = value
+
+    def save(self, *args, **kwargs):
+        if self._pending_content is not _UNSET:
+            self.body_id = SectionContent.store(self._pending_content)
+            del self._pending_content
+        super().save(*args, **kwargs)
+
+
+class ProgramImage(models.Model):
+    """Local thumbnails generated from a program's img_url"""
+    program = models.OneToOneField(Program, related_name='image', on_delete=models.CASCADE, primary_key=True)
+    source_url = models.URLField()
+    source_hash = models.CharField(max_length=64)
+    variants = models.JSONField(default=dict)  # variant -> width, height and a file per format
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.program_id} - {self.source_hash[:12]}"
+
+
+class FavoriteBucket(models.Model):
+    """Favorites a program gained on one day that have not been removed since"""
+    program = models.ForeignKey(Program, related_name='favorite_buckets', on_delete=models.CASCADE)
+    day = models.DateField(db_index=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['program', 'day']
+
+    def __str__(self):
+        return f"{self.program_id} - {self.day}: {self.count}"
+
 
 class Review(models.Model):
     program = models.ForeignKey(Program, related_name='reviews', on_delete=models.CASCADE)
     alumni = models.ForeignKey('accounts.Alumni', related_name='reviews', on_delete=models.CASCADE)
-    text = models.TextField()
+    text = CompressedTextField()
     rating = models.IntegerField()
     date = models.DateTimeField(auto_now_add=True)
 
@@ -0,0 +1,217 @@
+"""
+Validation and normalization stage of the catalog loader.
+
+Raw catalog records are checked and turned into ProgramRecord objects holding typed
+model values, budget entries and sections with their body hashes. Records that fail
+are reported field by field instead of being written. The work is plain Python with
+no database access, so chunks of records can be spread over a process pool while the
+loader writes the chunks that are already done. This module must not import models,
+so that pool workers started with the spawn method never need Django set up.
+"""
+import collections
+import functools
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+# Bump when the values normalize_record produces for a record change, so the next load
+# rewrites programs whose raw record is the same as at their last load
+NORMALIZE_VERSION = 2
+
+# Program field -> (source, key, default), where source is the record's program_details or the record itself
+PROGRAM_FIELDS = {
+    'name': ('details', 'name', ''),
+    'academic_calendar': ('details', 'academic_calendar', ''),
+    'program_type': ('details', 'program_type', ''),
+    'minimum_gpa': ('details', 'minimum_gpa', ''),
+    'language_prerequisite': ('details', 'language_prerequisite', ''),
+    'additional_prerequisites': ('details', 'additional_prerequisites', ''),
+    'housing': ('details', 'housing', ''),
+    'main_page_url': ('record', 'main_page_url', ''),
+    'homepage_url': ('record', 'homepage_url', ''),
+    'budget_page_url': ('record', 'budget_page_url', ''),
+    'img_url': ('record', 'img_url', ''),
+    'latitude': ('details', 'latitude', None),
+    'longitude': ('details', 'longitude', None),
+    'continent': ('details', 'continent', ''),
+}
+URL_FIELDS = ('main_page_url', 'homepage_url', 'budget_page_url', 'img_url')
+COORDINATE_RANGES = {'latitude': 90, 'longitude': 180}
+
+
+def content_digest(content):
+    """Hash of the canonical JSON encoding of a record or section body"""
+    encoded = json.dumps(content, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def record_digest(data):
+    """Hash of a raw record together with the normalization rules applied to it"""
+    return content_digest({'normalize_version': NORMALIZE_VERSION, 'record': data})
+
+
+class ProgramRecord:
+    """A validated catalog record, ready to be diffed against the database"""
+    __slots__ = ('program_id', 'digest', 'values', 'budgets', 'sections', 'bodies')
+
+    def __init__(self, program_id, digest, values, budgets, sections, bodies):
+        self.program_id = program_id
+        self.digest = digest  # record_digest of the raw record, stored as Program.content_hash
+        self.values = values  # Program field -> value
+        self.budgets = budgets  # (term, year) -> total estimated cost
+        self.sections = sections  # order -> (title, body hash)
+        self.bodies = bodies  # body hash -> section content
+
+
+class RecordErrors:
+    """Collects the problems found in one record"""
+
+    def __init__(self, program_id):
+        self.program_id = program_id
+        self.errors = []
+
+    def add(self, field, message):
+        self.errors.append({'program_id': self.program_id, 'field': field, 'error': message})
+
+    def text(self, field, value, limit=None):
+        """value as a string, or '' for a missing value"""
+        if value is None:
+            return ''
+        if isinstance(value, (dict, list, bool)):
+            self.add(field, f'Expected text, got {type(value).__name__}')
+            return ''
+        value = str(value)
+        if limit is not None and len(value) > limit:
+            self.add(field, f'Longer than {limit} characters')
+        return value
+
+
+def program_values(data, errors, limits):
+    details = data.get('program_details', {})
+    if not isinstance(details, dict):
+        errors.add('program_details', 'Expected an object')
+        details = {}
+    sources = {'details': details, 'record': data}
+    values = {}
+    for name, (source, key, default) in PROGRAM_FIELDS.items():
+        value = sources[source].get(key, default)
+        if name in COORDINATE_RANGES:
+            if value is None:
+                # An unresolved location stays unknown rather than becoming 0, 0
+                values[name] = None
+                continue
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                errors.add(name, f'Expected a number, got {value!r}')
+                continue
+            if not -COORDINATE_RANGES[name] <= value <= COORDINATE_RANGES[name]:
+                errors.add(name, f'Must be between -{COORDINATE_RANGES[name]} and {COORDINATE_RANGES[name]}')
+        else:
+            value = errors.text(name, value, limits.get(name))
+            if name in URL_FIELDS and value and not value.startswith(('http://', 'https://')):
+                errors.add(name, 'Expected an http(s) URL')
+        values[name] = value
+    if 'latitude' in values and 'longitude' in values and (values['latitude'] is None) != (values['longitude'] is None):
+        errors.add('latitude' if values['latitude'] is None else 'longitude', 'Missing while the other coordinate is set')
+    if not values.get('name', '').strip():
+        errors.add('name', 'Missing program name')
+    return values
+
+
+def budget_values(data, errors, limits):
+    budget_info = data.get('budget_info') or {}
+    if isinstance(budget_info, dict) and isinstance(budget_info.get('total_estimated_cost'), str):
+        # Single, simple cost with no term/year
+        budget_info = {'': budget_info}
+    if not isinstance(budget_info, dict):
+        errors.add('budget_info', 'Expected an object')
+        return {}
+    budgets = {}
+    for key, budget_data in budget_info.items():
+        field = f'budget_info.{key}' if key else 'budget_info'
+        if not isinstance(budget_data, dict):
+            errors.add(field, 'Expected an object')
+            continue
+        try:
+            year = int(budget_data.get('year', 0) or 0)
+        except (TypeError, ValueError):
+            errors.add(f'{field}.year', f'Expected a year, got {budget_data.get("year")!r}')
+            continue
+        term = errors.text(f'{field}.term', budget_data.get('term', ''), limits.get('budget.term'))
+        cost = errors.text(
+            f'{field}.total_estimated_cost', budget_data.get('total_estimated_cost', ''),
+            limits.get('budget.total_estimated_cost'),
+        )
+        budgets[(term, year)] = cost
+    return budgets
+
+
+def section_values(data, errors, limits):
+    sections, bodies = {}, {}
+    raw_sections = data.get('sections') or []
+    if not isinstance(raw_sections, list):
+        errors.add('sections', 'Expected a list')
+        return sections, bodies
+    for index, section in enumerate(raw_sections):
+        field = f'sections.{index}'
+        if not isinstance(section, dict):
+            errors.add(field, 'Expected an object')
+            continue
+        content = section.get('content', [])
+        if not isinstance(content, list) or not all(isinstance(part, str) for part in content):
+            errors.add(f'{field}.content', 'Expected a list of HTML strings')
+            continue
+        title = errors.text(f'{field}.title', section.get('title', ''), limits.get('section.title'))
+        digest = content_digest(content)
+        bodies[digest] = content
+        sections[index] = (title, digest)
+    return sections, bodies
+
+
+def normalize_record(program_id, data, limits=None):
+    """Return (ProgramRecord, []) for a valid record, or (None, errors) for an invalid one"""
+    limits = limits or {}
+    errors = RecordErrors(program_id)
+    if not isinstance(data, dict):
+        errors.add('', 'Expected an object')
+        return None, errors.errors
+    values = program_values(data, errors, limits)
+    budgets = budget_values(data, errors, limits)
+    sections, bodies = section_values(data, errors, limits)
+    if errors.errors:
+        return None, errors.errors
+    return ProgramRecord(program_id, record_digest(data), values, budgets, sections, bodies), []
+
+
+def normalize_chunk(chunk, limits=None):
+    """Normalize a list of (program id, record) pairs into (records, errors)"""
+    records, errors = [], []
+    for program_id, data in chunk:
+        record, record_errors = normalize_record(program_id, data, limits)
+        if record is None:
+            errors.extend(record_errors)
+        else:
+            records.append(record)
+    return records, errors
+
+
+def normalize_chunks(chunks, workers=1, limits=None):
+    """
+    Yield normalize_chunk(chunk) for every chunk, in order. With more than one worker the
+    chunks are normalized in a process pool, with at most two chunks per worker in flight
+    so a large catalog is never read far ahead of the writer.
+    """
+    normalize = functools.partial(normalize_chunk, limits=limits)
+    if workers <= 1:
+        for chunk in chunks:
+            yield normalize(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(pool.submit(normalize, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,132 @@
+"""
+Popularity counters for programs.
+
+Program.favorite_count holds the number of favorites per program and FavoriteBucket
+holds, per day, the favorites a program gained that are still in place. Both are
+changed with UPDATE ... SET count = count + n in the same transaction as the favorite
+writes, by Favorite.add_many and remove_many for bulk changes and by the Favorite
+signals in accounts.signals for every other save or delete, so listing the most
+favorited or trending programs never counts Favorite rows. A favorite that is removed
+is taken off the bucket of the day it was added, which keeps the buckets equal to what
+reconcilepopularity rebuilds from the favorites themselves. Only writes that bypass
+the ORM, such as raw SQL or fixtures loaded with loaddata, need a reconcile.
+"""
+import datetime
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .caching import dataset_cache_key
+from .models import Program, FavoriteBucket
+
+# Window name -> number of daily buckets it covers, None for all time
+POPULAR_WINDOWS = {
+    'all': None,
+    'week': 7,
+    'month': 30,
+}
+POPULAR_CACHE_TIMEOUT = 5 * 60
+
+
+def _change_buckets(day, program_ids, delta):
+    FavoriteBucket.objects.bulk_create(
+        [FavoriteBucket(program_id=program_id, day=day) for program_id in program_ids],
+        ignore_conflicts=True,
+    )
+    FavoriteBucket.objects.filter(day=day, program_id__in=program_ids).update(count=F('count') + delta)
+
+
+def record_favorites_added(program_ids, day=None):
+    """Count one new favorite for each program id; call inside the transaction that adds them"""
+    if not program_ids:
+        return
+    Program.objects.filter(program_id__in=program_ids).update(favorite_count=F('favorite_count') + 1)
+    _change_buckets(day or timezone.localdate(), program_ids, 1)
+
+
+def record_favorites_removed(favorites):
+    """
+    Uncount removed favorites, given as (program_id, created_at) pairs.
+    Call inside the transaction that removes them.
+    """
+    if not favorites:
+        return
+    Program.objects.filter(program_id__in=[program_id for program_id, _ in favorites]).update(
+        favorite_count=F('favorite_count') - 1
+    )
+    by_day = defaultdict(list)
+    for program_id, created_at in favorites:
+        by_day[timezone.localdate(created_at)].append(program_id)
+    for day, program_ids in by_day.items():
+        FavoriteBucket.objects.filter(day=day, program_id__in=program_ids).update(count=F('count') - 1)
+
+
+def popular_program_counts(window='all', limit=10):
+    """Return [(program_id, favorites)] for the most favorited programs in the window"""
+    days = POPULAR_WINDOWS[window]
+    if days is None:
+        rows = Program.objects.filter(favorite_count__gt=0).order_by('-favorite_count', 'program_id')
+        return list(rows.values_list('program_id', 'favorite_count')[:limit])
+
+    since = timezone.localdate() - datetime.timedelta(days=days - 1)
+    rows = (
+        FavoriteBucket.objects.filter(day__gte=since)
+        .values('program_id')
+        .annotate(favorites=Sum('count'))
+        .filter(favorites__gt=0)
+        .order_by('-favorites', 'program_id')
+    )
+    return list(rows.values_list('program_id', 'favorites')[:limit])
+
+
+def popular_cache_key(window, limit):
+    """Cache key for a popular list; it changes with each daily bucket and dataset version"""
+    return dataset_cache_key('popular', window, limit, timezone.localdate().isoformat())
+
+
+def reconcile_popularity():
+    """
+    Recompute every counter from the favorites themselves and fix the ones that drifted,
+    e.g. after favorites were written or deleted with raw SQL or loaded as fixtures.
+    Returns the number of programs and buckets corrected.
+    """
+    from accounts.models import Favorite
+
+    with transaction.atomic():
+        totals = dict(
+            Favorite.objects.values('program_id').annotate(favorites=Count('id')).values_list('program_id', 'favorites')
+        )
+        programs = []
+        for program in Program.objects.only('program_id', 'favorite_count'):
+            favorites = totals.get(program.program_id, 0)
+            if program.favorite_count != favorites:
+                program.favorite_count = favorites
+                programs.append(program)
+        Program.objects.bulk_update(programs, ['favorite_count'], batch_size=500)
+
+        expected = {
+            (program_id, day): favorites
+            for program_id, day, favorites in Favorite.objects.annotate(day=TruncDate('created_at'))
+            .values('program_id', 'day').annotate(favorites=Count('id'))
+            .values_list('program_id', 'day', 'favorites')
+        }
+        changed, stale = [], []
+        for bucket in FavoriteBucket.objects.all():
+            favorites = expected.pop((bucket.program_id, bucket.day), 0)
+            if favorites == 0:
+                stale.append(bucket.id)
+            elif bucket.count != favorites:
+                bucket.count = favorites
+                changed.append(bucket)
+        missing = [
+            FavoriteBucket(program_id=program_id, day=day, count=favorites)
+            for (program_id, day), favorites in expected.items()
+        ]
+        FavoriteBucket.objects.bulk_update(changed, ['count'], batch_size=500)
+        FavoriteBucket.objects.bulk_create(missing, batch_size=500)
+        FavoriteBucket.objects.filter(id__in=stale).delete()
+
+    return {'programs': len(programs), 'buckets': len(changed) + len(missing) + len(stale)}
@@ -1,52 +1,248 @@
 # Names: Ben
 # Total time: 5 hours 
 
-import requests
-from bs4 import BeautifulSoup
-import re
+import argparse
+import collections
+import contextlib
+import hashlib
 import json
-from urllib.parse import parse_qs, urlparse
-import requests
+import os
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import lxml  # noqa: F401  Several times faster than html.parser when it is installed
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+BASE_URL = "https://www.vanderbilt.edu/study-abroad"
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+REQUEST_TIMEOUT = 30
+
+# Crawl defaults: threads, requests in flight per host, and seconds between request starts to one host
+CRAWL_WORKERS = 8
+PER_HOST_LIMIT = 4
+POLITENESS_DELAY = 0.25
+
+# Page cache defaults: seconds before a cached page is fetched in full again, and bytes kept on disk
+CACHE_DIR = Path(__file__).resolve().parent / '.scraper_cache'
+CACHE_TTL = 7 * 24 * 3600
+CACHE_MAX_BYTES = 200 * 1024 * 1024
+# Bump when the output of a parse function changes, so cached parses are redone from the cached pages
+PARSER_VERSION = 2
+
+# The parts of the pages the parse functions read: a program page's title banner and body, and a budget page's main content
+# (the class is matched against the whole attribute value, which may list several classes)
+PROGRAM_PARTS = SoupStrainer(class_=re.compile(r'(^|\s)(topper-default|details-page__body)(\s|$)'))
+BUDGET_PARTS = SoupStrainer('main')
+
+
+def make_session(pool_size=CRAWL_WORKERS):
+    """A session whose connection pool keeps a connection per crawl thread alive, retrying busy or failing servers"""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=['GET'])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class HostLimiter:
+    """Caps the requests in flight to each host and spaces their starts by delay seconds"""
+
+    def __init__(self, per_host=PER_HOST_LIMIT, delay=POLITENESS_DELAY):
+        self.per_host = per_host
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.slots = {}  # host -> semaphore
+        self.next_start = {}  # host -> earliest time.monotonic() of its next request
+
+    @contextlib.contextmanager
+    def request(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            slots = self.slots.setdefault(host, threading.BoundedSemaphore(self.per_host))
+        with slots:
+            with self.lock:
+                now = time.monotonic()
+                start = max(now, self.next_start.get(host, now))
+                self.next_start[host] = start + self.delay
+            time.sleep(start - now)
+            yield
 
 
-def scrape_all_program_ids():
+class PageParser:
+    """
+    Builds BeautifulSoup trees with one parser, from only the parts of a page that are
+    needed unless strain is off.
+    """
+
+    def __init__(self, features=HTML_PARSER, strain=True):
+        self.features = features
+        self.strain = strain
+
+    def soup(self, html, parts=None):
+        return BeautifulSoup(html, self.features, parse_only=parts if self.strain else None)
+
+
+PAGE_PARSER = PageParser()
+
+
+class PageCache:
+    """
+    Pages by URL with their validators and parses, one JSON file per URL in directory.
+    A page is fetched in full again once it is ttl seconds old, in case the server's
+    validators stop changing with its content, and the least recently used pages are
+    evicted once the files take more than max_bytes.
+    """
+
+    def __init__(self, directory=CACHE_DIR, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.sizes, self.used = {}, {}  # file name -> bytes, last use
+        for path in self.directory.glob('*.json'):
+            stat = path.stat()
+            self.sizes[path.name], self.used[path.name] = stat.st_size, stat.st_mtime
+
+    def path(self, url):
+        return self.directory / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, url):
+        """The entry stored for url, or None if there is none or it has expired"""
+        try:
+            with open(self.path(url), 'r', encoding='utf-8') as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if entry.get('url') != url or time.time() - entry['stored_at'] >= self.ttl:
+            return None
+        return entry
+
+    def put(self, url, entry):
+        path = self.path(url)
+        payload = json.dumps(entry, ensure_ascii=False).encode('utf-8')
+        if len(payload) > self.max_bytes:
+            return
+        # Written next to the entry first, so a reader never sees half of it
+        partial = path.with_name(f'{path.name}.{threading.get_ident()}.partial')
+        partial.write_bytes(payload)
+        partial.replace(path)
+        with self.lock:
+            self.sizes[path.name], self.used[path.name] = len(payload), time.time()
+            self.evict()
+
+    def touch(self, url):
+        """Mark the entry for url as just used; the file time keeps the order for later runs"""
+        path = self.path(url)
+        with self.lock:
+            if path.name in self.used:
+                self.used[path.name] = time.time()
+        with contextlib.suppress(OSError):
+            os.utime(path)
+
+    def evict(self):
+        total = sum(self.sizes.values())
+        for name in sorted(self.used, key=self.used.get):
+            if total <= self.max_bytes:
+                break
+            total -= self.sizes.pop(name)
+            del self.used[name]
+            (self.directory / name).unlink(missing_ok=True)
+
+
+class Fetcher:
+    """GETs pages through one pooled session, within the per-host limits, revalidating the pages in cache"""
+
+    def __init__(self, session=None, limiter=None, cache=None):
+        self.session = session or make_session()
+        self.limiter = limiter or HostLimiter()
+        self.cache = cache
+        self.lock = threading.Lock()
+        self.stats = collections.Counter()  # requests, not_modified, bytes
+
+    def request(self, url, headers=None):
+        with self.limiter.request(url):
+            response = self.session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats['not_modified'] += response.status_code == 304
+            self.stats['bytes'] += len(response.content)
+        return response
+
+    def get(self, url):
+        response = self.request(url)
+        response.raise_for_status()
+        return response.text
+
+    def get_parsed(self, url, parse, name):
+        """
+        parse(page text) for url, cached under name. A cached page is only revalidated;
+        if the server answers that it has not changed, its cached parse is returned
+        without downloading or parsing the page again.
+        """
+        entry = self.cache.get(url) if self.cache else None
+        headers = {}
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        response = self.request(url, headers)
+        if entry and response.status_code == 304:
+            parsed = entry['parsed'] if entry['parser_version'] == PARSER_VERSION else {}
+            if name in parsed:
+                self.cache.touch(url)
+                return parsed[name]
+            value = parse(entry['body'])
+            self.cache.put(url, dict(entry, parser_version=PARSER_VERSION, parsed={**parsed, name: value}))
+            return value
+        response.raise_for_status()
+        value = parse(response.text)
+        etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+        if self.cache and (etag or last_modified):
+            self.cache.put(url, {
+                'url': url, 'etag': etag, 'last_modified': last_modified, 'stored_at': time.time(),
+                'body': response.text, 'parser_version': PARSER_VERSION, 'parsed': {name: value},
+            })
+        return value
+
+
+def program_url(program_id, base_url=BASE_URL):
+    return f"{base_url}/programs/?program_id={program_id}"
+
+
+def budget_url(program_id, base_url=BASE_URL):
+    return f"{base_url}/budgets/?program_id={program_id}"
+
+
+def scrape_all_program_ids(fetcher=None, base_url=BASE_URL):
     """
     Scrapes all program IDs from the Vanderbilt global education office search results page.
     
     Returns:
         list: List of program IDs found on the page
     """
-    search_url = "https://www.vanderbilt.edu/study-abroad/program-search-results/"
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
-    program_ids = []
+    search_url = f"{base_url}/program-search-results/"
+    fetcher = fetcher or Fetcher()
     
     try:
         print(f"Fetching program search results")
-        response = requests.get(search_url, headers=headers)
-        response.raise_for_status()
-        
-        # Parse HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        tbody = soup.find('tbody')
-        
-        if tbody:
-            for row in tbody.find_all('tr'):
-                for cell in row.find_all('td'):
-                    for link in cell.find_all('a', href=True):
-                        href = link['href']
-                        # look for links with program_id
-                        if 'program_id=' in href:
-                            match = re.search(r'program_id=(\d+)', href)
-                            if match:
-                                program_ids.append(match.group(1))
-        
-        program_ids = sorted(list(set(program_ids)), key=int)
+        program_ids = fetcher.get_parsed(search_url, parse_program_ids, 'program_ids')
         
         print(f"Found {len(program_ids)} unique program IDs")
         return program_ids
@@ -59,30 +255,73 @@ def scrape_all_program_ids():
         return []
 
 
-def scrape_multiple_programs(program_ids):
+def parse_program_ids(html):
+    """Sorted unique program IDs linked from the search results page"""
+    program_ids = []
+    
+    # Parse HTML
+    soup = PAGE_PARSER.soup(html, SoupStrainer('tbody'))
+    
+    tbody = soup.find('tbody')
+    
+    if tbody:
+        for row in tbody.find_all('tr'):
+            for cell in row.find_all('td'):
+                for link in cell.find_all('a', href=True):
+                    href = link['href']
+                    # look for links with program_id
+                    if 'program_id=' in href:
+                        match = re.search(r'program_id=(\d+)', href)
+                        if match:
+                            program_ids.append(match.group(1))
+    
+    return sorted(list(set(program_ids)), key=int)
+
+
+def scrape_multiple_programs(program_ids, workers=CRAWL_WORKERS, fetcher=None, base_url=BASE_URL):
     """
-    Scrapes data for multiple programs.
+    Scrapes data for multiple programs concurrently.
+
+    A program page and its budget page are fetched and parsed as separate tasks on a
+    pool of workers threads sharing one session, so one program's budget downloads while
+    another page is parsed. At most two programs per worker are in flight at a time.
 
     Args:
         program_ids (list): List of program IDs to scrape
+        workers (int): Number of threads fetching pages
+        fetcher (Fetcher): Session and per-host limits to fetch with
         
     Returns:
-        dict: Dictionary with program_id as key and program data as value
+        dict: Dictionary with program_id as key and program data as value, in the order of program_ids
     """
+    fetcher = fetcher or Fetcher(make_session(workers))
     all_data = {}
     
-    for program_id in program_ids:
-        print(f"\nScraping program ID: {program_id}")
-        data = scrape_vanderbilt_study_abroad(program_id)
+    def finish(program_id, program_task, budget_task):
+        data = assemble(program_id, program_task.result, budget_task.result, base_url)
         if data:
             all_data[program_id] = data
         else:
             print(f"Failed to scrape data for program ID: {program_id}")
     
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque()
+        for program_id in program_ids:
+            print(f"\nScraping program ID: {program_id}")
+            pending.append((
+                program_id,
+                pool.submit(fetch_program, fetcher, program_id, base_url),
+                pool.submit(fetch_budget, fetcher, program_id, base_url),
+            ))
+            if len(pending) >= workers * 2:
+                finish(*pending.popleft())
+        while pending:
+            finish(*pending.popleft())
+    
     return all_data
 
 
-def scrape_vanderbilt_study_abroad(program_id):
+def scrape_vanderbilt_study_abroad(program_id, fetcher=None, base_url=BASE_URL):
     """
     Scrapes study abroad program data from Vanderbilt's website.
     
@@ -92,10 +331,50 @@ def scrape_vanderbilt_study_abroad(program_id):
     Returns:
         dict: Dictionary containing all scraped data
     """
+    fetcher = fetcher or Fetcher()
+    return assemble(
+        program_id,
+        lambda: fetch_program(fetcher, program_id, base_url),
+        lambda: fetch_budget(fetcher, program_id, base_url),
+        base_url,
+    )
+
+
+def assemble(program_id, get_program, get_budget, base_url=BASE_URL):
+    """Combine the results of a program's page and budget tasks, or None if either failed"""
+    try:
+        result = get_program()
+        result["budget_info"] = get_budget()
+    except requests.RequestException as e:
+        print(f"Error fetching data: {e}")
+        return None
+    except Exception as e:
+        print(f"Error parsing data: {e}")
+        return None
+    result['budget_page_url'] = budget_url(program_id, base_url)
+    return result
+
+
+def fetch_program(fetcher, program_id, base_url=BASE_URL):
+    url = program_url(program_id, base_url)
+    print(f"Fetching program details from: {url}")
+    return fetcher.get_parsed(url, lambda html: parse_program_page(html, program_id, url), 'program')
+
+
+def fetch_budget(fetcher, program_id, base_url=BASE_URL):
+    url = budget_url(program_id, base_url)
+    print(f"Fetching budget information from {url}")
+    return fetcher.get_parsed(url, parse_budget_page, 'budget')
+
+
+def parse_program_page(html, program_id, url, parser=PAGE_PARSER):
+    """
+    Program details, links and sections from a program page.
+    Only the title banner and the page body are parsed, unless the page has no body.
     
-    program_url = f"https://www.vanderbilt.edu/study-abroad/programs/?program_id={program_id}"
-    budget_url = f"https://www.vanderbilt.edu/study-abroad/budgets/?program_id={program_id}"
-    
+    Returns:
+        dict: The scraped record without its budget
+    """
     # where results will be stored
     result = {
         "program_id": program_id,
@@ -103,142 +382,152 @@ def scrape_vanderbilt_study_abroad(program_id):
         "budget_info": {}
     }
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+    soup = parser.soup(html, PROGRAM_PARTS)
+    if soup.find(class_='details-page__body') is None:
+        # A page laid out differently is parsed whole
+        soup = parser.soup(html)
     
-    try:
-        # main page
-        print(f"Fetching program details from: {program_url}")
-        response = requests.get(program_url, headers=headers)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        result['program_details']['name'] = soup.find(class_='topper-default__title').get_text(strip=True)
-        result['main_page_url'] = program_url
-        
-        # program homepage
-        homepage_link = soup.find("a", string=re.compile(r"Visit Program Homepage", re.I))
-        if homepage_link and homepage_link.has_attr("href"):
-            result["homepage_url"] = homepage_link["href"]
-        else:
-            result["homepage_url"] = None
-        
-        # get basic program details
-        program_stats = soup.find(class_='program-stats')
-        if program_stats:
-            for ul in program_stats.find_all('ul'):
-                for li in ul.find_all('li'):
-                    text = li.get_text(strip=True)
-                    
-                    if 'Academic Calendar' in text:
-                        result["program_details"]["academic_calendar"] = text.replace('Academic Calendar', '').strip()
-                    elif 'Program Type' in text:
-                        result["program_details"]["program_type"] = text.replace('Program Type', '').strip()
-                    elif 'Minimum GPA' in text:
-                        result["program_details"]["minimum_gpa"] = text.replace('Minimum GPA', '').strip()
-                    elif 'Language Prerequisite' in text:
-                        result["program_details"]["language_prerequisite"] = text.replace('Language Prerequisite', '').strip()
-                    elif 'Additional Prerequisites' in text:
-                        result["program_details"]["additional_prerequisites"] = text.replace('Additional Prerequisites', '').strip()
-                    elif 'Housing' in text and 'Housing' not in result["program_details"]:
-                        result["program_details"]["housing"] = text.replace('Housing', '').strip()
-        
-        img = soup.find("img")
-        
-        result["img_url"] = img['src']              
+    result['program_details']['name'] = soup.find(class_='topper-default__title').get_text(strip=True)
+    result['main_page_url'] = url
+    
+    # program homepage
+    homepage_link = soup.find("a", string=re.compile(r"Visit Program Homepage", re.I))
+    if homepage_link and homepage_link.has_attr("href"):
+        result["homepage_url"] = homepage_link["href"]
+    else:
+        result["homepage_url"] = None
+    
+    # get basic program details
+    program_stats = soup.find(class_='program-stats')
+    if program_stats:
+        for ul in program_stats.find_all('ul'):
+            for li in ul.find_all('li'):
+                text = li.get_text(strip=True)
                 
-        # with open('helper.html', 'w') as file:
-        #     file.write(str(soup))
-        h2_tags = soup.find_all("h2")
-        
-        sections = []
+                if 'Academic Calendar' in text:
+                    result["program_details"]["academic_calendar"] = text.replace('Academic Calendar', '').strip()
+                elif 'Program Type' in text:
+                    result["program_details"]["program_type"] = text.replace('Program Type', '').strip()
+                elif 'Minimum GPA' in text:
+                    result["program_details"]["minimum_gpa"] = text.replace('Minimum GPA', '').strip()
+                elif 'Language Prerequisite' in text:
+                    result["program_details"]["language_prerequisite"] = text.replace('Language Prerequisite', '').strip()
+                elif 'Additional Prerequisites' in text:
+                    result["program_details"]["additional_prerequisites"] = text.replace('Additional Prerequisites', '').strip()
+                elif 'Housing' in text and 'Housing' not in result["program_details"]:
+                    result["program_details"]["housing"] = text.replace('Housing', '').strip()
     
-        for i, h2 in enumerate(h2_tags):
-            title = h2.get_text(strip=True)
-            content = []
-            
-            next_h2 = h2_tags[i + 1] if i + 1 < len(h2_tags) else None
+    img = soup.find("img")
+    
+    result["img_url"] = img['src']              
             
-            # get all elements between this h2 and the next h2 (or end of document)
-            current = h2.next_sibling
-            while current and current != next_h2:
-                if hasattr(current, 'name'):
-                    if current.name == "h2":
-                        break
-                    elif current.name == "p":
-                        p_html = str(current)
-                        if '<h2>' in p_html:
-                            # edge case due to shitty html on geo website
-                            break
-                        if current.get_text(strip=True):
-                            content.append(p_html)
-                    elif current.name == "figure":
-                        figure_html = str(current)
-                        content.append(figure_html)
-                    elif current.name == "table":
-                        table_html = str(current)
-                        content.append(table_html)
-                    elif current.name in ["ul", "ol"]:
-                        list_html = str(current)
-                        content.append(list_html)
-                    elif current.name == "div":
-                        if current.get_text(strip=True):
-                            div_html = str(current)
-                            content.append(div_html)
-                elif isinstance(current, str):
-                    text = current.strip()
-                    if text:
-                        content.append(f"<p>{text}</p>")
-                
-                current = current.next_sibling
-            sections.append({
-                "title": title,
-                "content": content
-            })
-        result['sections'] = sections
-        
-        print(f"Fetching budget information from {budget_url}")
-        response = requests.get(budget_url, headers=headers)
-        response.raise_for_status()
-        
-        result['budget_page_url'] = budget_url        
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
+    # with open('helper.html', 'w') as file:
+    #     file.write(str(soup))
+    h2_tags = soup.find_all("h2")
+    
+    sections = []
 
-        content = soup.get_text()
-        
-        # find all occurrences of total estimated cost
-        pattern = r'(Spring|Academic Year)\s+(\d{4})\s*Total Estimated Cost to Study Abroad:\s*\$([0-9,]+)'
-        matches = re.findall(pattern, content)
+    for i, h2 in enumerate(h2_tags):
+        title = h2.get_text(strip=True)
+        content = []
         
-        for match in matches:
-            term, year, cost = match
-            term_key = f"{term.lower()}_{year}"
-            result["budget_info"][term_key] = {
-                "term": term,
-                "year": year,
-                "total_estimated_cost": f"${cost}"
-            }
+        next_h2 = h2_tags[i + 1] if i + 1 < len(h2_tags) else None
         
-        if not result["budget_info"]:
-            cost_pattern = r'Total Estimated Cost to Study Abroad:\s*\$([0-9,]+)'
-            cost_match = re.search(cost_pattern, content)
-            if cost_match:
-                result["budget_info"]["total_estimated_cost"] = f"${cost_match.group(1)}"
-        
-    except requests.RequestException as e:
-        print(f"Error fetching data: {e}")
-        return None
-    except Exception as e:
-        print(f"Error parsing data: {e}")
-        return None
+        # get all elements between this h2 and the next h2 (or end of document)
+        current = h2.next_sibling
+        while current and current is not next_h2:
+            if hasattr(current, 'name'):
+                if current.name == "h2":
+                    break
+                elif current.name == "p":
+                    # A paragraph holding the next headings would serialize the rest of the page, so it is checked first
+                    if any(not heading.attrs for heading in current.find_all('h2')):
+                        # edge case due to shitty html on geo website
+                        break
+                    if current.get_text(strip=True):
+                        content.append(str(current))
+                elif current.name == "figure":
+                    figure_html = str(current)
+                    content.append(figure_html)
+                elif current.name == "table":
+                    table_html = str(current)
+                    content.append(table_html)
+                elif current.name in ["ul", "ol"]:
+                    list_html = str(current)
+                    content.append(list_html)
+                elif current.name == "div":
+                    if current.get_text(strip=True):
+                        div_html = str(current)
+                        content.append(div_html)
+            elif isinstance(current, str):
+                text = current.strip()
+                if text:
+                    content.append(f"<p>{text}</p>")
+            
+            current = current.next_sibling
+        sections.append({
+            "title": title,
+            "content": content
+        })
+    result['sections'] = sections
     
     return result
 
 
+def parse_budget_page(html, parser=PAGE_PARSER):
+    """
+    Total estimated costs from a budget page.
+    Only the main content is read, unless the page has none.
+    
+    Returns:
+        dict: budget_info, by term and year or with one total_estimated_cost
+    """
+    budget_info = {}
+    
+    soup = parser.soup(html, BUDGET_PARTS)
+    if soup.find() is None:
+        soup = parser.soup(html)
+
+    content = soup.get_text()
+    
+    # find all occurrences of total estimated cost
+    pattern = r'(Spring|Academic Year)\s+(\d{4})\s*Total Estimated Cost to Study Abroad:\s*\$([0-9,]+)'
+    matches = re.findall(pattern, content)
+    
+    for match in matches:
+        term, year, cost = match
+        term_key = f"{term.lower()}_{year}"
+        budget_info[term_key] = {
+            "term": term,
+            "year": year,
+            "total_estimated_cost": f"${cost}"
+        }
+    
+    if not budget_info:
+        cost_pattern = r'Total Estimated Cost to Study Abroad:\s*\$([0-9,]+)'
+        cost_match = re.search(cost_pattern, content)
+        if cost_match:
+            budget_info["total_estimated_cost"] = f"${cost_match.group(1)}"
+    
+    return budget_info
+
+
 def main():
+    parser = argparse.ArgumentParser(description='Scrape every program from the Vanderbilt study abroad site')
+    parser.add_argument('--workers', type=int, default=CRAWL_WORKERS, help='Threads fetching pages')
+    parser.add_argument('--per-host', type=int, default=PER_HOST_LIMIT, help='Requests in flight per host')
+    parser.add_argument('--delay', type=float, default=POLITENESS_DELAY,
+                        help='Seconds between the starts of two requests to the same host')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='Directory of the page cache')
+    parser.add_argument('--cache-ttl', type=float, default=CACHE_TTL,
+                        help='Seconds before a cached page is fetched in full instead of revalidated')
+    parser.add_argument('--cache-size', type=float, default=CACHE_MAX_BYTES / 1024 / 1024,
+                        help='Megabytes of pages the cache keeps')
+    parser.add_argument('--no-cache', action='store_true', help='Fetch every page in full and cache nothing')
+    args = parser.parse_args()
+    cache = None if args.no_cache else PageCache(args.cache_dir, args.cache_ttl, int(args.cache_size * 1024 * 1024))
+    fetcher = Fetcher(make_session(args.workers), HostLimiter(args.per_host, args.delay), cache)
+
     # SCRAPE SINGLE PROGRAM ##
     # print("=== SCRAPING SINGLE PROGRAM (ID: 2261) ===")
     # data = scrape_vanderbilt_study_abroad("2261")
@@ -268,17 +557,19 @@ def main():
     
     ## SCRAPE ALL DATA ##
     print("\n\n=== SCRAPING ALL PROGRAM IDs ===")
-    program_ids = scrape_all_program_ids()
+    program_ids = scrape_all_program_ids(fetcher)
     
     if program_ids:
         print(f"\nProgram IDs found: {program_ids}")
         
         print("\n=== SCRAPING DATA FOR ALL PROGRAMS ===")
-        all_data = scrape_multiple_programs(program_ids)
+        all_data = scrape_multiple_programs(program_ids, workers=args.workers, fetcher=fetcher)
         
         with open("vanderbilt_all_programs.json", 'w') as f:
             json.dump(all_data, f, indent=2)
         print(f"\nAll program data saved to: vanderbilt_all_programs.json")
+        print(f"{fetcher.stats['requests']} requests, {fetcher.stats['not_modified']} pages unchanged since the last run, "
+              f"{fetcher.stats['bytes'] / 1024 / 1024:.1f} MB downloaded")
     else:
         print("No program IDs found.")
 
@@ -1,8 +1,25 @@
 # Names: Daniel, Jacob, Maharshi, Ben
 # Total time: 15 mins 
 
+from django.db.models import Avg, Count
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Program, BudgetInfo, ProgramSection, Review
+from .models import Program, BudgetInfo, ProgramSection, ProgramImage, Review
+
+
+def serialize_thumbnails(program, request=None):
+    """URLs of a program's generated thumbnails, keyed by variant and format"""
+    try:
+        image = program.image
+    except ProgramImage.DoesNotExist:
+        return {}
+    thumbnails = {}
+    for variant, info in image.variants.items():
+        thumbnails[variant] = {'width': info['width'], 'height': info['height']}
+        for extension in ('webp', 'jpeg'):
+            url = reverse('program_thumbnail', args=[info[extension]])
+            thumbnails[variant][extension] = request.build_absolute_uri(url) if request else url
+    return thumbnails
 
 
 class BudgetInfoSerializer(serializers.ModelSerializer):
@@ -14,20 +31,28 @@ class BudgetInfoSerializer(serializers.ModelSerializer):
 class ProgramSectionSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProgramSection
-        fields = ['title', 'content']
+        fields = ['title', 'content_hash', 'content']
+
+
+class ProgramSectionRefSerializer(serializers.ModelSerializer):
+    """Section with its body referenced by hash instead of embedded"""
+    class Meta:
+        model = ProgramSection
+        fields = ['title', 'content_hash']
 
 
 class ProgramSerializer(serializers.ModelSerializer):
     program_details = serializers.SerializerMethodField()
     budget_info = serializers.SerializerMethodField()
     reviews = serializers.SerializerMethodField()
-    sections = ProgramSectionSerializer(many=True, read_only=True)
+    sections = serializers.SerializerMethodField()
+    thumbnails = serializers.SerializerMethodField()
     
     class Meta:
         model = Program
         fields = ['program_id', 'program_details', 'budget_info', 
                  'main_page_url', 'homepage_url', 'sections', 'budget_page_url', 'img_url',
-                 'latitude', 'longitude', 'continent', 'reviews']
+                 'thumbnails', 'latitude', 'longitude', 'continent', 'reviews']
     
     def get_program_details(self, obj):
         return {
@@ -51,11 +76,64 @@ class ProgramSerializer(serializers.ModelSerializer):
             }
         return budget_data
 
+    def get_sections(self, obj):
+        # 'full' embeds section content, 'titles' keeps only the headings, 'none' drops them
+        detail = self.context.get('sections', 'full')
+        if detail == 'none':
+            return []
+        if detail == 'titles':
+            return [{'title': section.title} for section in obj.sections.all()]
+        return ProgramSectionSerializer(obj.sections.all(), many=True).data
+
+    def get_thumbnails(self, obj):
+        return serialize_thumbnails(obj, self.context.get('request'))
+
     def get_reviews(self, obj):
         reviews = obj.reviews.all()
         return ReviewSerializer(reviews, many=True).data
 
 
+class ProgramSummarySerializer(serializers.ModelSerializer):
+    """
+    Small program representation for lists that only link to the program.
+    Review stats come from context['review_stats'] ({program_id: (count, average)}) when given,
+    and are otherwise queried per program, so listings should pass them.
+    """
+    thumbnails = serializers.SerializerMethodField()
+    review_count = serializers.SerializerMethodField()
+    average_rating = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Program
+        fields = ['program_id', 'name', 'program_type', 'academic_calendar', 'continent',
+                  'img_url', 'thumbnails', 'latitude', 'longitude', 'review_count', 'average_rating']
+
+    @staticmethod
+    def review_stats(program_ids):
+        """Review count and average rating for each program, in one aggregate query"""
+        rows = (
+            Review.objects.filter(program_id__in=program_ids)
+            .values('program_id')
+            .annotate(count=Count('id'), average=Avg('rating'))
+        )
+        return {row['program_id']: (row['count'], row['average']) for row in rows}
+
+    def get_thumbnails(self, obj):
+        return serialize_thumbnails(obj, self.context.get('request'))
+
+    def program_review_stats(self, obj):
+        stats = self.context.get('review_stats')
+        if stats is None:
+            stats = self.review_stats([obj.program_id])
+        return stats.get(obj.program_id, (0, None))
+
+    def get_review_count(self, obj):
+        return self.program_review_stats(obj)[0]
+
+    def get_average_rating(self, obj):
+        return self.program_review_stats(obj)[1]
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     alumni_name = serializers.SerializerMethodField()
     alumni_year = serializers.SerializerMethodField()
@@ -67,6 +145,11 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = ['id', 'program', 'program_name', 'alumni', 'alumni_name', 'alumni_year', 'alumni_program', 'text', 'rating', 'date']
         read_only_fields = ['alumni']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Join everything the serializer reads so a listing costs one query"""
+        return queryset.select_related('program', 'alumni__program')
+
     def get_alumni_name(self, obj):
         return f"{obj.alumni.first_name} {obj.alumni.last_name}"
 
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .caching import bump_dataset_version
+from .models import Program, BudgetInfo, ProgramSection
+
+
+@receiver(post_save, sender=Program)
+@receiver(post_delete, sender=Program)
+@receiver(post_save, sender=BudgetInfo)
+@receiver(post_delete, sender=BudgetInfo)
+@receiver(post_save, sender=ProgramSection)
+@receiver(post_delete, sender=ProgramSection)
+def invalidate_program_dataset(sender, **kwargs):
+    """Any change to catalog data starts a new dataset version"""
+    bump_dataset_version()
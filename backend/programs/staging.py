@@ -0,0 +1,174 @@
+"""
+Catalog refreshes that readers never see half-done.
+
+refresh_programs loads a catalog into a new, staged CatalogVersion: the budget entries
+and sections it adds belong to that version, and the stored rows they replace are only
+marked as removed in it. The default managers of the catalog models return the rows of
+the active version, so readers keep seeing the previous catalog while the load commits
+chunk by chunk. Once the staged version passes validation it is activated in one short
+transaction, which also writes the changed program fields and, when the load was asked
+to remove them, deletes the programs missing from the catalog. Rows that only retired
+versions can see are then deleted in batches by collect_versions.
+Only one version may be staging at a time, which the database enforces, so a refresh
+that finds one left by another refresh refuses to start instead of undoing its work.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .caching import bump_dataset_version
+from .loading import (
+    LOAD_BATCH_SIZE, MAX_REMOVED_FRACTION, CatalogRejected, delete_ids, load_programs, remove_programs, too_many_removed
+)
+from .models import CatalogVersion, Program, BudgetInfo, ProgramSection, SectionContent
+
+# Retired versions whose rows are kept for requests that started before the last activation
+KEEP_VERSIONS = 1
+
+
+class RefreshInProgress(Exception):
+    """Another refresh is staging a catalog version, or was interrupted and left it behind"""
+
+    def __init__(self, version_id):
+        super().__init__(f'Catalog version {version_id} is already staging')
+        self.version_id = version_id
+
+
+def staging_version():
+    """Id of the catalog version being staged, or None"""
+    return CatalogVersion.objects.filter(state=CatalogVersion.STAGING).values_list('id', flat=True).first()
+
+
+class StagedCatalog:
+    """A catalog version being loaded, with the writes that wait for its activation"""
+
+    def __init__(self, version):
+        self.version = version
+        self.changed_programs, self.changed_fields = [], set()
+        self.missing = []
+        self.has_changes = False
+
+
+def discard_version(version, batch_size=LOAD_BATCH_SIZE):
+    """Undo one staged catalog version and the rows it added"""
+    with transaction.atomic():
+        # Staged rows go first, so the rows they replaced can be current again without a duplicate
+        for model in (BudgetInfo, ProgramSection):
+            delete_ids(model, model.all_versions.filter(added_in=version.id).values_list('id', flat=True), batch_size)
+            model.all_versions.filter(removed_in=version.id).update(removed_in=None)
+        Program.all_versions.filter(added_in=version.id).delete()
+        version.delete()
+    SectionContent.objects.filter(sections__isnull=True).delete()
+
+
+def discard_staged(batch_size=LOAD_BATCH_SIZE):
+    """
+    Undo the catalog versions left in staging by a failed or interrupted refresh. Only
+    safe while no refresh is running, since it also undoes the one being staged.
+    """
+    discarded = 0
+    for version in CatalogVersion.objects.filter(state=CatalogVersion.STAGING):
+        discard_version(version, batch_size)
+        discarded += 1
+    return discarded
+
+
+def start_refresh():
+    """Create the version a refresh stages into, raising RefreshInProgress if one is already staging"""
+    try:
+        with transaction.atomic():
+            return StagedCatalog(CatalogVersion.objects.create())
+    except IntegrityError:
+        raise RefreshInProgress(staging_version()) from None
+
+
+def validate(staging, report, max_removed=MAX_REMOVED_FRACTION):
+    """Reasons not to activate a staged catalog; empty if it may be activated"""
+    problems = []
+    active = Program.objects.count()
+    staged = active + report['programs']['created'] - len(staging.missing)
+    if staged <= 0:
+        problems.append('The staged catalog has no programs')
+    else:
+        removed = too_many_removed(len(staging.missing), active, max_removed)
+        if removed:
+            problems.append(removed)
+    duplicates = (
+        ProgramSection.all_versions.filter(ProgramSection.visible_in(staging.version.id))
+        .values('program_id', 'order').annotate(rows=Count('id')).filter(rows__gt=1)
+    )
+    if duplicates.exists():
+        problems.append('Some staged programs have two sections in the same position')
+    return problems
+
+
+def activate(staging, batch_size=LOAD_BATCH_SIZE):
+    """Make a staged version the active one, together with its program changes and removals"""
+    with transaction.atomic():
+        if staging.changed_programs:
+            Program.all_versions.bulk_update(
+                staging.changed_programs, sorted(staging.changed_fields), batch_size=batch_size
+            )
+        removed = remove_programs(staging.missing, batch_size)
+        now = timezone.now()
+        CatalogVersion.objects.filter(state=CatalogVersion.ACTIVE).update(state=CatalogVersion.RETIRED, retired_at=now)
+        staging.version.state, staging.version.activated_at = CatalogVersion.ACTIVE, now
+        staging.version.save(update_fields=['state', 'activated_at'])
+    bump_dataset_version()
+    return removed
+
+
+def collect_versions(keep=KEEP_VERSIONS, batch_size=LOAD_BATCH_SIZE):
+    """
+    Delete the rows that neither the active version nor the keep versions retired last
+    can see, one batch per transaction, then those versions and unused section bodies.
+    Returns the number of rows deleted per table.
+    """
+    counts = {'budgets': 0, 'sections': 0, 'versions': 0, 'bodies': 0}
+    retained = list(
+        CatalogVersion.objects.exclude(state=CatalogVersion.STAGING).order_by('-id').values_list('id', flat=True)[:keep + 1]
+    )
+    if not retained:
+        return counts
+    oldest = min(retained)
+    for model, table in [(BudgetInfo, 'budgets'), (ProgramSection, 'sections')]:
+        # A row removed in a version is hidden from that version on
+        collectable = model.all_versions.filter(removed_in__lte=oldest)
+        while True:
+            ids = list(collectable.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                counts[table] += delete_ids(model, ids, batch_size)
+    counts['versions'], _ = CatalogVersion.objects.filter(state=CatalogVersion.RETIRED, id__lt=oldest).delete()
+    counts['bodies'], _ = SectionContent.objects.filter(sections__isnull=True).delete()
+    return counts
+
+
+def refresh_programs(records, max_removed=MAX_REMOVED_FRACTION, keep=KEEP_VERSIONS, **options):
+    """
+    load_programs into a staged version, validate it and activate it, then collect the
+    versions no longer needed. Raises CatalogRejected, after discarding the staged
+    version, if validation fails, and RefreshInProgress without changing anything if a
+    version is already staging. options are passed on to load_programs.
+    """
+    batch_size = options.get('batch_size', LOAD_BATCH_SIZE)
+    staging = start_refresh()
+    try:
+        report = load_programs(records, staging=staging, **options)
+        problems = validate(staging, report, max_removed)
+        if problems:
+            raise CatalogRejected(problems)
+    except BaseException:
+        discard_version(staging.version, batch_size)
+        raise
+    if not staging.has_changes:
+        # Nothing to switch to; the active version stays as it is
+        discard_version(staging.version, batch_size)
+        report['version'] = CatalogVersion.objects.filter(state=CatalogVersion.ACTIVE).values_list('id', flat=True).first()
+        report['collected'] = dict.fromkeys(['budgets', 'sections', 'versions', 'bodies'], 0)
+        return report
+    report['programs']['removed'] = activate(staging, batch_size)
+    report['version'] = staging.version.id
+    report['collected'] = collect_versions(keep, batch_size)
+    return report
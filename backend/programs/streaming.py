@@ -0,0 +1,139 @@
+"""
+Streaming readers and writers for program catalog files.
+
+Catalogs come either as one JSON object mapping program ids to records (data.json and
+the scraper's output) or as JSON Lines, one record with its program_id per line
+(.jsonl / .ndjson). Both are read one record at a time, so reading a catalog needs
+memory for the largest record rather than for the whole file.
+"""
+import json
+import textwrap
+from pathlib import Path
+
+READ_SIZE = 64 * 1024
+JSON_LINES_SUFFIXES = ('.jsonl', '.ndjson')
+
+_decoder = json.JSONDecoder()
+
+
+class _JsonStream:
+    """A window over a text file that JSON values are decoded from as it is read"""
+
+    def __init__(self, file, read_size):
+        self.file = file
+        self.read_size = read_size
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+
+    def read_more(self):
+        # Keep at least as much as is still unparsed, so a large value needs few retries
+        chunk = self.file.read(max(self.read_size, len(self.buffer) - self.position))
+        if not chunk:
+            self.eof = True
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+
+    def skip_whitespace(self):
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in ' \t\n\r':
+                self.position += 1
+            if self.position < len(self.buffer) or self.eof:
+                return
+            self.read_more()
+
+    def next_char(self):
+        """Consume and return the next non-whitespace character, or '' at the end of the file"""
+        self.skip_whitespace()
+        if self.position == len(self.buffer):
+            return ''
+        char = self.buffer[self.position]
+        self.position += 1
+        return char
+
+    def decode(self):
+        """Decode the JSON value that starts at the next non-whitespace character"""
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self.read_more()
+                continue
+            if end == len(self.buffer) and not self.eof:
+                # A number could continue past the end of the buffer
+                self.read_more()
+                continue
+            self.position = end
+            return value
+
+    def error(self, message):
+        return json.JSONDecodeError(message, self.buffer, self.position)
+
+
+def iter_json_object(file, read_size=READ_SIZE):
+    """Yield the (key, value) pairs of the JSON object in a text file one at a time"""
+    stream = _JsonStream(file, read_size)
+    if stream.next_char() != '{':
+        raise stream.error('Expecting a JSON object')
+    stream.skip_whitespace()
+    if stream.buffer.startswith('}', stream.position):
+        stream.position += 1
+        return
+    while True:
+        key = stream.decode()
+        if not isinstance(key, str):
+            raise stream.error('Expecting a property name')
+        if stream.next_char() != ':':
+            raise stream.error("Expecting ':' delimiter")
+        yield key, stream.decode()
+        char = stream.next_char()
+        if char == '}':
+            break
+        if char != ',':
+            raise stream.error("Expecting ',' delimiter")
+    if stream.next_char():
+        raise stream.error('Extra data')
+
+
+def iter_json_lines(file):
+    """Yield (program_id, record) for every record of a JSON Lines file"""
+    for number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise json.JSONDecodeError(f'Line {number}: {e.msg}', e.doc, e.pos) from None
+        yield str(record['program_id']), record
+
+
+def is_json_lines(path):
+    return Path(path).suffix.lower() in JSON_LINES_SUFFIXES
+
+
+def read_programs(path):
+    """Yield (program_id, record) pairs from a catalog file, in either format"""
+    with open(path, 'r', encoding='utf-8') as file:
+        if is_json_lines(path):
+            yield from iter_json_lines(file)
+        else:
+            yield from iter_json_object(file)
+
+
+def write_programs(path, records):
+    """Write (program_id, record) pairs to a catalog file as they come, in the format its suffix names"""
+    with open(path, 'w', encoding='utf-8') as file:
+        if is_json_lines(path):
+            for program_id, record in records:
+                file.write(json.dumps(dict(record, program_id=program_id)) + '\n')
+            return
+        # Same layout as json.dump(..., indent=4) of the whole catalog
+        separator = '{\n'
+        for program_id, record in records:
+            body = textwrap.indent(json.dumps(record, indent=4), '    ').lstrip()
+            file.write(f'{separator}    {json.dumps(program_id)}: {body}')
+            separator = ',\n'
+        file.write('\n}' if separator == ',\n' else '{}')
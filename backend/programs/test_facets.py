@@ -0,0 +1,86 @@
+"""
+Facet Tests
+Tests the in-memory facet index and the facets endpoint
+"""
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from programs.models import Program, BudgetInfo
+
+
+@pytest.fixture
+def catalog():
+    """Fixture to create a small catalog spread over several facet values"""
+    cache.clear()
+    programs = [
+        ('P1', 'Europe', 'Exchange', 'Similar to VU', 'Yes', '$45,000'),
+        ('P2', 'Europe', 'Study Center', 'Summer', 'No', '$18,500'),
+        ('P3', 'Asia', 'Exchange', 'Similar to VU, Summer', 'NO', '$52,000'),
+        ('P4', 'Asia', 'Study Center', 'Summer', 'No', None),
+    ]
+    for program_id, continent, program_type, calendar, language, cost in programs:
+        program = Program.objects.create(
+            program_id=program_id,
+            name=f'Program {program_id}',
+            continent=continent,
+            program_type=program_type,
+            academic_calendar=calendar,
+            language_prerequisite=language,
+            latitude=0.0,
+            longitude=0.0
+        )
+        if cost:
+            BudgetInfo.objects.create(program=program, term='Spring', year=2025, total_estimated_cost=cost)
+
+
+@pytest.mark.django_db
+class TestProgramFacets:
+    """Test faceted search over programs"""
+
+    def test_counts_without_filters(self, catalog):
+        """Test counts over the whole catalog"""
+        response = APIClient().get(reverse('program_facets'))
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data['count'] == 4
+        assert data['facets']['continent'] == {'Asia': 2, 'Europe': 2}
+        assert data['facets']['calendar'] == {'Similar to VU': 2, 'Summer': 3}
+        assert data['facets']['language'] == {'No': 3, 'Yes': 1}
+        assert data['facets']['cost_band'] == {
+            '$40k-$50k': 1, '$50k+': 1, 'Under $20k': 1, 'Unknown': 1
+        }
+
+    def test_filters_and_across_facets(self, catalog):
+        """Test that filters on different facets must all match"""
+        response = APIClient().get(reverse('program_facets'), {'continent': 'Asia', 'program_type': 'Exchange'})
+
+        data = response.json()
+        assert data['program_ids'] == ['P3']
+
+    def test_filters_or_within_facet(self, catalog):
+        """Test that several values of one facet match any of them"""
+        response = APIClient().get(reverse('program_facets'), {'cost_band': ['Under $20k', '$50k+']})
+
+        assert sorted(response.json()['program_ids']) == ['P2', 'P3']
+
+    def test_counts_reflect_other_filters(self, catalog):
+        """Test that each facet is counted under every filter but its own"""
+        response = APIClient().get(reverse('program_facets'), {'continent': 'Europe'})
+
+        facets = response.json()['facets']
+        assert facets['continent'] == {'Asia': 2, 'Europe': 2}
+        assert facets['program_type'] == {'Exchange': 1, 'Study Center': 1}
+
+    def test_index_built_once_per_dataset_version(self, catalog, django_assert_num_queries):
+        """Test that repeated requests reuse the index until programs change"""
+        client = APIClient()
+        client.get(reverse('program_facets'))
+
+        with django_assert_num_queries(0):
+            client.get(reverse('program_facets'), {'continent': 'Asia'})
+
+        Program.objects.get(program_id='P4').delete()
+        assert client.get(reverse('program_facets')).json()['count'] == 3
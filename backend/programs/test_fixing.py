@@ -0,0 +1,114 @@
+"""
+Enrichment Tests
+Tests merging program locations from the locations file, the geocode cache and a geocoder
+"""
+import json
+
+import pytest
+from programs import fixing
+from programs.fixing import (
+    GeocodeCache, Geocoder, Location, LocationIndex, geocode_missing, merge_locations, normalize_location
+)
+
+
+class StubGeocoder(Geocoder):
+    """Answers from a fixed table and remembers the batches it was sent"""
+    batch_size = 2
+
+    def __init__(self, table):
+        self.table = table
+        self.batches = []
+
+    def geocode(self, queries):
+        self.batches.append(list(queries))
+        return {query: self.table.get(query) for query in queries}
+
+
+def program(name):
+    return {'program_details': {'name': name, 'program_type': 'Study Center'}}
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    locations = {
+        '1003': {'program_id': '1003', 'program_details': {
+            'name': 'IES Vienna: Music', 'latitude': 48.2082, 'longitude': 16.3738, 'continent': 'Europe'}},
+        '1290': {'program_id': '1290', 'program_details': {
+            'name': 'CET Harbin', 'latitude': 45.8038, 'longitude': 126.535, 'continent': 'Asia'}},
+        '10127': {'program_id': '10127', 'program_details': {'latitude': 0, 'longitude': 0, 'continent': 'Unknown'}},
+    }
+    programs = {
+        '1003': program('IES Vienna: Music'),
+        '2000': program('CET  Harbin'),
+        '10127': program('GSS 2258: Travel Stories'),
+        '3000': program('University of Leeds (IFSA-Butler)'),
+        '3001': program('University of Leeds'),
+    }
+    for name, data in [('LOCATIONS_FILE', locations), ('PROGRAMS_FILE', programs)]:
+        path = tmp_path / f'{name.lower()}.json'
+        path.write_text(json.dumps(data))
+        monkeypatch.setattr(fixing, name, path)
+    monkeypatch.setattr(fixing, 'PROGRAMS_DIR', tmp_path)
+    monkeypatch.setattr(fixing, 'CACHE_FILE', tmp_path / 'geocode_cache.json')
+    monkeypatch.setattr(fixing, 'UNRESOLVED_FILE', tmp_path / 'unresolved_locations.json')
+    return tmp_path
+
+
+def test_normalize_location():
+    assert normalize_location('  University of Leeds (IFSA-Butler) ') == 'university of leeds'
+    assert normalize_location('IES Wien: Musik!') == normalize_location('ies  wien musik')
+
+
+def test_index_skips_placeholders(files):
+    index = LocationIndex.from_file(fixing.LOCATIONS_FILE)
+
+    assert set(index.by_id) == {'1003', '1290'}
+    assert index.lookup('2000', program('CET Harbin')) == Location(45.8038, 126.535, 'Asia')
+
+
+def test_geocodes_misses_in_batches(files):
+    index = LocationIndex.from_file(fixing.LOCATIONS_FILE)
+    cache = GeocodeCache(fixing.CACHE_FILE)
+    cache.update({'gss 2258 travel stories': None})
+    geocoder = StubGeocoder({'university of leeds': Location(53.8067, -1.5550, 'Europe')})
+
+    sent = geocode_missing(fixing.read_programs(fixing.PROGRAMS_FILE), index, cache, geocoder)
+
+    # The two Leeds programs share a query, and a query that failed before is not retried
+    assert sent == 1
+    assert geocoder.batches == [['university of leeds']]
+    assert GeocodeCache(fixing.CACHE_FILE).get('university of leeds') == Location(53.8067, -1.5550, 'Europe')
+
+    geocode_missing(fixing.read_programs(fixing.PROGRAMS_FILE), index, cache, geocoder, retry_unresolved=True)
+    assert geocoder.batches[1:] == [['gss 2258 travel stories']]
+
+
+def test_unresolved_reported(files):
+    index = LocationIndex.from_file(fixing.LOCATIONS_FILE)
+    cache = GeocodeCache(fixing.CACHE_FILE)
+    cache.update({'university of leeds': Location(53.8067, -1.5550, 'Europe')})
+    sources, unresolved = {'locations file': 0, 'geocode cache': 0}, []
+
+    merged = dict(merge_locations(fixing.read_programs(fixing.PROGRAMS_FILE), index, cache, sources, unresolved))
+
+    assert sources == {'locations file': 2, 'geocode cache': 2}
+    assert merged['3000']['program_details']['latitude'] == 53.8067
+    assert unresolved == [{'program_id': '10127', 'name': 'GSS 2258: Travel Stories', 'query': 'gss 2258 travel stories'}]
+    assert merged['10127']['program_details'] == {
+        'name': 'GSS 2258: Travel Stories', 'program_type': 'Study Center', 'continent': 'Unknown',
+    }
+
+
+def test_main(files, capsys):
+    fixing.main(['--geocoder', f'{__name__}.LeedsGeocoder'])
+
+    data = json.loads((files / 'data.json').read_text())
+    assert data['1003']['program_details']['continent'] == 'Europe'
+    assert data['3001']['program_details']['continent'] == 'Europe'
+    assert json.loads((files / 'unresolved_locations.json').read_text())[0]['program_id'] == '10127'
+    assert '1 programs have no location' in capsys.readouterr().out
+
+
+class LeedsGeocoder(StubGeocoder):
+    def __init__(self):
+        super().__init__({'university of leeds': Location(53.8067, -1.5550, 'Europe')})
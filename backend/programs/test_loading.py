@@ -0,0 +1,268 @@
+"""
+Loading Tests
+Tests the bulk, incremental catalog loader behind loadprograms
+"""
+import copy
+import io
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from accounts.models import Favorite, Profile
+from programs.caching import get_dataset_version
+from programs.loading import CatalogRejected, load_programs
+from programs.models import Program, BudgetInfo, ProgramSection, SectionContent
+
+
+def record(program_id, name, sections=None, budget_info=None):
+    return {
+        'program_id': program_id,
+        'program_details': {
+            'name': name,
+            'program_type': 'Study Center',
+            'latitude': 48.2,
+            'longitude': 16.3,
+            'continent': 'Europe',
+        },
+        'budget_info': budget_info if budget_info is not None else {
+            'fall_2025': {'term': 'Fall', 'year': '2025', 'total_estimated_cost': '$30,000'},
+            'spring_2025': {'term': 'Spring', 'year': '2025', 'total_estimated_cost': '$31,000'},
+        },
+        'main_page_url': f'https://example.com/{program_id}',
+        'sections': sections if sections is not None else [
+            {'title': 'Overview', 'content': [f'<p>{name}</p>']},
+            {'title': 'Housing', 'content': ['<p>Shared apartments</p>']},
+        ],
+    }
+
+
+@pytest.fixture
+def catalog():
+    return {
+        'LOAD1': record('LOAD1', 'Vienna: Music'),
+        'LOAD2': record('LOAD2', 'Toulouse: Business'),
+    }
+
+
+def writes(queries):
+    return [query['sql'] for query in queries if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))]
+
+
+@pytest.mark.django_db
+class TestLoadPrograms:
+    """Test diffing the catalog against the stored rows"""
+
+    def test_initial_load(self, catalog):
+        report = load_programs(catalog)
+
+        assert report['programs'] == {'created': 2, 'updated': 0, 'unchanged': 0, 'removed': 0}
+        assert report['budgets']['created'] == 4
+        assert report['sections']['created'] == 4
+        # The housing body is shared by both programs
+        assert report['bodies']['created'] == 3
+        program = Program.objects.get(program_id='LOAD1')
+        assert program.name == 'Vienna: Music'
+        assert [section.content for section in program.sections.all()] == [['<p>Vienna: Music</p>'], ['<p>Shared apartments</p>']]
+        assert BudgetInfo.objects.get(program=program, term='Fall').year == 2025
+
+    def test_reload_writes_nothing(self, catalog):
+        load_programs(catalog)
+        version = get_dataset_version()
+
+        with CaptureQueriesContext(connection) as queries:
+            report = load_programs(copy.deepcopy(catalog))
+
+        assert report['programs'] == {'created': 0, 'updated': 0, 'unchanged': 2, 'removed': 0}
+        assert writes(queries) == []
+        # Only the stored hashes are read
+        assert len([query for query in queries if query['sql'].startswith('SELECT')]) == 1
+        assert get_dataset_version() == version
+
+    def test_force_reload(self, catalog):
+        load_programs(catalog)
+
+        with CaptureQueriesContext(connection) as queries:
+            report = load_programs(catalog, force=True)
+
+        assert report['programs'] == {'created': 0, 'updated': 0, 'unchanged': 2, 'removed': 0}
+        assert writes(queries) == []
+        assert len(queries) > 1
+
+    def test_changes_applied(self, catalog):
+        load_programs(catalog)
+        Program.objects.filter(program_id='LOAD1').update(favorite_count=7)
+        version = get_dataset_version()
+
+        catalog['LOAD1']['program_details']['name'] = 'Vienna: Music and Culture'
+        catalog['LOAD1']['budget_info'] = {
+            'fall_2025': {'term': 'Fall', 'year': '2025', 'total_estimated_cost': '$32,000'},
+        }
+        catalog['LOAD2']['sections'] = [{'title': 'Overview', 'content': ['<p>Rewritten</p>']}]
+        report = load_programs(catalog)
+
+        assert report['programs'] == {'created': 0, 'updated': 2, 'unchanged': 0, 'removed': 0}
+        assert report['budgets'] == {'created': 0, 'updated': 1, 'deleted': 1}
+        assert report['sections'] == {'created': 0, 'updated': 1, 'deleted': 1}
+        program = Program.objects.get(program_id='LOAD1')
+        assert program.name == 'Vienna: Music and Culture'
+        assert program.favorite_count == 7
+        assert list(program.budget_info.values_list('total_estimated_cost', flat=True)) == ['$32,000']
+        assert [section.content for section in ProgramSection.objects.filter(program_id='LOAD2')] == [['<p>Rewritten</p>']]
+        # The old LOAD2 overview body is no longer used by any section
+        assert not SectionContent.objects.filter(hash=SectionContent.digest(['<p>Toulouse: Business</p>'])).exists()
+        assert get_dataset_version() != version
+
+    def test_missing_programs_kept(self, catalog):
+        load_programs(catalog)
+        del catalog['LOAD2']
+
+        report = load_programs(catalog)
+
+        assert report['programs']['removed'] == 0
+        assert Program.objects.count() == 2
+
+    def test_missing_programs_removed(self, catalog):
+        catalog['LOAD3'] = record('LOAD3', 'Kyoto: Japanese')
+        load_programs(catalog)
+        del catalog['LOAD3']
+
+        report = load_programs(catalog, remove_missing=True)
+
+        assert report['programs'] == {'created': 0, 'updated': 0, 'unchanged': 2, 'removed': 1}
+        assert report['kept'] == []
+        assert sorted(Program.objects.values_list('program_id', flat=True)) == ['LOAD1', 'LOAD2']
+        assert not ProgramSection.objects.filter(program_id='LOAD3').exists()
+
+    def test_favorited_programs_kept(self, catalog):
+        catalog['LOAD3'] = record('LOAD3', 'Kyoto: Japanese')
+        load_programs(catalog)
+        user = User.objects.create_user(username='student', password='testpass123')
+        Favorite.add_many(user, ['LOAD1', 'LOAD3'])
+        del catalog['LOAD3']
+
+        report = load_programs(catalog, remove_missing=True)
+
+        assert report['programs']['removed'] == 0
+        assert report['kept'] == ['LOAD3']
+        assert Favorite.objects.filter(user=user).count() == 2
+
+        report = load_programs(catalog, remove_missing=True, remove_referenced=True)
+
+        assert report['programs']['removed'] == 1
+        assert sorted(Program.objects.values_list('program_id', flat=True)) == ['LOAD1', 'LOAD2']
+        assert Profile.objects.get(user=user).favorite_count == 1
+
+    def test_too_many_removed(self, catalog):
+        load_programs(catalog)
+        del catalog['LOAD2']
+
+        with pytest.raises(CatalogRejected, match='1 of 2 programs would be removed, more than 40%'):
+            load_programs(catalog, remove_missing=True, max_removed=0.4)
+
+        assert Program.objects.count() == 2
+
+    def test_bad_record_reported(self, catalog):
+        catalog['LOAD3'] = record('LOAD3', 'Broken', budget_info={'x': {'term': 'Fall', 'year': 'soon'}})
+
+        report = load_programs(catalog)
+
+        assert report['errors'] == [
+            {'program_id': 'LOAD3', 'field': 'budget_info.x.year', 'error': "Expected a year, got 'soon'"},
+        ]
+        assert not Program.objects.filter(program_id='LOAD3').exists()
+        assert Program.objects.count() == 2
+
+    def test_chunks(self, catalog):
+        catalog['LOAD3'] = record('LOAD3', 'Kyoto: Japanese')
+        report = load_programs(iter(catalog.items()), chunk_size=2)
+
+        assert report['programs'] == {'created': 3, 'updated': 0, 'unchanged': 0, 'removed': 0}
+        assert report['sections']['created'] == 6
+        assert report['bodies']['created'] == 4
+
+        del catalog['LOAD1']
+        report = load_programs(iter(catalog.items()), remove_missing=True, chunk_size=1)
+        assert report['programs'] == {'created': 0, 'updated': 0, 'unchanged': 2, 'removed': 1}
+
+    def test_unresolved_location(self, catalog):
+        del catalog['LOAD2']['program_details']['latitude'], catalog['LOAD2']['program_details']['longitude']
+        load_programs(catalog)
+
+        program = Program.objects.get(program_id='LOAD2')
+        assert (program.latitude, program.longitude) == (None, None)
+
+    def test_single_cost_budget(self):
+        load_programs({'LOAD4': record('LOAD4', 'Simple', budget_info={'total_estimated_cost': '$12,000'})})
+
+        budget = BudgetInfo.objects.get(program_id='LOAD4')
+        assert (budget.term, budget.year, budget.total_estimated_cost) == ('', 0, '$12,000')
+
+
+@pytest.mark.django_db
+class TestLoadProgramsCommand:
+    """Test the loadprograms management command"""
+
+    def test_command(self, catalog, tmp_path):
+        path = tmp_path / 'programs.json'
+        path.write_text(json.dumps(catalog))
+        out = io.StringIO()
+
+        call_command('loadprograms', file=str(path), stdout=out)
+
+        assert 'Programs - Created: 2, Updated: 0, Unchanged: 0, Removed: 0' in out.getvalue()
+        assert 'Time - Read file:' in out.getvalue()
+        assert Program.objects.count() == 2
+
+    def test_remove_missing(self, catalog, tmp_path):
+        catalog['LOAD3'] = record('LOAD3', 'Kyoto: Japanese')
+        catalog['LOAD4'] = record('LOAD4', 'Seoul: Korean')
+        load_programs(catalog)
+        user = User.objects.create_user(username='student', password='testpass123')
+        Favorite.add_many(user, ['LOAD4'])
+        path = tmp_path / 'programs.json'
+        path.write_text(json.dumps({'LOAD1': catalog['LOAD1'], 'LOAD2': catalog['LOAD2']}))
+        out = io.StringIO()
+
+        call_command('loadprograms', file=str(path), remove_missing=True, stdout=out)
+
+        assert 'Removed: 1' in out.getvalue()
+        assert 'Kept 1 programs missing from the file because they have favorites' in out.getvalue()
+        assert sorted(Program.objects.values_list('program_id', flat=True)) == ['LOAD1', 'LOAD2', 'LOAD4']
+
+    def test_json_lines(self, catalog, tmp_path):
+        path = tmp_path / 'programs.jsonl'
+        path.write_text(''.join(json.dumps(data) + '\n' for data in catalog.values()))
+
+        call_command('loadprograms', file=str(path), stdout=io.StringIO())
+
+        assert Program.objects.get(program_id='LOAD2').name == 'Toulouse: Business'
+
+    def test_broken_file_rolled_back(self, catalog, tmp_path):
+        path = tmp_path / 'programs.json'
+        # The first record is complete, the file breaks off in the second
+        path.write_text(json.dumps(catalog)[:-20])
+        out = io.StringIO()
+
+        call_command('loadprograms', file=str(path), chunk_size=1, stdout=out)
+
+        assert 'Invalid JSON file' in out.getvalue()
+        assert not Program.objects.exists()
+
+    def test_error_report(self, catalog, tmp_path):
+        catalog['LOAD3'] = record('LOAD3', '')
+        path = tmp_path / 'programs.json'
+        path.write_text(json.dumps(catalog))
+        report_path = tmp_path / 'errors.json'
+        out = io.StringIO()
+
+        call_command('loadprograms', file=str(path), workers=2, error_report=str(report_path), stdout=out)
+
+        assert 'Error processing program LOAD3: name: Missing program name' in out.getvalue()
+        assert 'Skipped invalid programs: 1' in out.getvalue()
+        assert json.loads(report_path.read_text()) == [
+            {'program_id': 'LOAD3', 'field': 'name', 'error': 'Missing program name'},
+        ]
+        assert Program.objects.count() == 2
@@ -0,0 +1,108 @@
+"""
+Normalization Tests
+Tests validating catalog records and normalizing them, inline and in a process pool
+"""
+import pytest
+from programs.loading import field_limits
+from programs.models import SectionContent
+from programs import normalize
+from programs.normalize import normalize_chunk, normalize_chunks, normalize_record, record_digest
+from programs.streaming import read_programs
+from programs.fixing import PROGRAMS_DIR
+
+
+def record(**details):
+    return {
+        'program_details': dict({'name': 'IES Vienna: Music', 'latitude': 48.2, 'longitude': 16.3}, **details),
+        'budget_info': {'fall_2025': {'term': 'Fall', 'year': '2025', 'total_estimated_cost': '$30,000'}},
+        'main_page_url': 'https://example.com/1003',
+        'sections': [{'title': 'Overview', 'content': ['<p>Music</p>']}],
+    }
+
+
+class TestNormalizeRecord:
+    """Test turning one catalog record into typed values"""
+
+    def test_typed_values(self):
+        data = record(latitude='48.2', longitude=16, minimum_gpa=3.0)
+        program, errors = normalize_record('1003', data)
+
+        assert errors == []
+        assert program.digest == record_digest(data)
+        assert (program.values['latitude'], program.values['longitude']) == (48.2, 16.0)
+        assert program.values['minimum_gpa'] == '3.0'
+        assert program.values['housing'] == ''
+        assert program.budgets == {('Fall', 2025): '$30,000'}
+        digest = SectionContent.digest(['<p>Music</p>'])
+        assert program.sections == {0: ('Overview', digest)}
+        assert program.bodies == {digest: ['<p>Music</p>']}
+
+    def test_digest_follows_normalize_version(self, monkeypatch):
+        data = record()
+        digest = normalize_record('1003', data)[0].digest
+
+        monkeypatch.setattr(normalize, 'NORMALIZE_VERSION', normalize.NORMALIZE_VERSION + 1)
+
+        assert normalize_record('1003', data)[0].digest != digest
+
+    def test_unresolved_location(self):
+        data = record()
+        del data['program_details']['latitude'], data['program_details']['longitude']
+        program, errors = normalize_record('1003', data)
+
+        assert errors == []
+        assert (program.values['latitude'], program.values['longitude']) == (None, None)
+
+    def test_flat_budget(self):
+        data = dict(record(), budget_info={'total_estimated_cost': '$12,000'})
+        program, _ = normalize_record('1003', data)
+        assert program.budgets == {('', 0): '$12,000'}
+
+    @pytest.mark.parametrize('data, field', [
+        (record(name=''), 'name'),
+        (record(latitude=95), 'latitude'),
+        (record(longitude='east'), 'longitude'),
+        (record(longitude=None), 'longitude'),
+        (record(housing=['dorms']), 'housing'),
+        (dict(record(), img_url='images/1003.jpg'), 'img_url'),
+        (dict(record(), budget_info={'x': {'year': 'soon'}}), 'budget_info.x.year'),
+        (dict(record(), sections=[{'title': 'Overview', 'content': '<p>Music</p>'}]), 'sections.0.content'),
+        (dict(record(), sections={'title': 'Overview'}), 'sections'),
+    ])
+    def test_invalid_field(self, data, field):
+        program, errors = normalize_record('1003', data)
+
+        assert program is None
+        assert [error['field'] for error in errors] == [field]
+        assert errors[0]['program_id'] == '1003'
+
+    def test_every_problem_reported(self):
+        _, errors = normalize_record('1003', record(name=None, latitude=None))
+        assert [error['field'] for error in errors] == ['latitude', 'name']
+
+    def test_length_limits(self):
+        _, errors = normalize_record('1003', record(program_type='x' * 101), limits={'program_type': 100})
+        assert errors == [{'program_id': '1003', 'field': 'program_type', 'error': 'Longer than 100 characters'}]
+
+    def test_shipped_catalog_valid(self):
+        _, errors = normalize_chunk(read_programs(PROGRAMS_DIR / 'data.json'), limits=field_limits())
+        assert errors == []
+
+
+class TestNormalizeChunks:
+    """Test spreading chunks over worker processes"""
+
+    def chunks(self):
+        for start in range(0, 12, 3):
+            yield [(str(index), record(name=f'Program {index}', latitude=index if index != 7 else 91))
+                   for index in range(start, start + 3)]
+
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_order_and_errors(self, workers):
+        results = list(normalize_chunks(self.chunks(), workers=workers))
+
+        assert [[program.program_id for program in programs] for programs, _ in results] == [
+            ['0', '1', '2'], ['3', '4', '5'], ['6', '8'], ['9', '10', '11'],
+        ]
+        assert [error['program_id'] for _, errors in results for error in errors] == ['7']
+        assert results[1][0][0].values['name'] == 'Program 3'
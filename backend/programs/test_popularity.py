@@ -0,0 +1,150 @@
+"""
+Popularity Tests
+Tests the favorite counters, the popular endpoint and counter reconciliation
+"""
+import datetime
+import io
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from accounts.models import Favorite, Profile
+from programs.models import Program, FavoriteBucket
+from programs.popularity import popular_program_counts
+
+
+@pytest.fixture
+def programs():
+    """Fixture to create a few located programs"""
+    cache.clear()
+    return [
+        Program.objects.create(
+            program_id=f'POP{i}',
+            name=f'Popular Program {i}',
+            latitude=0.0,
+            longitude=0.0
+        )
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def users():
+    return [User.objects.create_user(username=f'fan{i}', password='testpass123') for i in range(3)]
+
+
+def favorite(user, *program_ids):
+    Favorite.add_many(user, program_ids)
+
+
+@pytest.mark.django_db
+class TestPopularityCounters:
+    """Test that favorite writes keep the counters in step"""
+
+    def test_add_and_remove_update_counts(self, programs, users):
+        """Test the program count and today's bucket after adds and removes"""
+        favorite(users[0], 'POP0', 'POP1')
+        favorite(users[1], 'POP0')
+        favorite(users[1], 'POP0')  # already favorited, not counted twice
+        Favorite.remove_many(users[0], ['POP1'])
+
+        counts = dict(Program.objects.values_list('program_id', 'favorite_count'))
+        assert counts == {'POP0': 2, 'POP1': 0, 'POP2': 0}
+        today = timezone.localdate()
+        assert FavoriteBucket.objects.get(program_id='POP0', day=today).count == 2
+        assert FavoriteBucket.objects.get(program_id='POP1', day=today).count == 0
+
+    def test_remove_old_favorite_updates_its_own_bucket(self, programs, users):
+        """Test that removing a favorite takes it off the day it was added"""
+        favorite(users[0], 'POP0')
+        last_week = timezone.now() - datetime.timedelta(days=10)
+        Favorite.objects.filter(user=users[0]).update(created_at=last_week)
+        FavoriteBucket.objects.filter(program_id='POP0').update(day=last_week.date())
+        favorite(users[1], 'POP0')
+
+        Favorite.remove_many(users[0], ['POP0'])
+
+        assert FavoriteBucket.objects.get(program_id='POP0', day=last_week.date()).count == 0
+        assert FavoriteBucket.objects.get(program_id='POP0', day=timezone.localdate()).count == 1
+
+    def test_single_favorites_and_cascades_counted(self, programs, users):
+        """Test that favorites created or deleted one at a time, or with their user, are counted"""
+        Favorite.objects.create(user=users[0], program=programs[0])
+        Favorite.objects.create(user=users[1], program=programs[0])
+        Favorite.objects.create(user=users[1], program=programs[1])
+        assert Profile.objects.get(user=users[1]).favorite_count == 2
+
+        Favorite.objects.get(user=users[0]).delete()
+        users[1].delete()
+
+        counts = dict(Program.objects.values_list('program_id', 'favorite_count'))
+        assert counts == {'POP0': 0, 'POP1': 0, 'POP2': 0}
+        assert set(FavoriteBucket.objects.values_list('count', flat=True)) == {0}
+
+    def test_popular_counts_by_window(self, programs, users):
+        """Test ranking all time and for the last week"""
+        favorite(users[0], 'POP0', 'POP1')
+        favorite(users[1], 'POP0')
+        FavoriteBucket.objects.filter(program_id='POP0').update(day=timezone.localdate() - datetime.timedelta(days=30))
+        favorite(users[2], 'POP1')
+
+        assert popular_program_counts('all') == [('POP0', 2), ('POP1', 2)]
+        assert popular_program_counts('week') == [('POP1', 2)]
+
+
+@pytest.mark.django_db
+class TestPopularEndpoint:
+    """Test the popular programs endpoint"""
+
+    def test_popular_programs(self, programs, users):
+        """Test that programs come back most favorited first with their counts"""
+        favorite(users[0], 'POP1', 'POP2')
+        favorite(users[1], 'POP2')
+
+        response = APIClient().get(reverse('popular_programs'))
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [(program['program_id'], program['favorites']) for program in data] == [('POP2', 2), ('POP1', 1)]
+        assert data[0]['name'] == 'Popular Program 2'
+
+    def test_popular_programs_cached(self, programs, users, django_assert_num_queries):
+        """Test that a repeated request is served from the cache"""
+        favorite(users[0], 'POP1')
+        client = APIClient()
+        client.get(reverse('popular_programs'), {'window': 'week'})
+
+        with django_assert_num_queries(0):
+            response = client.get(reverse('popular_programs'), {'window': 'week'})
+
+        assert response.json()[0]['program_id'] == 'POP1'
+
+    def test_popular_programs_bad_window(self, programs):
+        """Test that an unknown window is rejected"""
+        response = APIClient().get(reverse('popular_programs'), {'window': 'decade'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestReconcilePopularity:
+    """Test rebuilding the counters from the favorites"""
+
+    def test_reconcile_fixes_drift(self, programs, users):
+        """Test that favorites written around the counters are counted after reconciling"""
+        favorite(users[0], 'POP0')
+        Favorite.objects.bulk_create([Favorite(user=users[1], program=programs[1])])
+        Program.objects.filter(program_id='POP2').update(favorite_count=5)
+        FavoriteBucket.objects.create(program=programs[2], day=timezone.localdate(), count=5)
+
+        call_command('reconcilepopularity', stdout=io.StringIO())
+
+        counts = dict(Program.objects.values_list('program_id', 'favorite_count'))
+        assert counts == {'POP0': 1, 'POP1': 1, 'POP2': 0}
+        buckets = dict(FavoriteBucket.objects.values_list('program_id', 'count'))
+        assert buckets == {'POP0': 1, 'POP1': 1}
@@ -3,6 +3,7 @@ Programs Tests
 Tests program listing and serialization
 """
 import pytest
+from django.core.cache import cache
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -194,6 +195,73 @@ class TestProgramSerialization:
         assert data['name'] == 'Minimal Program'
 
 
+@pytest.mark.django_db
+class TestProgramSections:
+    """Test the lazy per-program sections endpoint"""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+
+    def test_list_carries_only_section_titles(self, api_client, test_program_with_sections):
+        """Test that the list endpoint leaves section bodies out by default"""
+        response = api_client.get(reverse('list_programs'))
+
+        data = response.json()[0]
+        assert data['sections'] == [{'title': 'About'}, {'title': 'Requirements'}]
+
+    def test_list_full_sections_opt_in(self, api_client, test_program_with_sections):
+        """Test that ?sections=full embeds section content in the list"""
+        response = api_client.get(reverse('list_programs'), {'sections': 'full'})
+
+        data = response.json()[0]
+        assert data['sections'][0]['content'] == {'description': 'Study abroad in Paris'}
+
+    def test_list_without_sections(self, api_client, test_program_with_sections):
+        """Test that ?sections=none drops sections from the list"""
+        response = api_client.get(reverse('list_programs'), {'sections': 'none'})
+
+        assert response.json()[0]['sections'] == []
+
+    def test_sections_endpoint_returns_ordered_sections(self, api_client, test_program_with_sections):
+        """Test that the sections endpoint serves one program's sections in order"""
+        url = reverse('program_sections', args=['TEST001'])
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [section['title'] for section in data] == ['About', 'Requirements']
+        assert data[1]['content'] == {'requirements': ['Minimum GPA 3.0', 'French language']}
+
+    def test_sections_endpoint_is_cached(self, api_client, test_program_with_sections, django_assert_num_queries):
+        """Test that repeated requests are served from the cache"""
+        url = reverse('program_sections', args=['TEST001'])
+        api_client.get(url)
+
+        with django_assert_num_queries(0):
+            response = api_client.get(url)
+        assert len(response.json()) == 2
+
+    def test_sections_cache_invalidated_on_change(self, api_client, test_program_with_sections):
+        """Test that editing a section starts a new dataset version"""
+        url = reverse('program_sections', args=['TEST001'])
+        api_client.get(url)
+
+        section = ProgramSection.objects.get(title='About')
+        section.title = 'Overview'
+        section.save()
+
+        response = api_client.get(url)
+        assert response.json()[0]['title'] == 'Overview'
+
+    def test_sections_endpoint_program_not_found(self, api_client):
+        """Test requesting sections for a program that does not exist"""
+        url = reverse('program_sections', args=['MISSING'])
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
 @pytest.mark.django_db
 class TestProgramModel:
     """Test Program model"""
@@ -1,4 +1,7 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -60,3 +63,71 @@ class ReviewTests(TestCase):
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         self.assertEqual(Review.objects.count(), 0)
+
+
+class ReviewListingQueryTests(TestCase):
+    """Review listings should cost the same number of queries for any number of reviews"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.programs = [
+            Program.objects.create(program_id=f'prog{i}', name=f'Program {i}', latitude=0.0, longitude=0.0)
+            for i in range(10)
+        ]
+        self.alumni = [
+            Alumni.objects.create(
+                email=f'alumni{i}@test.com',
+                first_name='Alum',
+                last_name=str(i),
+                program=self.programs[i % 10],
+                graduation_year=2020
+            )
+            for i in range(50)
+        ]
+        session = self.client.session
+        session['alumni_id'] = self.alumni[0].id
+        session.save()
+
+    def create_reviews(self, count, **kwargs):
+        Review.objects.bulk_create([
+            Review(
+                program=kwargs.get('program', self.programs[i % 10]),
+                alumni=kwargs.get('alumni', self.alumni[i % 50]),
+                text=f'Review {i}',
+                rating=4
+            )
+            for i in range(count)
+        ])
+
+    def count_queries(self, url):
+        cache.clear()  # Both measurements look the logged-in alumni up again
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries), response.json()
+
+    def test_alumni_reviews_constant_queries(self):
+        url = reverse('alumni_reviews')
+        self.create_reviews(1, alumni=self.alumni[0])
+        single_queries, _ = self.count_queries(url)
+
+        self.create_reviews(499, alumni=self.alumni[0])
+        queries, data = self.count_queries(url)
+
+        self.assertEqual(len(data), 500)
+        self.assertEqual(queries, single_queries)
+        self.assertEqual(data[0]['alumni_name'], 'Alum 0')
+        self.assertEqual(data[0]['alumni_program'], 'Program 0')
+
+    def test_program_reviews_constant_queries(self):
+        url = reverse('program_reviews', args=['prog3'])
+        self.create_reviews(1, program=self.programs[3])
+        single_queries, _ = self.count_queries(url)
+
+        self.create_reviews(499, program=self.programs[3])
+        queries, data = self.count_queries(url)
+
+        self.assertEqual(len(data), 500)
+        self.assertEqual(queries, single_queries)
+        self.assertLessEqual(queries, 2)  # session lookup and the joined review query
+        self.assertEqual({review['program_name'] for review in data}, {'Program 3'})
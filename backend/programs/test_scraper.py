@@ -0,0 +1,266 @@
+"""
+Scraper Tests
+Tests crawling program and budget pages from a local fixture server
+"""
+import hashlib
+import importlib.util
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from programs.scraper import (
+    Fetcher, HostLimiter, PageCache, PageParser, make_session, parse_budget_page, parse_program_page,
+    scrape_all_program_ids, scrape_multiple_programs, scrape_vanderbilt_study_abroad
+)
+from programs import scraper
+
+PROGRAMS_DIR = Path(__file__).resolve().parent
+PROGRAM_PAGE = (PROGRAMS_DIR / 'helper.html').read_text(encoding='utf-8')
+BUDGET_PAGE = """<html><body><div class="budget">
+<h3>Spring 2025 Total Estimated Cost to Study Abroad: $42,103</h3>
+<h3>Academic Year 2025 Total Estimated Cost to Study Abroad: $80,000</h3>
+</div></body></html>"""
+SEARCH_PAGE = """<html><body><table><tbody>
+<tr><td><a href="/study-abroad/programs/?program_id=2261">CASA Cuba</a></td></tr>
+<tr><td><a href="/study-abroad/programs/?program_id=1003">IES Vienna</a></td></tr>
+<tr><td><a href="/study-abroad/programs/?program_id=2261">CASA Cuba again</a></td></tr>
+</tbody></table></body></html>"""
+
+
+class FixtureSite:
+    """
+    Serves the saved program page for every program id, recording every request it
+    answers. Pages carry an ETag and a Last-Modified date and are answered with 304 when
+    the request's validators match; the pages of the changed programs have new content.
+    """
+    LAST_MODIFIED = 'Mon, 06 Jan 2025 12:00:00 GMT'
+
+    def __init__(self, latency=0.02, missing=()):
+        self.latency = latency
+        self.missing = set(missing)
+        self.changed = set()
+        self.lock = threading.Lock()
+        self.active = self.max_active = 0
+        self.requests = []  # (path, start time, client port)
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                site.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}/study-abroad'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def handle(self, request):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.requests.append((request.path, time.monotonic(), request.client_address[1]))
+        try:
+            time.sleep(self.latency)
+            url = urlparse(request.path)
+            program_id = parse_qs(url.query).get('program_id', [''])[0]
+            if url.path.endswith('/program-search-results/'):
+                status, body = 200, SEARCH_PAGE
+            elif program_id in self.missing:
+                status, body = 404, 'Not found'
+            elif url.path.endswith('/programs/'):
+                status, body = 200, PROGRAM_PAGE
+            else:
+                status, body = 200, BUDGET_PAGE
+            if program_id in self.changed:
+                body += '<!-- changed -->'
+            etag = f'"{hashlib.md5(body.encode()).hexdigest()}"'
+            if status == 200 and (
+                request.headers.get('If-None-Match') == etag
+                or request.headers.get('If-None-Match') is None
+                and request.headers.get('If-Modified-Since') == self.LAST_MODIFIED and program_id not in self.changed
+            ):
+                status, body = 304, ''
+            payload = body.encode('utf-8')
+            request.send_response(status)
+            request.send_header('Content-Type', 'text/html; charset=utf-8')
+            request.send_header('ETag', etag)
+            request.send_header('Last-Modified', self.LAST_MODIFIED)
+            if status != 304:
+                request.send_header('Content-Length', str(len(payload)))
+            request.end_headers()
+            request.wfile.write(payload)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def site():
+    site = FixtureSite()
+    yield site
+    site.close()
+
+
+def fetcher(per_host=4, delay=0.0, workers=4, cache=None):
+    return Fetcher(make_session(workers), HostLimiter(per_host, delay), cache)
+
+
+@pytest.mark.parametrize('features', ['html.parser', pytest.param('lxml', marks=pytest.mark.skipif(
+    importlib.util.find_spec('lxml') is None, reason='lxml is not installed'))])
+@pytest.mark.parametrize('strain', [True, False])
+def test_parse_saved_page(features, strain):
+    parser = PageParser(features, strain)
+    stored = json.loads((PROGRAMS_DIR / 'vanderbilt_program_2261.json').read_text(encoding='utf-8'))
+    url = 'https://www.vanderbilt.edu/study-abroad/programs/?program_id=2261'
+    result = parse_program_page(PROGRAM_PAGE, '2261', url, parser)
+
+    assert {key: result[key] for key in ['program_details', 'homepage_url', 'img_url', 'sections']} == {
+        key: stored[key] for key in ['program_details', 'homepage_url', 'img_url', 'sections']
+    }
+    assert parse_budget_page(BUDGET_PAGE, parser) == {
+        'spring_2025': {'term': 'Spring', 'year': '2025', 'total_estimated_cost': '$42,103'},
+        'academic year_2025': {'term': 'Academic Year', 'year': '2025', 'total_estimated_cost': '$80,000'},
+    }
+    # Costs outside the main content are not read when the page has one
+    page = '<html><body><nav>Total Estimated Cost to Study Abroad: $1</nav><main>{}</main></body></html>'
+    block = BUDGET_PAGE.removeprefix('<html><body>').removesuffix('</body></html>')
+    assert parse_budget_page(page.format(block), parser) == parse_budget_page(BUDGET_PAGE, parser)
+    assert parse_budget_page(page.format(''), parser) == ({} if strain else {'total_estimated_cost': '$1'})
+
+
+def test_program_ids(site):
+    assert scrape_all_program_ids(fetcher(), base_url=site.base_url) == ['1003', '2261']
+
+
+def test_crawl_matches_single_program_scrape(site):
+    program_ids = [str(program_id) for program_id in range(1000, 1012)]
+    crawled = scrape_multiple_programs(program_ids, workers=4, fetcher=fetcher(), base_url=site.base_url)
+    single = scrape_vanderbilt_study_abroad('1005', fetcher(), base_url=site.base_url)
+
+    assert list(crawled) == program_ids
+    assert crawled['1005'] == single
+    assert list(single) == [
+        'program_id', 'program_details', 'budget_info', 'main_page_url', 'homepage_url', 'img_url', 'sections',
+        'budget_page_url',
+    ]
+    assert single['budget_page_url'] == f'{site.base_url}/budgets/?program_id=1005'
+
+
+def test_failed_program_skipped(site):
+    site.missing.add('1001')
+    crawled = scrape_multiple_programs(['1000', '1001', '1002'], workers=2, fetcher=fetcher(), base_url=site.base_url)
+
+    assert list(crawled) == ['1000', '1002']
+
+
+def test_concurrent_and_pooled(site):
+    scrape_multiple_programs([str(program_id) for program_id in range(20)], workers=4, fetcher=fetcher(per_host=3),
+                             base_url=site.base_url)
+
+    assert len(site.requests) == 40
+    # Requests overlap, up to the per-host limit, over kept-alive connections
+    assert site.max_active == 3
+    assert len({port for _, _, port in site.requests}) <= 4
+
+
+def test_politeness_delay(site):
+    limiter = HostLimiter(per_host=4, delay=0.05)
+    starts = []
+
+    def request(url):
+        with limiter.request(url):
+            starts.append((urlparse(url).netloc, time.monotonic()))
+
+    urls = [f'{site.base_url}/programs/'] * 4 + ['http://other.example/']
+    threads = [threading.Thread(target=request, args=(url,)) for url in urls]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Requests to one host start delay apart; another host does not wait for them
+    site_starts = sorted(start for host, start in starts if host != 'other.example')
+    assert all(later - earlier >= 0.049 for earlier, later in zip(site_starts, site_starts[1:]))
+    assert [start for host, start in starts if host == 'other.example'][0] < site_starts[-1]
+
+    scrape_multiple_programs(['1000', '1001', '1002'], workers=4, fetcher=fetcher(delay=0.05), base_url=site.base_url)
+    arrivals = sorted(start for _, start, _ in site.requests)
+    assert arrivals[-1] - arrivals[0] >= 0.24
+
+
+def test_recrawl_revalidates_cached_pages(site, tmp_path, monkeypatch):
+    program_ids = ['1000', '1001', '1002']
+    first = fetcher(cache=PageCache(tmp_path))
+    crawled = scrape_multiple_programs(program_ids, workers=2, fetcher=first, base_url=site.base_url)
+
+    def not_parsed(*args):
+        raise AssertionError('An unchanged page was parsed again')
+
+    monkeypatch.setattr(scraper, 'parse_program_page', not_parsed)
+    monkeypatch.setattr(scraper, 'parse_budget_page', not_parsed)
+    again = fetcher(cache=PageCache(tmp_path))
+
+    assert scrape_multiple_programs(program_ids, workers=2, fetcher=again, base_url=site.base_url) == crawled
+    assert first.stats['not_modified'] == 0
+    assert again.stats == {'requests': 6, 'not_modified': 6, 'bytes': 0}
+
+
+def test_changed_page_fetched_again(site, tmp_path):
+    cache = PageCache(tmp_path)
+    scrape_multiple_programs(['1000', '1001'], workers=2, fetcher=fetcher(cache=cache), base_url=site.base_url)
+    site.changed.add('1001')
+    again = fetcher(cache=cache)
+    crawled = scrape_multiple_programs(['1000', '1001'], workers=2, fetcher=again, base_url=site.base_url)
+
+    assert again.stats['not_modified'] == 2
+    assert again.stats['bytes'] == len(PROGRAM_PAGE.encode()) + len(BUDGET_PAGE) + 2 * len('<!-- changed -->')
+    assert crawled['1000'] == scrape_vanderbilt_study_abroad('1000', fetcher(), base_url=site.base_url)
+
+
+def test_last_modified_revalidation(site, tmp_path):
+    cache = PageCache(tmp_path)
+    url = f'{site.base_url}/budgets/?program_id=1000'
+    fetcher(cache=cache).get_parsed(url, parse_budget_page, 'budget')
+    # Servers without ETags are revalidated by date
+    cache.put(url, dict(cache.get(url), etag=None))
+    again = fetcher(cache=cache)
+
+    assert again.get_parsed(url, parse_budget_page, 'budget')['spring_2025']['total_estimated_cost'] == '$42,103'
+    assert again.stats['not_modified'] == 1
+    # A parse the cache does not have yet is made from the cached page
+    assert again.get_parsed(url, len, 'length') == len(BUDGET_PAGE)
+    assert again.stats['bytes'] == 0
+
+
+def test_cache_expiry_and_eviction(site, tmp_path):
+    url = f'{site.base_url}/budgets/?program_id=1000'
+    expired = PageCache(tmp_path, ttl=0)
+    fetcher(cache=expired).get_parsed(url, parse_budget_page, 'budget')
+    again = fetcher(cache=expired)
+    again.get_parsed(url, parse_budget_page, 'budget')
+
+    assert again.stats['not_modified'] == 0
+
+    entry = {'url': '', 'body': 'x' * 100}
+    size = len(json.dumps(entry)) + len('https://a.example/1')
+    cache = PageCache(tmp_path / 'small', max_bytes=2 * size)
+    for page in '123':
+        cache.put(f'https://a.example/{page}', dict(entry, url=f'https://a.example/{page}'))
+        if page == '2':
+            time.sleep(0.01)
+            cache.touch('https://a.example/1')
+
+    # The least recently used page makes room for the new one, on disk and in later runs
+    assert [page for page in '123' if cache.path(f'https://a.example/{page}').exists()] == ['1', '3']
+    assert sorted(PageCache(tmp_path / 'small').sizes) == sorted(cache.sizes)
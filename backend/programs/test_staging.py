@@ -0,0 +1,205 @@
+"""
+Staging Tests
+Tests loading the catalog into a staged version and switching readers to it
+"""
+import io
+import json
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+from programs.caching import get_dataset_version
+from programs.loading import load_programs
+from programs.models import CatalogVersion, Program, BudgetInfo, ProgramSection, SectionContent
+from programs.staging import (
+    CatalogRejected, RefreshInProgress, StagedCatalog, activate, collect_versions, discard_staged, refresh_programs
+)
+
+
+def record(program_id, name, sections=None, cost='$30,000'):
+    return {
+        'program_id': program_id,
+        'program_details': {'name': name, 'latitude': 48.2, 'longitude': 16.3, 'continent': 'Europe'},
+        'budget_info': {'fall_2025': {'term': 'Fall', 'year': '2025', 'total_estimated_cost': cost}},
+        'sections': sections if sections is not None else [
+            {'title': 'Overview', 'content': [f'<p>{name}</p>']},
+            {'title': 'Housing', 'content': ['<p>Shared apartments</p>']},
+        ],
+    }
+
+
+@pytest.fixture
+def catalog():
+    cache.clear()
+    catalog = {
+        'STAGE1': record('STAGE1', 'Vienna: Music'),
+        'STAGE2': record('STAGE2', 'Toulouse: Business'),
+    }
+    refresh_programs(catalog)
+    return catalog
+
+
+def changed(catalog):
+    catalog = dict(catalog)
+    catalog['STAGE1'] = record(
+        'STAGE1', 'Vienna: Music and Art', sections=[{'title': 'Overview', 'content': ['<p>New</p>']}], cost='$32,000'
+    )
+    catalog['STAGE3'] = record('STAGE3', 'Kyoto: Japanese')
+    return catalog
+
+
+def sections_of(program_id):
+    response = APIClient().get(reverse('program_sections', args=[program_id]))
+    return response.status_code, json.loads(response.content) if response.status_code == 200 else None
+
+
+@pytest.mark.django_db
+class TestRefreshPrograms:
+    """Test staged loads, activation and collection of old versions"""
+
+    def test_first_refresh(self, catalog):
+        version = CatalogVersion.objects.get()
+
+        assert version.state == CatalogVersion.ACTIVE
+        assert Program.objects.count() == 2
+        assert ProgramSection.objects.count() == 4
+
+    def test_staged_rows_hidden_until_activation(self, catalog):
+        staging = StagedCatalog(CatalogVersion.objects.create())
+        load_programs(changed(catalog), staging=staging)
+
+        # Readers still see the complete previous version
+        assert sorted(Program.objects.values_list('program_id', flat=True)) == ['STAGE1', 'STAGE2']
+        assert Program.objects.get(program_id='STAGE1').name == 'Vienna: Music'
+        assert BudgetInfo.objects.get(program_id='STAGE1').total_estimated_cost == '$30,000'
+        assert [section['title'] for section in sections_of('STAGE1')[1]] == ['Overview', 'Housing']
+        assert sections_of('STAGE3')[0] == 404
+
+        activate(staging)
+
+        program = Program.objects.prefetch_related('budget_info', 'sections').get(program_id='STAGE1')
+        assert program.name == 'Vienna: Music and Art'
+        assert [budget.total_estimated_cost for budget in program.budget_info.all()] == ['$32,000']
+        assert [section.content for section in program.sections.all()] == [['<p>New</p>']]
+        assert sections_of('STAGE3')[0] == 200
+
+    def test_old_rows_collected(self, catalog):
+        first = refresh_programs(changed(catalog))
+        second = refresh_programs(catalog, remove_missing=True)
+
+        # The version before the active one is kept, the one before that is collected
+        assert first['collected']['sections'] == 0
+        assert second['collected'] == {'budgets': 1, 'sections': 2, 'versions': 1, 'bodies': 1}
+        assert second['programs']['removed'] == 1
+        assert ProgramSection.all_versions.filter(program_id='STAGE1').count() == 3
+
+        assert collect_versions(keep=0) == {'budgets': 1, 'sections': 1, 'versions': 1, 'bodies': 1}
+        assert ProgramSection.all_versions.count() == ProgramSection.objects.count() == 4
+        assert list(CatalogVersion.objects.values_list('id', flat=True)) == [second['version']]
+
+    def test_activation_changes_dataset_version(self, catalog):
+        version = get_dataset_version()
+
+        report = refresh_programs(changed(catalog))
+
+        assert get_dataset_version() != version
+        assert get_dataset_version().startswith(f'{report["version"]}.')
+
+    def test_unchanged_refresh_keeps_version(self, catalog):
+        version = CatalogVersion.objects.get()
+        report = refresh_programs(catalog)
+
+        assert report['version'] == version.id
+        assert report['programs']['unchanged'] == 2
+        assert list(CatalogVersion.objects.all()) == [version]
+
+    def test_rejected(self, catalog):
+        with pytest.raises(CatalogRejected, match='2 of 2 programs would be removed'):
+            refresh_programs({'STAGE3': record('STAGE3', 'Kyoto: Japanese')}, remove_missing=True)
+
+        assert not CatalogVersion.objects.filter(state=CatalogVersion.STAGING).exists()
+        assert not Program.all_versions.filter(program_id='STAGE3').exists()
+        assert Program.objects.count() == 2
+
+    def test_failed_load_discarded(self, catalog):
+        def records():
+            yield from changed(catalog).items()
+            raise OSError('disk gone')
+
+        with pytest.raises(OSError):
+            refresh_programs(records(), chunk_size=1)
+
+        assert CatalogVersion.objects.count() == 1
+        assert Program.all_versions.count() == 2
+        assert ProgramSection.all_versions.filter(removed_in__isnull=False).count() == 0
+        assert BudgetInfo.all_versions.get(program_id='STAGE1').total_estimated_cost == '$30,000'
+
+    def test_one_refresh_at_a_time(self, catalog):
+        # A refresh that is still loading, or died before activating
+        staging = StagedCatalog(CatalogVersion.objects.create())
+        load_programs(changed(catalog), staging=staging)
+
+        with pytest.raises(RefreshInProgress, match=f'Catalog version {staging.version.id} is already staging'):
+            refresh_programs(changed(catalog))
+
+        assert CatalogVersion.objects.filter(state=CatalogVersion.STAGING).get() == staging.version
+        assert Program.all_versions.filter(program_id='STAGE3').exists()
+
+    def test_interrupted_load_discarded(self, catalog):
+        # A staged version left behind by a process that died before activating it
+        load_programs(changed(catalog), staging=StagedCatalog(CatalogVersion.objects.create()))
+
+        assert discard_staged() == 1
+        assert ProgramSection.all_versions.count() == 4
+        report = load_programs(catalog)
+        assert report['programs'] == {'created': 0, 'updated': 0, 'unchanged': 2, 'removed': 0}
+        assert SectionContent.objects.filter(sections__isnull=True).count() == 0
+
+
+@pytest.mark.django_db
+class TestStagedCommand:
+    """Test loadprograms --staged and purgecatalog"""
+
+    def test_staged_load(self, catalog, tmp_path):
+        path = tmp_path / 'programs.json'
+        path.write_text(json.dumps(changed(catalog)))
+        out = io.StringIO()
+
+        call_command('loadprograms', file=str(path), staged=True, stdout=out)
+
+        version = CatalogVersion.objects.get(state=CatalogVersion.ACTIVE)
+        assert f'Active catalog version: {version.id}' in out.getvalue()
+        assert Program.objects.count() == 3
+
+        out = io.StringIO()
+        call_command('purgecatalog', keep=0, stdout=out)
+        assert 'Retired versions deleted: 1' in out.getvalue()
+
+    def test_staged_load_left_behind(self, catalog, tmp_path):
+        load_programs(changed(catalog), staging=StagedCatalog(CatalogVersion.objects.create()))
+        path = tmp_path / 'programs.json'
+        path.write_text(json.dumps(changed(catalog)))
+        out = io.StringIO()
+
+        call_command('loadprograms', file=str(path), stdout=out)
+
+        assert 'is already staging' in out.getvalue()
+        assert CatalogVersion.objects.filter(state=CatalogVersion.STAGING).exists()
+        assert Program.objects.count() == 2
+
+        call_command('loadprograms', file=str(path), discard_staged=True, stdout=io.StringIO())
+
+        assert not CatalogVersion.objects.filter(state=CatalogVersion.STAGING).exists()
+        assert Program.objects.count() == 3
+
+    def test_rejected_file(self, catalog, tmp_path):
+        path = tmp_path / 'programs.json'
+        path.write_text('{}')
+        out = io.StringIO()
+
+        call_command('loadprograms', file=str(path), staged=True, remove_missing=True, stdout=out)
+
+        assert 'Staged catalog rejected: The staged catalog has no programs' in out.getvalue()
+        assert Program.objects.count() == 2
@@ -0,0 +1,78 @@
+"""
+Streaming Tests
+Tests reading and writing catalog files one record at a time
+"""
+import io
+import json
+
+import pytest
+from programs.streaming import iter_json_object, iter_json_lines, read_programs, write_programs
+
+
+@pytest.fixture
+def catalog():
+    return {
+        '1003': {'program_id': '1003', 'program_details': {'name': 'IES Vienna: Music', 'latitude': 48.2082}},
+        '1004': {'program_id': '1004', 'program_details': {'name': 'CET Prague', 'minimum_gpa': 3}, 'sections': []},
+        '1005': {'program_id': '1005', 'sections': [{'title': 'Overview', 'content': ['<p>Ünïcode "quoted"</p>']}]},
+    }
+
+
+class TestIterJsonObject:
+    """Test decoding a JSON object one member at a time"""
+
+    @pytest.mark.parametrize('read_size', [1, 3, 16, 65536])
+    def test_matches_json_load(self, catalog, read_size):
+        text = json.dumps(catalog, indent=4)
+        assert list(iter_json_object(io.StringIO(text), read_size=read_size)) == list(catalog.items())
+
+    def test_numbers_split_across_reads(self):
+        assert list(iter_json_object(io.StringIO('{"a": 123456789, "b": 1.5e3}'), read_size=2)) == [
+            ('a', 123456789), ('b', 1500.0)
+        ]
+
+    def test_empty_object(self):
+        assert list(iter_json_object(io.StringIO(' { } '))) == []
+
+    @pytest.mark.parametrize('text', ['[1, 2]', '{"a" 1}', '{"a": 1 "b": 2}', '{"a": {"b": 1}', '{"a": 1} {}', ''])
+    def test_invalid(self, text):
+        with pytest.raises(json.JSONDecodeError):
+            list(iter_json_object(io.StringIO(text), read_size=4))
+
+    def test_records_yielded_before_error(self):
+        records = iter_json_object(io.StringIO('{"a": 1, "b": '), read_size=4)
+        assert next(records) == ('a', 1)
+        with pytest.raises(json.JSONDecodeError):
+            next(records)
+
+
+class TestJsonLines:
+    """Test JSON Lines catalogs"""
+
+    def test_iter_json_lines(self, catalog):
+        text = '\n'.join(json.dumps(record) for record in catalog.values()) + '\n\n'
+        assert list(iter_json_lines(io.StringIO(text))) == list(catalog.items())
+
+    def test_invalid_line(self):
+        with pytest.raises(json.JSONDecodeError, match='Line 2'):
+            list(iter_json_lines(io.StringIO('{"program_id": "1"}\n{"program_id": \n')))
+
+
+class TestReadWritePrograms:
+    """Test writing catalogs in both formats and reading them back"""
+
+    @pytest.mark.parametrize('name', ['data.json', 'data.jsonl', 'data.ndjson'])
+    def test_round_trip(self, catalog, tmp_path, name):
+        path = tmp_path / name
+        write_programs(path, iter(catalog.items()))
+        assert dict(read_programs(path)) == catalog
+
+    def test_same_layout_as_json_dump(self, catalog, tmp_path):
+        path = tmp_path / 'data.json'
+        write_programs(path, catalog.items())
+        assert path.read_text(encoding='utf-8') == json.dumps(catalog, indent=4)
+
+    def test_empty_catalog(self, tmp_path):
+        path = tmp_path / 'data.json'
+        write_programs(path, [])
+        assert json.loads(path.read_text()) == {}
@@ -0,0 +1,123 @@
+"""
+Thumbnail Tests
+Tests the program image pipeline against local files
+"""
+import pytest
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+from programs.models import Program, ProgramImage
+from programs.thumbnails import FileFetcher, HttpFetcher, generate_thumbnails, thumbnail_root
+
+
+@pytest.fixture
+def image_dir(tmp_path, settings):
+    """Fixture to store media in a temporary directory and provide a source image"""
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    source_dir = tmp_path / 'source'
+    source_dir.mkdir()
+    Image.new('RGB', (1200, 800), color=(200, 30, 30)).save(source_dir / 'paris.jpg')
+    return source_dir
+
+
+@pytest.fixture
+def test_program():
+    """Fixture to create a program with a remote image"""
+    return Program.objects.create(
+        program_id='TEST001',
+        name='Study in Paris',
+        img_url='https://cdn.example.com/uploads/paris.jpg',
+        latitude=48.8566,
+        longitude=2.3522
+    )
+
+
+@pytest.mark.django_db
+class TestGenerateThumbnails:
+    """Test building thumbnails"""
+
+    def test_variants_written(self, image_dir, test_program):
+        """Test that every size is written in both formats"""
+        report = generate_thumbnails([test_program], fetcher=FileFetcher(image_dir))
+
+        assert report['created'] == 1
+        image = ProgramImage.objects.get(program=test_program)
+        assert image.variants['small']['width'] == 160
+        assert image.variants['large']['height'] == 640
+        for info in image.variants.values():
+            assert (thumbnail_root() / info['webp']).exists()
+            assert (thumbnail_root() / info['jpeg']).exists()
+            assert image.source_hash in info['webp']
+
+    def test_unchanged_image_not_fetched_again(self, image_dir, test_program):
+        """Test that programs with thumbnails for the same URL are skipped"""
+        fetcher = FileFetcher(image_dir)
+        generate_thumbnails([test_program], fetcher=fetcher)
+
+        report = generate_thumbnails([test_program], fetcher=lambda url: pytest.fail('fetched again'))
+        assert report == {'created': 0, 'skipped': 1, 'failed': 0, 'errors': {}}
+
+    def test_fetch_failure_reported(self, image_dir, test_program):
+        """Test that a missing image is reported instead of raising"""
+        test_program.img_url = 'https://cdn.example.com/uploads/missing.jpg'
+        report = generate_thumbnails([test_program], fetcher=FileFetcher(image_dir))
+
+        assert report['failed'] == 1
+        assert 'TEST001' in report['errors']
+        assert not ProgramImage.objects.exists()
+
+    def test_shared_image_rendered_concurrently(self, image_dir, test_program):
+        """Test that programs sharing an image can be rendered at the same time"""
+        programs = [test_program] + [
+            Program.objects.create(program_id=f'TEST10{index}', name='Paris again', img_url=test_program.img_url,
+                                   latitude=48.8566, longitude=2.3522)
+            for index in range(7)
+        ]
+        report = generate_thumbnails(programs, fetcher=FileFetcher(image_dir), workers=8)
+
+        assert report['created'] == 8
+        assert len({image.source_hash for image in ProgramImage.objects.all()}) == 1
+        assert not list(thumbnail_root().rglob('*.part'))
+        for info in ProgramImage.objects.get(program=test_program).variants.values():
+            with Image.open(thumbnail_root() / info['jpeg']) as image:
+                image.verify()
+
+    def test_oversized_image_refused(self, image_dir):
+        """Test that the HTTP fetcher refuses images over its size cap"""
+        url = (image_dir / 'paris.jpg').as_uri()
+
+        assert HttpFetcher()(url) == (image_dir / 'paris.jpg').read_bytes()
+        with pytest.raises(ValueError):
+            HttpFetcher(max_bytes=100)(url)
+
+
+@pytest.mark.django_db
+class TestServeThumbnails:
+    """Test thumbnail URLs and responses"""
+
+    def test_program_list_includes_thumbnails(self, image_dir, test_program):
+        """Test that the program list links to the generated thumbnails"""
+        generate_thumbnails([test_program], fetcher=FileFetcher(image_dir))
+
+        response = APIClient().get(reverse('list_programs'))
+
+        thumbnails = response.json()[0]['thumbnails']
+        assert set(thumbnails) == {'small', 'medium', 'large'}
+        assert thumbnails['medium']['webp'].startswith('http://testserver/api/programs/thumbnails/')
+
+    def test_thumbnail_served_immutable(self, image_dir, test_program):
+        """Test that thumbnails are served with far-future caching"""
+        generate_thumbnails([test_program], fetcher=FileFetcher(image_dir))
+        path = ProgramImage.objects.get().variants['small']['webp']
+
+        response = APIClient().get(reverse('program_thumbnail', args=[path]))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Cache-Control'] == 'public, max-age=31536000, immutable'
+
+    def test_missing_thumbnail(self, image_dir):
+        """Test requesting a thumbnail that does not exist"""
+        response = APIClient().get(reverse('program_thumbnail', args=['ab/missing-small.webp']))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,165 @@
+"""
+Thumbnail pipeline for program images.
+
+Each program's img_url is fetched once, resized into a few widths and written under
+MEDIA_ROOT/thumbnails as WebP and JPEG files named after a hash of the source image.
+Because a name never points at different bytes, the files can be cached forever.
+"""
+import hashlib
+import io
+import os
+import tempfile
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlparse, unquote
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from PIL import Image
+
+# Variant name -> maximum width in pixels
+THUMBNAIL_SIZES = {
+    'small': 160,
+    'medium': 480,
+    'large': 960,
+}
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+THUMBNAIL_DIR = 'thumbnails'
+# Largest source image HttpFetcher downloads
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+
+
+class HttpFetcher:
+    """Fetches images over HTTP, refusing any larger than max_bytes"""
+
+    def __init__(self, timeout=15, max_bytes=MAX_IMAGE_BYTES):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+
+    def __call__(self, url):
+        request = urllib.request.Request(url, headers={'User-Agent': 'AnchorAbroad thumbnailer'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            # The declared length may be missing or wrong, so the read itself is capped too
+            if int(response.headers.get('Content-Length') or 0) > self.max_bytes:
+                raise ValueError(f'Image larger than {self.max_bytes} bytes')
+            data = response.read(self.max_bytes + 1)
+        if len(data) > self.max_bytes:
+            raise ValueError(f'Image larger than {self.max_bytes} bytes')
+        return data
+
+
+class FileFetcher:
+    """Reads images from disk, for file:// URLs or paths relative to a root directory"""
+
+    def __init__(self, root=None):
+        self.root = Path(root) if root else None
+
+    def __call__(self, url):
+        parsed = urlparse(url)
+        if parsed.scheme == 'file':
+            path = Path(unquote(parsed.path))
+        else:
+            path = self.root / Path(unquote(parsed.path)).name
+        return path.read_bytes()
+
+
+def get_fetcher():
+    """Return the fetcher configured by THUMBNAIL_FETCHER"""
+    return import_string(getattr(settings, 'THUMBNAIL_FETCHER', 'programs.thumbnails.HttpFetcher'))()
+
+
+def thumbnail_root():
+    return Path(settings.MEDIA_ROOT) / THUMBNAIL_DIR
+
+
+def relative_path(source_hash, variant, extension):
+    return f'{source_hash[:2]}/{source_hash}-{variant}.{extension}'
+
+
+def render_variants(source_hash, data):
+    """Resize one source image into every variant and write the files that are missing"""
+    root = thumbnail_root()
+    variants = {}
+    with Image.open(io.BytesIO(data)) as image:
+        image.load()
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        for variant, width in THUMBNAIL_SIZES.items():
+            resized = image.copy()
+            resized.thumbnail((width, width * 4))
+            files = {}
+            for extension, (image_format, options) in THUMBNAIL_FORMATS.items():
+                path = relative_path(source_hash, variant, extension)
+                target = root / path
+                if not target.exists():
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    output = resized if image_format != 'JPEG' else resized.convert('RGB')
+                    # Write to a temporary file first so readers never see half a file. Each writer
+                    # gets its own, since programs sharing a source image are rendered concurrently.
+                    with tempfile.NamedTemporaryFile(dir=target.parent, suffix='.part', delete=False) as partial:
+                        try:
+                            output.save(partial, image_format, **options)
+                        except BaseException:
+                            partial.close()
+                            os.unlink(partial.name)
+                            raise
+                    os.chmod(partial.name, 0o644)
+                    os.replace(partial.name, target)
+                files[extension] = path
+            variants[variant] = {'width': resized.width, 'height': resized.height, **files}
+    return variants
+
+
+def process_image(program_id, url, fetcher):
+    """Fetch and resize one program image, returning (program_id, result or error)"""
+    try:
+        data = fetcher(url)
+        source_hash = hashlib.sha256(data).hexdigest()
+        return program_id, {'source_hash': source_hash, 'variants': render_variants(source_hash, data)}
+    except Exception as e:
+        return program_id, {'error': str(e)}
+
+
+def generate_thumbnails(programs, fetcher=None, workers=None, force=False):
+    """
+    Build thumbnails for the given programs in a bounded worker pool.
+    Programs whose img_url already has thumbnails are skipped unless force is set.
+    Returns a dict with created, skipped and failed counts plus per-program errors.
+    """
+    from .models import ProgramImage
+
+    fetcher = fetcher or get_fetcher()
+    workers = workers or getattr(settings, 'THUMBNAIL_WORKERS', 4)
+    existing = {image.program_id: image for image in ProgramImage.objects.all()}
+
+    pending = []
+    skipped = 0
+    for program in programs:
+        if not program.img_url:
+            continue
+        image = existing.get(program.program_id)
+        if not force and image and image.source_url == program.img_url:
+            skipped += 1
+            continue
+        pending.append(program)
+
+    report = {'created': 0, 'skipped': skipped, 'failed': 0, 'errors': {}}
+    urls = {program.program_id: program.img_url for program in pending}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(lambda program: process_image(program.program_id, program.img_url, fetcher), pending)
+        # Database writes stay on this thread; the workers only fetch and resize
+        for program_id, result in results:
+            if 'error' in result:
+                report['failed'] += 1
+                report['errors'][program_id] = result['error']
+                continue
+            ProgramImage.objects.update_or_create(
+                program_id=program_id,
+                defaults={'source_url': urls[program_id], **result},
+            )
+            report['created'] += 1
+    return report
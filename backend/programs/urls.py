@@ -6,5 +6,11 @@ from . import views
 
 urlpatterns = [
     path('', views.list_programs, name='list_programs'),
+    path('facets/', views.program_facets, name='program_facets'),
+    path('popular/', views.popular_programs, name='popular_programs'),
+    path('thumbnails/<path:path>', views.program_thumbnail, name='program_thumbnail'),
+    path('section-bodies/<str:content_hash>/', views.section_body, name='section_body'),
+    path('<str:program_id>/sections/', views.program_sections, name='program_sections'),
+    path('<str:program_id>/reviews/', views.program_reviews, name='program_reviews'),
     path('<str:program_id>/reviews/add/', views.add_review, name='add_review'),
 ]
\ No newline at end of file
@@ -1,26 +1,170 @@
 # Names: Daniel, Jacob, Maharshi, Ben
 # Total time: 15 mins 
 
-from django.http import JsonResponse
+import json
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.http import JsonResponse, HttpResponse
 from django.shortcuts import render
-from .models import Program
+from django.views.static import serve
+from .models import Program, ProgramSection, Review, SectionContent
+from .caching import dataset_cache_key
+from .facets import FACETS, get_facet_index
+from .popularity import POPULAR_WINDOWS, POPULAR_CACHE_TIMEOUT, popular_cache_key, popular_program_counts
+from .thumbnails import thumbnail_root
 from accounts.models import Alumni
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from accounts.permissions import IsAuthenticatedOrAlumni
-from .serializers import ProgramSerializer, ReviewSerializer
+from .serializers import (
+    ProgramSerializer, ProgramSectionSerializer, ProgramSectionRefSerializer, ProgramSummarySerializer,
+    ReviewSerializer
+)
 from rest_framework.response import Response
 from rest_framework import status
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def list_programs(request): # List all the programs.
-    programs = Program.objects.all()
-    serializer = ProgramSerializer(programs, many=True)
+    # Section bodies are served by program_sections; ?sections=full restores them here
+    section_detail = request.query_params.get('sections', 'titles')
+    if section_detail not in ('full', 'titles', 'none'):
+        section_detail = 'titles'
+
+    programs = Program.objects.select_related('image').prefetch_related(
+        'budget_info',
+        Prefetch('reviews', queryset=ReviewSerializer.setup_eager_loading(Review.objects.all())),
+    )
+    if section_detail == 'full':
+        programs = programs.prefetch_related(
+            Prefetch('sections', queryset=ProgramSection.objects.select_related('body'))
+        )
+    elif section_detail == 'titles':
+        programs = programs.prefetch_related(
+            Prefetch('sections', queryset=ProgramSection.objects.only('id', 'program_id', 'title', 'order'))
+        )
+
+    serializer = ProgramSerializer(
+        programs, many=True, context={'sections': section_detail, 'request': request}
+    )
     print("Program view")
     return JsonResponse(serializer.data, safe=False)
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def program_facets(request):
+    """
+    Get the programs matching the given facet filters and the counts for every facet value.
+    Filters repeat a facet to allow several values, e.g. ?continent=Europe&continent=Asia.
+    """
+    filters = {
+        facet: request.query_params.getlist(facet)
+        for facet in FACETS
+        if request.query_params.getlist(facet)
+    }
+    return Response(get_facet_index().search(filters), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def popular_programs(request):
+    """
+    Get the most favorited programs from the popularity counters.
+    ?window=week or ?window=month ranks by favorites added in that many days instead of all time.
+    Lists are cached for a few minutes within each daily bucket.
+    """
+    window = request.query_params.get('window', 'all')
+    if window not in POPULAR_WINDOWS:
+        return Response(
+            {'error': f"window must be one of: {', '.join(POPULAR_WINDOWS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+    except ValueError:
+        return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+
+    cache_key = popular_cache_key(window, limit)
+    payload = cache.get(cache_key)
+    if payload is None:
+        counts = popular_program_counts(window, limit)
+        program_ids = [program_id for program_id, _ in counts]
+        programs = Program.objects.select_related('image').in_bulk(program_ids)
+        context = {'request': request, 'review_stats': ProgramSummarySerializer.review_stats(program_ids)}
+        data = []
+        for program_id, favorites in counts:
+            summary = ProgramSummarySerializer(programs[program_id], context=context).data
+            summary['favorites'] = favorites
+            data.append(summary)
+        payload = json.dumps(data)
+        cache.set(cache_key, payload, POPULAR_CACHE_TIMEOUT)
+    return HttpResponse(payload, content_type='application/json')
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def program_sections(request, program_id):
+    """
+    Get the ordered sections for one program.
+    With ?content=refs each body is replaced by its hash, to be fetched from section_body.
+    The serialized JSON is cached until the program dataset changes.
+    """
+    refs = request.query_params.get('content') == 'refs'
+    cache_key = dataset_cache_key('sections', 'refs' if refs else 'full', program_id)
+    payload = cache.get(cache_key)
+    if payload is None:
+        sections = ProgramSection.objects.filter(program_id=program_id)
+        if refs:
+            data = ProgramSectionRefSerializer(sections, many=True).data
+        else:
+            data = ProgramSectionSerializer(sections.select_related('body'), many=True).data
+        if not data and not Program.objects.filter(program_id=program_id).exists():
+            return Response({'error': 'Program not found'}, status=status.HTTP_404_NOT_FOUND)
+        payload = json.dumps(data)
+        cache.set(cache_key, payload, timeout=None)
+    return HttpResponse(payload, content_type='application/json')
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def section_body(request, content_hash):
+    """
+    Get a shared section body by its content hash.
+    Bodies never change for a given hash, so clients can cache them indefinitely.
+    """
+    try:
+        content = SectionContent.load(content_hash)
+    except SectionContent.DoesNotExist:
+        return Response({'error': 'Section body not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    response = JsonResponse(content, safe=False)
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response['ETag'] = f'"{content_hash}"'
+    return response
+
+
+def program_thumbnail(request, path):
+    """
+    Serve a generated program thumbnail.
+    File names contain a hash of the source image, so responses never go stale.
+    """
+    response = serve(request, path, document_root=thumbnail_root())
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def program_reviews(request, program_id):
+    """Get all reviews for a program"""
+    reviews = ReviewSerializer.setup_eager_loading(Review.objects.filter(program_id=program_id))
+    serializer = ReviewSerializer(reviews, many=True)
+    if not serializer.data and not Program.objects.filter(program_id=program_id).exists():
+        return Response({'error': 'Program not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(serializer.data, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticatedOrAlumni])
 def add_review(request, program_id):
@@ -29,14 +173,13 @@ def add_review(request, program_id):
     Only allows Alumni to post reviews.
     """
     # Check if user is an alumni
-    alumni_id = request.session.get('alumni_id')
-    if not alumni_id:
+    alumni = request.principal
+    if not isinstance(alumni, Alumni):
         return Response({'error': 'Only alumni can submit reviews'}, status=status.HTTP_403_FORBIDDEN)
     
     try:
         program = Program.objects.get(program_id=program_id)
-        alumni = Alumni.objects.get(id=alumni_id)
-    except (Program.DoesNotExist, Alumni.DoesNotExist):
+    except Program.DoesNotExist:
         return Response({'error': 'Program or Alumni not found'}, status=status.HTTP_404_NOT_FOUND)
 
     # Check if alumni already reviewed this program (optional, but good practice)
@@ -8,10 +8,13 @@ import { Marker, Popup } from 'react-leaflet';
 import { Icon } from 'leaflet';
 import { Typography } from '@mui/material';
 
+// Programs whose location could not be resolved have no coordinates and get no marker
+export const hasLocation = (program) => program.latitude != null && program.longitude != null;
+
 export function MarkerManager({ markers, onMarkerClick }) {
   return (
     <>
-      {markers.map((marker, idx) => (
+      {markers.filter(hasLocation).map((marker, idx) => (
         <Marker
           key={marker.program_id ?? idx}
           position={[marker.latitude, marker.longitude]}
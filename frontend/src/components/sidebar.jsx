@@ -45,6 +45,7 @@ const Sidebar = ({ open, onClose, selectedMarker }) => {
   const [reviewText, setReviewText] = useState('');
   const [reviewRating, setReviewRating] = useState(5);
   const [submittingReview, setSubmittingReview] = useState(false);
+  const [sections, setSections] = useState([]);
 
   useEffect(() => {
     const checkFavoriteStatus = async () => {
@@ -64,6 +65,16 @@ const Sidebar = ({ open, onClose, selectedMarker }) => {
     checkFavoriteStatus();
   }, [selectedMarker]);
 
+  // The program list only carries section titles, so load the bodies for the preview
+  useEffect(() => {
+    setSections([]);
+    if (!selectedMarker?.program_id) return;
+    apiService
+      .getProgramSections(selectedMarker.program_id)
+      .then(setSections)
+      .catch((err) => console.error('Error fetching sections:', err));
+  }, [selectedMarker]);
+
   const toggleFavorite = async () => {
     try {
       if (isFavorite) {
@@ -121,9 +132,8 @@ const Sidebar = ({ open, onClose, selectedMarker }) => {
 
   // get first section with content
   const displaySection = useMemo(() => {
-    if (!selectedMarker || !selectedMarker.sections) return null;
-    return selectedMarker.sections.find((s) => hasSectionContent(s?.content)) || null;
-  }, [selectedMarker]);
+    return sections.find((s) => hasSectionContent(s?.content)) || null;
+  }, [sections]);
 
   if (!selectedMarker) return null;
 
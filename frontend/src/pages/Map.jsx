@@ -3,7 +3,7 @@ import { useState, useEffect } from 'react';
 import { MapContainer, TileLayer, useMap } from 'react-leaflet';
 import 'leaflet/dist/leaflet.css';
 import { Box, Autocomplete, TextField } from '@mui/material';
-import { MarkerManager } from '../components/marker';
+import { MarkerManager, hasLocation } from '../components/marker';
 import Sidebar from '../components/sidebar';
 import apiService from '../services/api';
 
@@ -45,14 +45,18 @@ const MapPage = ({ mapCenter }) => {
     setSelectedMarker(marker);
     setSidebarOpen(true);
     // Also zoom to marker when clicked directly
-    setFlyToLocation([marker.latitude, marker.longitude]);
+    if (hasLocation(marker)) {
+      setFlyToLocation([marker.latitude, marker.longitude]);
+    }
   };
 
   const handleProgramSelect = (program) => {
     if (program) {
       setSelectedMarker(program);
       setSidebarOpen(true);
-      setFlyToLocation([program.latitude, program.longitude]);
+      if (hasLocation(program)) {
+        setFlyToLocation([program.latitude, program.longitude]);
+      }
     }
   };
 
@@ -162,23 +162,9 @@ function ProfilePage() {
                 )
               ) : favorites.length > 0 ? (
                 favorites.map((p) => {
-                  const avgRating =
-                    p.reviews && p.reviews.length > 0
-                      ? p.reviews.reduce((acc, r) => acc + r.rating, 0) / p.reviews.length
-                      : 0;
+                  const avgRating = p.average_rating || 0;
 
-                  // Get description preview
-                  let descriptionPreview = '';
-                  if (p.sections && p.sections.length > 0) {
-                    // Try to find a section with content
-                    const section = p.sections.find(s => s.content && s.content.length > 0);
-                    if (section) {
-                      const content = Array.isArray(section.content) ? section.content.join(' ') : section.content;
-                      // Strip HTML tags
-                      const text = content.replace(/<[^>]*>/g, '');
-                      descriptionPreview = text.length > 100 ? text.substring(0, 100) + '...' : text;
-                    }
-                  }
+                  const details = [p.program_type, p.academic_calendar].filter(Boolean).join(' · ');
 
                   return (
                     <ListItemButton
@@ -193,20 +179,20 @@ function ProfilePage() {
                       }}
                     >
                       <ListItemText
-                        primary={p.program_details.name}
-                        secondary={p.location || p.subtitle}
+                        primary={p.name}
+                        secondary={p.continent}
                         sx={{ width: '100%', mb: 0.5 }}
                       />
-                      {descriptionPreview && (
+                      {details && (
                         <Typography variant="body2" color="text.secondary" sx={{ mb: 1, width: '100%' }}>
-                          {descriptionPreview}
+                          {details}
                         </Typography>
                       )}
-                      {p.reviews && p.reviews.length > 0 && (
+                      {p.review_count > 0 && (
                         <Box sx={{ display: 'flex', alignItems: 'center', gap: 1 }}>
                           <Rating value={avgRating} readOnly size="small" precision={0.5} />
                           <Typography variant="caption" color="text.secondary">
-                            ({p.reviews.length} reviews)
+                            ({p.review_count} reviews)
                           </Typography>
                         </Box>
                       )}
@@ -46,12 +46,13 @@ export default function ProgramDetail() {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [programs, favoriteCheck] = await Promise.all([
+        const [programs, sections, favoriteCheck] = await Promise.all([
           apiService.getPrograms(),
+          apiService.getProgramSections(id).catch(() => []),
           apiService.checkFavorite(id).catch(() => ({ is_favorite: false })),
         ]);
         const foundProgram = programs.find((p) => p.program_id === id);
-        setProgram(foundProgram);
+        setProgram(foundProgram && { ...foundProgram, sections });
         setIsFavorite(favoriteCheck.is_favorite);
         setLoading(false);
       } catch (err) {
@@ -418,7 +419,7 @@ export default function ProgramDetail() {
 
             <Box
               component="img"
-              src={program.img_url}
+              src={program.thumbnails?.large?.jpeg || program.img_url}
               alt={program.program_details.name}
               sx={{
                 width: '100%',
@@ -30,6 +30,7 @@ describe('ProgramDetail Page', () => {
 
   beforeEach(() => {
     jest.clearAllMocks();
+    apiService.getProgramSections.mockResolvedValue([]);
   });
 
   describe('Loading State', () => {
@@ -286,6 +286,26 @@ describe('ApiService', () => {
       );
       expect(result).toEqual(mockFavorites);
     });
+
+    it('should follow the next page links', async () => {
+      const firstPage = [{ id: 2, program: { program_id: 'TEST002' } }];
+      const secondPage = [{ id: 1, program: { program_id: 'TEST001' } }];
+      fetchSpy
+        .mockReturnValueOnce(Promise.resolve({
+          ok: true,
+          json: async () => firstPage,
+          headers: { get: () => '<https://backend.example/api/auth/favorites/?cursor=abc>; rel="next"' },
+        }))
+        .mockReturnValueOnce(mockFetchResponse(secondPage));
+
+      const result = await apiService.getFavorites();
+
+      expect(fetchSpy).toHaveBeenLastCalledWith(
+        'http://localhost:8000/api/auth/favorites/?cursor=abc',
+        expect.objectContaining({ method: 'GET' }),
+      );
+      expect(result).toEqual([...firstPage, ...secondPage]);
+    });
   });
 
   describe('addFavorite', () => {
@@ -64,6 +64,32 @@ class ApiService {
     return this.request(endpoint, { method: 'GET' });
   }
 
+  /**
+   * GET every page of a cursor-paginated list, following the next link in the Link header.
+   */
+  async getAllPages(endpoint) {
+    const [path] = endpoint.split('?');
+    const items = [];
+    let url = `${this.baseURL}${endpoint}`;
+    while (url) {
+      const response = await fetch(url, {
+        method: 'GET',
+        headers: { 'Content-Type': 'application/json' },
+        credentials: 'include',
+      });
+      const data = await response.json();
+      if (!response.ok) {
+        throw new Error(data.message || 'Request failed');
+      }
+      items.push(...data);
+      const link = response.headers ? response.headers.get('Link') : null;
+      const next = link && link.match(/<([^>]+)>;\s*rel="next"/);
+      // Only the cursor is taken from the link, so the page is requested from the same base URL
+      url = next ? `${this.baseURL}${path}${new URL(next[1]).search}` : null;
+    }
+    return items;
+  }
+
   /**
    * POST requests use this.
    */
@@ -134,10 +160,24 @@ class ApiService {
   }
 
   /**
-   * Get user favorites
+   * Get the full sections for one program
+   */
+  async getProgramSections(programId) {
+    return this.get(`/programs/${programId}/sections/`);
+  }
+
+  /**
+   * Get the most favorited programs, all time or for a 'week' or 'month' window
+   */
+  async getPopularPrograms(window = 'all', limit = 10) {
+    return this.get(`/programs/popular/?window=${window}&limit=${limit}`);
+  }
+
+  /**
+   * Get all of the user's favorites, page by page
    */
   async getFavorites() {
-    return this.get('/auth/favorites/');
+    return this.getAllPages('/auth/favorites/');
   }
 
   /**
@@ -154,6 +194,21 @@ class ApiService {
     return this.request(`/auth/favorites/${programId}/`, { method: 'DELETE' });
   }
 
+  /**
+   * Add and remove many favorites at once
+   */
+  async updateFavorites({ add = [], remove = [] }) {
+    return this.post('/auth/favorites/bulk/', { add, remove });
+  }
+
+  /**
+   * Get the favorited program ids, optionally only among the given ids
+   */
+  async getFavoriteIds(programIds = []) {
+    const query = programIds.length ? `?program_ids=${encodeURIComponent(programIds.join(','))}` : '';
+    return this.get(`/auth/favorites/ids/${query}`);
+  }
+
   /**
    * Check if program is favorited
    */
@@ -192,10 +247,23 @@ class ApiService {
   }
 
   /**
-   * Get alumni by program
+   * Get alumni by program: { program, alumni, next }, a page at a time
    */
-  async getAlumniByProgram(programId) {
-    return this.get(`/auth/alumni/by-program/${programId}/`);
+  async getAlumniByProgram(programId, cursor = null) {
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+    return this.get(`/auth/alumni/by-program/${programId}/${query}`);
+  }
+
+  /**
+   * Search the alumni directory, e.g. { q: 'ana', program: 'ID', year_from: 2020, fuzzy: true }
+   */
+  async searchAlumni(filters = {}) {
+    const params = new URLSearchParams();
+    Object.entries(filters).forEach(([key, value]) => {
+      if (value !== undefined && value !== null && value !== '') params.append(key, value);
+    });
+    const query = params.toString();
+    return this.get(`/auth/alumni/directory/${query ? `?${query}` : ''}`);
   }
 
   /**